@@ -1,15 +1,24 @@
-from llm_engine import LLMEngine
+from llm_engine import LLMEngine, JSON_SUFFIX, JSON_SYSTEM_PROMPT
+from context_packer import ContextPacker, evidence_budget
+from evidence_index import EvidenceIndex, FIELD_QUERIES
 from browser_engine import ResearchBrowser
+from site_crawler import OfficialSiteCrawler
+from pattern_extractors import extract_fields
+from task_graph import BrowserLanes, TaskGraph
+import schemas
 from data_models import CompanyProfile, KeyPerson, GraphNode, GraphEdge
 import json
 import time
 
 class MicroAgent:
-    def __init__(self, browser, company, log_callback=None):
+    def __init__(self, browser, company, log_callback=None, site=None):
         self.llm = LLMEngine()
+        self.packer = ContextPacker()
         self.browser = browser
         self.company = company
         self.log_callback = log_callback
+        # First-party pages are crawled once and shared by every field
+        self.site = site or OfficialSiteCrawler(browser, company, log_callback)
 
     def _log(self, message):
         if self.log_callback:
@@ -29,26 +38,37 @@ class MicroAgent:
         self._log("Dynamic logo failed. Using fallback.")
         return f"https://logo.clearbit.com/{domain}"
 
-    def research_field(self, field_name, description, context=""):
+    def research_field(self, field_name, description, context="", known=None):
         """
-        Robust 5-Attempt Pipeline with Parallel Search & Engine Swapping.
+        Robust 5-Attempt Pipeline: the company's own pages first, then
+        parallel search & engine swapping.
+        known: sub-keys already read by the pattern extractors; they are left out
+        of the prompt, and the LLM is skipped when they cover the whole schema.
         """
+        known = {k: v for k, v in (known or {}).items() if v}
+        keys = schemas.data_keys(field_name)
+        if known and keys and set(keys) <= set(known):
+            self._log(f"✅ '{field_name}' filled by pattern extractors, no LLM call needed.")
+            return known
+
         data = None
         for attempt in range(1, 6):
             if data and not self._needs_retry(data):
                 break
             self._log(f"🔄 Attempt {attempt}/5 for '{field_name}'...")
-            data = self._execute_step_strategy(field_name, description, attempt)
+            data = self._execute_step_strategy(field_name, description, attempt, skip=set(known))
             
             if self._needs_retry(data):
                 self._log(f"⚠️  Data missing/poor for '{field_name}'. Retrying...")
             else:
                 self._log(f"✅ Data found for '{field_name}' in Attempt {attempt}.")
+        if known:
+            data = {**(data if isinstance(data, dict) else {}), **known}
         return data
 
-    def _execute_step_strategy(self, field_name, description, attempt):
+    def _execute_step_strategy(self, field_name, description, attempt, skip=()):
         """
-        Defines the strategy for each attempt using Google & DDG with DISTINCT queries.
+        Defines the strategy for each attempt: first-party pages, then Google & DDG with DISTINCT queries.
         """
         q_base = f"{self.company} {description}"
         q_special = self._get_smart_query(field_name)
@@ -59,6 +79,14 @@ class MicroAgent:
 
         # --- STRATEGY LOGIC ---
         if attempt == 1:
+            # Official site only: contact/about/team/legal/careers pages, no search traffic
+            self._log("🚀 Strategy: Official Site Pages (sitemap + navigation)")
+            website_text = self.site.pages_for(field_name)
+            if not website_text:
+                self._log("No first-party pages found.")
+                return None
+
+        elif attempt == 2:
             # Parallel: Google (Base) + DDG (Specialized)
             self._log("🚀 Strategy: Google (Main) + DuckDuckGo (Specialized)")
             
@@ -73,7 +101,7 @@ class MicroAgent:
             serp_text = f"GOOGLE RESULTS (Query: {q_base}):\n{g_text}\n\nDUCKDUCKGO RESULTS (Query: {q_special}):\n{d_text}"
             urls = list(set(g_urls + d_urls))
 
-        elif attempt == 2:
+        elif attempt == 3:
             # Swap Strategies: DDG (Base) + Google (Site Specific)
             self._log("🚀 Strategy: DuckDuckGo (Main) + Google (Site Operator)")
             
@@ -91,20 +119,6 @@ class MicroAgent:
             serp_text = f"DDG RESULTS:\n{d_text}\n\nGOOGLE SPECIFIC:\n{g_text}"
             urls = list(set(d_urls + g_urls))
 
-        elif attempt == 3:
-            # Deep Scrape Official Site
-            self._log("🚀 Strategy: Deep Official Site Scrape")
-            guess_url = f"https://www.{self.company.split('.')[0].lower()}.com"
-            if "." in self.company: guess_url = f"https://www.{self.company}"
-            
-            website_text += self.browser.scrape_text(guess_url)
-            
-            # Try finding "About" or "Contact" pages via search
-            q = f"{self.company} contact about us management team"
-            # Just use Google for this specific hunt
-            _, specific_urls = self.browser.search_google(q)
-            urls = specific_urls
-
         elif attempt == 4:
             # Broad Fallback - Google Only
             self._log("🚀 Strategy: Broad Google Search")
@@ -119,27 +133,42 @@ class MicroAgent:
 
         # --- BROWSING (Surf Top URLs) ---
         surf_limit = 3
-        count = 0
+        candidates = []
         for url in urls:
-            if count >= surf_limit: break
             # Skip social media profiles unless looking for them
             if any(x in url for x in ["facebook.com", "twitter.com", "instagram.com"]) and field_name != "social_media":
                 continue
-            
-            self._log(f"Reading: {url}")
-            scraped = self.browser.scrape_text(url)
-            if scraped:
-                website_text += f"\n--- SOURCE: {url} ---\n{scraped}\n"
-                count += 1
+            candidates.append(url)
+
+        # Fetch a few spares concurrently so a JS-only page doesn't cost a browser load
+        candidates = candidates[:surf_limit * 2]
+        if candidates:
+            self._log(f"Reading {len(candidates)} candidate pages...")
+        for url, scraped in self.browser.scrape_many(candidates, limit=surf_limit).items():
+            website_text += f"\n--- SOURCE: {url} ---\n{scraped}\n"
 
         # --- EXTRACTION ---
-        full_context = f"SEARCH CONTEXT:\n{serp_text[:8000]}\n\nBROWSED CONTENT:\n{website_text[:15000]}"
-        schema_hint = self.get_schema_hint(field_name)
+        # The field's schema is shown in the prompt and also constrains decoding
+        schema = schemas.field_schema(field_name, skip)
+        schema_hint = schemas.schema_hint(schema)
+        # Only the field's top BM25 chunks go in, first-party pages weighted up
+        budget = evidence_budget(self._build_prompt(field_name, schema_hint, ""), JSON_SYSTEM_PROMPT, JSON_SUFFIX)
+        index = EvidenceIndex(self.packer).build(
+            [("SEARCH CONTEXT", serp_text, 1.0), ("BROWSED CONTENT", website_text, 1.2)]
+        )
+        query = f"{FIELD_QUERIES.get(field_name, field_name.replace('_', ' '))} {description}"
+        full_context = index.pack_for_fields([field_name], budget, queries={field_name: query})
+        prompt = self._build_prompt(field_name, schema_hint, full_context)
         
-        prompt = f"""
+        # Easy fields try the small model first and escalate only if its answer fails validation
+        result = self.llm.generate_json_routed(prompt, field_name, schema=schema)
+        data = result.get("data")
+        return self._clean_data(data)
+
+    def _build_prompt(self, field_name, schema_hint, full_context):
+        # Stable instructions first, then company and field, evidence last (prompt-prefix reuse)
+        return f"""
         You are an expert Data Analyst validation agent.
-        Target: '{self.company}'
-        Field: '{field_name}'
         
         INSTRUCTIONS:
         1. Analyze search results from Google and DuckDuckGo.
@@ -148,16 +177,15 @@ class MicroAgent:
         4. If data is explicitly MISSING, return empty string "". 
         5. For multiple values, return a list.
         
+        Target: '{self.company}'
+        Field: '{field_name}'
+        
         JSON SCHEMA:
         {schema_hint}
         
         DATA:
         {full_context}
         """
-        
-        result = self.llm.generate_json(prompt)
-        data = result.get("data")
-        return self._clean_data(data)
 
     def _get_smart_query(self, field_name):
         """Generates specialized queries for retry/parallel tab."""
@@ -180,48 +208,37 @@ class MicroAgent:
              return all(not v for v in data.values())
         return False
 
-    def get_schema_hint(self, field_name):
-        if field_name == "key_people":
-            return 'Return JSON: { "data": [ {"name": "Name", "title": "Title", "role_category": "Management", "email": "email", "linkedin_url": ""} ] }'
-        elif field_name == "locations":
-            return 'Return JSON: { "data": ["Location 1", "Location 2"] }'
-        elif field_name == "products_services":
-            return 'Return JSON: { "data": ["Product 1", "Product 2"], "type": "Service/Product Type" }'
-        elif field_name == "tech_stack":
-            return 'Return JSON: { "data": ["Tech 1", "Tech 2"] }'
-        elif field_name == "social_media":
-            return 'Return JSON: { "data": {"linkedin": "url", "twitter": "url", "facebook": "url", "instagram": "url", "youtube": "url", "blog": "url", "articles": ["article1"]} }'
-        elif field_name == "registration_details":
-            return 'Return JSON: { "data": {"vat_number": "number", "registration_number": "number", "sic_code": "code", "year_founded": "year"} }'
-        elif field_name == "certifications":
-            return 'Return JSON: { "data": ["ISO 27001", "GDPR"] }'
-        elif field_name == "contact_granular":
-             return 'Return JSON: { "data": {"phone": "main", "sales": "sales_num", "mobile": "mobile_num", "fax": "fax_num", "other": ["num1"], "email": "email", "address": "full address", "hours": "9am-5pm"} }'
-        elif field_name == "industry_details":
-             return 'Return JSON: { "data": {"industry": "Industry", "sub_industry": "Sub", "sector": "Sector", "tags": ["tag1", "tag2"]} }'
-        elif field_name == "hq_indicator":
-             return 'Return JSON: { "data": "Yes/No or Location Name" }'
-        else:
-            return 'Return JSON: { "data": "extracted text string" }'
-
     def _clean_data(self, data):
         if isinstance(data, str):
-            if data.lower() in ["not found", "n/a", "unknown", "none", "no information"]:
+            # Give-up answers, and skeleton values copied from the prompt schema
+            if data.lower() in ["not found", "n/a", "unknown", "none", "no information"] or schemas.is_placeholder(data):
                 return ""
             return data
         elif isinstance(data, list):
-            return [self._clean_data(item) for item in data if item]
+            cleaned = [self._clean_data(item) for item in data if item]
+            # Drop entries left empty, e.g. a key_people item made only of copied hints
+            return [item for item in cleaned if item and not (isinstance(item, dict) and not any(item.values()))]
         elif isinstance(data, dict):
              return {k: self._clean_data(v) for k, v in data.items()}
         return data
 
 class AutonomousLeadAgent:
-    def __init__(self, company_name, log_callback=None):
+    # Pattern-extracted profile fields -> MicroAgent schema keys
+    CONTACT_KEYS = {"contact_phone": "phone", "contact_email": "email", "mobile": "mobile",
+                    "fax": "fax", "full_address": "address"}
+    SOCIAL_KEYS = {"social_linkedin": "linkedin", "social_twitter": "twitter", "social_facebook": "facebook",
+                   "social_instagram": "instagram", "social_youtube": "youtube"}
+
+    def __init__(self, company_name, log_callback=None, browser=None):
         self.log_callback = log_callback
         self.company = company_name
-        self.browser = ResearchBrowser()
+        # A browser handed in by a worker pool outlives this agent, so only close our own
+        self.owns_browser = browser is None
+        self.browser = browser or ResearchBrowser()
         self.profile = CompanyProfile(name=company_name, domain=company_name)
-        self.worker = MicroAgent(self.browser, company_name, log_callback)
+        self.site = OfficialSiteCrawler(self.browser, company_name, log_callback)
+        self.worker = MicroAgent(self.browser, company_name, log_callback, site=self.site)
+        self.pattern_fields = {}  # Filled by _extract_patterns before the contact / social fields run
         
     def _log(self, message):
         if self.log_callback:
@@ -231,58 +248,108 @@ class AutonomousLeadAgent:
         
     def run_pipeline(self):
         self._log(f"🚀 Starting Dual-Engine Pipeline (Google + DDG) for {self.company}")
-        
+
+        # Independent fields run concurrently, each on its own browser lane (see task_graph.py)
+        lanes = BrowserLanes(self.browser, self._lane_worker, log_callback=self.log_callback)
+        fields = ["description", "industry_details", "products_services", "locations", "hq_indicator",
+                  "key_people", "tech_stack", "contact_granular", "social_media"]
+        graph = TaskGraph(self.log_callback)
+        graph.add("domain", self._resolve_domain)
+        graph.add("logo", self._fetch_logo, deps=["domain"], needs_browser=True)
+        # Fixed-format fields (VAT, company no., SIC, phones, emails, socials) read from the site without the LLM;
+        # the crawl drives the agent's own browser, so it runs before any field can hold that browser
+        graph.add("patterns", self._extract_patterns, deps=["logo"])
+        for field in fields:
+            graph.add(field, getattr(self, f"_research_{field}"), deps=["patterns"], needs_browser=True)
+        try:
+            started = time.time()
+            graph.run(lanes)
+            self._log(f"⏱️ Fields researched in {time.time() - started:.1f}s")
+        finally:
+            lanes.close()
+
+        if self.owns_browser:
+            self._log("Research complete. Shutting down browser...")
+            self.browser.close()
+        else:
+            self._log("Research complete. Returning browser to worker.")
+        self._build_graph()
+        return self.profile
+
+    def _lane_worker(self, browser):
+        """The MicroAgent that drives one browser lane; every lane shares the site crawl."""
+        if browser is self.browser:
+            return self.worker
+        return MicroAgent(browser, self.company, self.log_callback, site=self.site)
+
+    # --- Pipeline tasks ---
+
+    def _resolve_domain(self):
         # 0. Logo & Domain
-        if "." in self.company: 
-             self.profile.domain = self.company
-             self.profile.name = self.company.split('.')[0].title()
-        self.profile.logo_url = self.worker.fetch_logo(self.profile.domain)
+        if "." in self.company:
+            self.profile.domain = self.company
+            self.profile.name = self.company.split('.')[0].title()
 
+    def _fetch_logo(self, worker):
+        self.profile.logo_url = worker.fetch_logo(self.profile.domain)
+
+    def _research_description(self, worker):
         # 1. Identity & Basics
-        desc_data = self.worker.research_field("description", "company overview mission acronym")
+        desc_data = worker.research_field("description", "company overview mission acronym")
         if isinstance(desc_data, str) and desc_data:
             self.profile.description_long = desc_data
             self.profile.description_short = desc_data[:200] + "..."
-        
+
+    def _research_industry_details(self, worker):
         # 2. Industry Deep Dive
-        ind_data = self.worker.research_field("industry_details", "industry sub-industry sector tags")
+        ind_data = worker.research_field("industry_details", "industry sub-industry sector tags")
         if isinstance(ind_data, dict):
             self.profile.industry = ind_data.get("industry", "")
             self.profile.sub_industry = ind_data.get("sub_industry", "")
             self.profile.sector = ind_data.get("sector", "")
             self.profile.tags = ind_data.get("tags", [])
 
+    def _research_products_services(self, worker):
         # 3. Products & Services
-        prod_data = self.worker.research_field("products_services", "products services list type of offering")
+        prod_data = worker.research_field("products_services", "products services list type of offering")
         if isinstance(prod_data, dict):
             self.profile.service_type = prod_data.get("type", "")
             self.profile.products_services.extend(prod_data.get("data", []))
         elif isinstance(prod_data, list):
              self.profile.products_services = prod_data
 
+    def _research_locations(self, worker):
         # 4. Locations & HQ
-        loc_data = self.worker.research_field("locations", "locations offices headquarters indicator")
+        loc_data = worker.research_field("locations", "locations offices headquarters indicator")
         if isinstance(loc_data, list):
             self.profile.locations = loc_data
-        
-        hq_data = self.worker.research_field("hq_indicator", "headquarters address indicator")
+
+    def _research_hq_indicator(self, worker):
+        hq_data = worker.research_field("hq_indicator", "headquarters address indicator")
         if isinstance(hq_data, str):
             self.profile.hq_indicator = hq_data
 
+    def _research_key_people(self, worker):
         # 5. Key People
-        ppl_data = self.worker.research_field("key_people", "leadership executives email")
+        ppl_data = worker.research_field("key_people", "leadership executives email")
         if isinstance(ppl_data, list):
             for p in ppl_data:
                 if isinstance(p, dict):
                     self.profile.key_people.append(KeyPerson(**p))
-                    
+
+    def _research_tech_stack(self, worker):
         # 6. Tech Stack
-        tech_data = self.worker.research_field("tech_stack", "technology stack software tools used")
+        tech_data = worker.research_field("tech_stack", "technology stack software tools used")
         if isinstance(tech_data, list):
             self.profile.tech_stack = tech_data
-            
+
+    def _research_contact_granular(self, worker):
         # 7. Contact
-        cont_data = self.worker.research_field("contact_granular", "contact phone mobile sales support fax hours email")
+        found = self.pattern_fields
+        cont_data = worker.research_field(
+            "contact_granular", "contact phone mobile sales support fax hours email",
+            known={key: found[f] for f, key in self.CONTACT_KEYS.items() if f in found},
+        )
         if isinstance(cont_data, dict):
             self.profile.contact_phone = cont_data.get("phone") or ""
             self.profile.contact_email = cont_data.get("email") or ""
@@ -293,8 +360,13 @@ class AutonomousLeadAgent:
             self.profile.full_address = cont_data.get("address") or ""
             self.profile.hours_of_operation = cont_data.get("hours") or ""
 
+    def _research_social_media(self, worker):
         # 8. Social
-        social_data = self.worker.research_field("social_media", "social media profiles articles blog")
+        found = self.pattern_fields
+        social_data = worker.research_field(
+            "social_media", "social media profiles articles blog",
+            known={key: found[f] for f, key in self.SOCIAL_KEYS.items() if f in found},
+        )
         if isinstance(social_data, dict):
             self.profile.social_linkedin = social_data.get("linkedin")
             self.profile.social_twitter = social_data.get("twitter")
@@ -304,10 +376,17 @@ class AutonomousLeadAgent:
             self.profile.social_blog = social_data.get("blog")
             self.profile.social_articles = social_data.get("articles", [])
 
-        self._log("Research complete. Shutting down browser...")
-        self.browser.close()
-        self._build_graph()
-        return self.profile
+    def _extract_patterns(self):
+        """Runs the pattern extractors over the crawled first-party pages and fills the profile directly."""
+        self.site.crawl()
+        text = "".join(f"\n--- SOURCE: {url} ---\n{content}\n" for url, content in self.site.content.items())
+        found = extract_fields(text, self.profile.domain, first_party=True)
+        for field, value in found.items():
+            setattr(self.profile, field, value)
+        if found:
+            self._log(f"🔎 Pattern extractors filled {len(found)} fields: {list(found)}")
+        self.pattern_fields = found
+        return found
 
     def _build_graph(self):
         self._log("🕸️  Building Knowledge Graph...")
@@ -0,0 +1,27 @@
+"""
+Shared background event loop.
+The agents run in plain threads (server / worker pool), so async clients
+live on one long-running loop and sync code submits coroutines to it.
+"""
+
+import asyncio
+import threading
+
+_loop = None
+_lock = threading.Lock()
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """Returns the shared loop, starting its thread on first use."""
+    global _loop
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            t = threading.Thread(target=_loop.run_forever, name="atlas-async", daemon=True)
+            t.start()
+    return _loop
+
+
+def run(coro, timeout=None):
+    """Runs a coroutine on the shared loop and blocks until it finishes."""
+    return asyncio.run_coroutine_threadsafe(coro, get_loop()).result(timeout)
@@ -0,0 +1,87 @@
+"""
+Offline Benchmark
+=================
+Records a run once, then replays it as often as needed with no network:
+
+    python benchmark.py --record acme.co.uk example.com      # live, fills fixtures/
+    python benchmark.py acme.co.uk example.com               # replay from fixtures/
+    python benchmark.py --agent autonomous --llm-latency 0 acme.co.uk
+
+Every run starts from an empty page/SERP cache so timings are comparable.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Record or replay research runs and time them.")
+    parser.add_argument("domains", nargs="+")
+    parser.add_argument("--record", action="store_true", help="Run live and store fixtures")
+    parser.add_argument("--agent", choices=["optimized", "autonomous"], default="optimized")
+    parser.add_argument("--fixtures", default="fixtures", help="Fixture directory")
+    parser.add_argument("--llm-latency", default="recorded", help='Seconds per LLM call, or "recorded"')
+    parser.add_argument("--out", help="Write the results as JSON to this file")
+    return parser.parse_args()
+
+
+def filled_fields(profile) -> int:
+    data = profile.model_dump(exclude={"graph_nodes", "graph_edges"})
+    return sum(1 for value in data.values() if value not in (None, "", [], {}))
+
+
+def main():
+    args = parse_args()
+    # Modes are read by config at import time, so set them before importing the pipeline
+    os.environ["ATLAS_REPLAY_MODE"] = "record" if args.record else "replay"
+    os.environ["ATLAS_FIXTURE_DIR"] = os.path.abspath(args.fixtures)
+    os.environ["ATLAS_REPLAY_LLM_LATENCY"] = args.llm_latency
+    os.environ["ATLAS_CACHE_DIR"] = tempfile.mkdtemp(prefix="atlas_bench_cache_")
+
+    import replay
+    from session_manager import get_session_pool
+    if args.agent == "optimized":
+        from optimized_pipeline import OptimizedResearchAgent as Agent
+    else:
+        from agents import AutonomousLeadAgent as Agent
+
+    mode = "RECORD" if args.record else "REPLAY"
+    print(f"📼 {mode} {args.agent} agent on {len(args.domains)} domains (fixtures: {args.fixtures})")
+
+    pool = get_session_pool()
+    rows = []
+    with pool.lease() as browser:
+        for domain in args.domains:
+            started = time.time()
+            error = ""
+            try:
+                profile = Agent(domain, browser=browser).run_pipeline()
+                filled = filled_fields(profile)
+            except Exception as e:
+                filled, error = 0, str(e)
+            rows.append({"domain": domain, "seconds": round(time.time() - started, 2),
+                         "fields_filled": filled, "error": error})
+            browser.reset_session(clear_cookies=True)
+    pool.close_idle()
+
+    print("\n" + "=" * 60)
+    print(f"{'DOMAIN':<32}{'SECONDS':>10}{'FIELDS':>10}")
+    for row in rows:
+        print(f"{row['domain']:<32}{row['seconds']:>10.1f}{row['fields_filled']:>10}  {row['error'][:40]}")
+    total = sum(row["seconds"] for row in rows)
+    print(f"{'TOTAL':<32}{total:>10.1f}")
+    stats = replay.get_store().stats()
+    print(f"Fixtures served: {stats['served']}  missing: {stats['missing']}")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"mode": mode.lower(), "agent": args.agent, "runs": rows, "fixtures": stats}, f, indent=2)
+    return 1 if any(row["error"] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,8 @@
 import time
-import shutil
 import os
+import glob
 import random
+from contextlib import contextmanager
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
@@ -10,27 +11,135 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from urllib.parse import urlparse
+from http_fetcher import get_fetcher
+from content_extractor import extract_page
+from cache_store import get_page_cache, get_search_cache
+from profile_manager import get_profile_manager
+from page_archive import get_archive
+from rate_limiter import get_scheduler
+import replay
 import config
 
+# Resource groups blocked in text-only mode (CDP Network.setBlockedURLs wildcard patterns)
+_EXTENSIONS = {
+    "image": ["png", "jpg", "jpeg", "gif", "webp", "avif", "svg", "ico", "bmp"],
+    "font": ["woff", "woff2", "ttf", "otf", "eot"],
+    "media": ["mp4", "webm", "mp3", "ogg", "wav", "m4a", "mov", "m3u8"],
+}
+BLOCKED_RESOURCE_PATTERNS = {
+    group: [p for ext in exts for p in (f"*.{ext}", f"*.{ext}?*")]
+    for group, exts in _EXTENSIONS.items()
+}
+BLOCKED_RESOURCE_PATTERNS["tracker"] = [
+    f"*{host}*" for host in [
+        "google-analytics.com", "googletagmanager.com", "doubleclick.net", "googlesyndication.com",
+        "adservice.google.", "connect.facebook.net", "hotjar.com", "clarity.ms", "segment.io",
+        "cdn.segment.com", "hs-analytics.net", "hs-scripts.com", "scorecardresearch.com",
+        "quantserve.com", "nr-data.net", "js-agent.newrelic.com", "intercom.io", "optimizely.com",
+        "mixpanel.com", "amplitude.com", "taboola.com", "outbrain.com", "criteo.com",
+        "bat.bing.com", "px.ads.linkedin.com", "snap.licdn.com", "static.ads-twitter.com",
+        "tiktok.com/i18n/pixel", "cookielaw.org", "cookiebot.com",
+    ]
+]
+
+
+# Single round trip captcha check. Returns {kinds, frames, button, url}:
+# kinds is empty on a clean page, frames are the iframe indexes worth clicking into.
+# Only known challenge markup counts (reCAPTCHA / hCaptcha / Turnstile frames, Cloudflare
+# challenge ids, Google's /sorry page); ordinary "Verify email" or age-check buttons do not.
+CAPTCHA_DETECT_SCRIPT = """
+    var kinds = [], frames = [];
+    var all = document.getElementsByTagName('iframe');
+    for (var i = 0; i < all.length; i++) {
+        var src = all[i].src || '';
+        if (!/(google\\.com|recaptcha\\.net)\\/recaptcha\\/|hcaptcha\\.com|challenges\\.cloudflare\\.com/.test(src) ||
+            /size=invisible/.test(src)) continue;
+        var r = all[i].getBoundingClientRect();
+        if (r.width > 0 && r.height > 0) {
+            frames.push(i);
+            kinds.push(/hcaptcha/.test(src) ? 'hcaptcha' : /cloudflare/.test(src) ? 'turnstile' : 'recaptcha');
+        }
+    }
+    if (/(^|\\.)google\\./.test(location.hostname) && location.pathname.indexOf('/sorry') === 0) kinds.push('block_page');
+    if (document.getElementById('challenge-form') || document.getElementById('cf-challenge-running')) kinds.push('cloudflare');
+    // A verify button is only worth clicking on a page already known to be a challenge
+    var button = false;
+    if (kinds.length) {
+        var buttons = document.getElementsByTagName('button');
+        for (var j = 0; j < buttons.length; j++) {
+            if (/human|verify/.test(buttons[j].textContent)) { button = true; break; }
+        }
+    }
+    return {kinds: kinds, frames: frames, button: button, url: location.href};
+"""
+
+
+# One execute_script per SERP: body text plus [{title, url, snippet}] for every organic result.
+# arguments: title selector, result container selector, snippet selector, host to skip, limit,
+# include raw HTML (for the page archive)
+SERP_SCRIPT = """
+    var titleSel = arguments[0], boxSel = arguments[1], snipSel = arguments[2],
+        skipHost = arguments[3], limit = arguments[4];
+    var results = [], seen = {};
+    var titles = document.querySelectorAll(titleSel);
+    for (var i = 0; i < titles.length && results.length < limit; i++) {
+        var link = titles[i].closest('a') || titles[i];
+        var url = link.href || '';
+        if (!/^https?:/.test(url) || (skipHost && url.indexOf(skipHost) >= 0) || seen[url]) continue;
+        seen[url] = true;
+        var box = link.closest(boxSel);
+        var snip = box ? box.querySelector(snipSel) : null;
+        results.push({
+            title: (titles[i].innerText || '').trim(),
+            url: url,
+            snippet: snip ? snip.innerText.replace(/\\s+/g, ' ').trim() : ''
+        });
+    }
+    return {text: document.body ? document.body.innerText : '', results: results, url: location.href,
+            html: arguments[5] ? document.documentElement.outerHTML : ''};
+"""
+
+SERP_LAYOUTS = {
+    "google": ("#search a h3, div.g a h3", "div.g, div.MjjYud", ".VwiC3b, [data-sncf], div[style*='line-clamp']", "google.com"),
+    "ddg": ("a[data-testid='result-title-a']", "article, li[data-layout='organic']", "[data-result='snippet']", ""),
+}
+
+
+def format_serp(serp_text, results):
+    """Search context for the LLM: numbered results with their URLs first, then the page text."""
+    lines = []
+    for i, result in enumerate(results, 1):
+        lines.append(f"{i}. {result.get('title', '')} - {result['url']}")
+        if result.get("snippet"):
+            lines.append(f"   {result['snippet']}")
+    if not lines:
+        return serp_text
+    return "RESULTS:\n" + "\n".join(lines) + f"\n\nPAGE:\n{serp_text}"
+
+
 class ResearchBrowser:
     def __init__(self):
-        self.driver = self._setup_driver()
+        self.fetcher = get_fetcher()
+        self.page_cache = get_page_cache()
+        self.search_cache = get_search_cache()
+        self.scheduler = get_scheduler()
+        # Every browser gets its own clone of the trimmed profile, so workers can run side by side
+        self.profile_manager = get_profile_manager()
+        self.profile_dir = self.profile_manager.acquire()
+        # Session bookkeeping used by the session pool to reset / recycle this browser
+        self.pages_loaded = 0
+        self.visited_origins = set()
+        self._blocking = {}  # window handle -> blocked URL patterns currently applied
+        try:
+            self.driver = self._setup_driver()
+        except Exception:
+            self.profile_manager.release(self.profile_dir)
+            raise
 
     def _setup_driver(self):
         """Sets up a detached Brave browser instance."""
-        temp_profile = "/tmp/Atlas_Browser_Profile"
-        
-        if os.path.exists(temp_profile):
-            try: shutil.rmtree(temp_profile)
-            except: pass
-            
-        try:
-            shutil.copytree(
-                config.USER_DATA_DIR, 
-                temp_profile, 
-                ignore=shutil.ignore_patterns("Cache*", "Code Cache*", "Singleton*", "lock")
-            )
-        except: pass
+        temp_profile = self.profile_dir
 
         options = Options()
         if os.path.exists(config.BRAVE_PATH):
@@ -43,12 +152,13 @@ class ResearchBrowser:
         options.add_experimental_option("excludeSwitches", ["enable-automation"])
         options.add_experimental_option("useAutomationExtension", False)
         options.add_argument("--start-maximized")
+        options.page_load_strategy = config.PAGE_LOAD_STRATEGY
 
         # STRATEGY 1: Selenium Manager (Best for modern setups)
         try:
             print("🌐 Attempting to launch browser with Selenium Manager...")
             driver = webdriver.Chrome(options=options)
-            driver.set_page_load_timeout(45)
+            driver.set_page_load_timeout(config.PAGE_LOAD_TIMEOUT)
             print("✅ Browser Launched via Selenium Manager")
             return driver
         except Exception as e:
@@ -58,7 +168,7 @@ class ResearchBrowser:
         try:
             service = Service(ChromeDriverManager(driver_version="131.0.6778.204").install())
             driver = webdriver.Chrome(service=service, options=options)
-            driver.set_page_load_timeout(45) 
+            driver.set_page_load_timeout(config.PAGE_LOAD_TIMEOUT)
             return driver
         except Exception as e:
             print(f"❌ Critical Browser Failure: {e}")
@@ -66,40 +176,58 @@ class ResearchBrowser:
 
     def check_and_solve_captcha(self):
         """
-        Attempts to auto-click 'I'm not a robot' checkboxes.
+        Detects a challenge with one in-page script call; only on a positive verdict
+        does it switch into frames and try the 'I'm not a robot' checkbox / verify buttons.
+        Every verdict is reported to the scheduler (backoff + per-host captcha rate).
+        Returns True if challenged.
         """
         try:
-            frames = self.driver.find_elements(By.TAG_NAME, "iframe")
-            for frame in frames:
+            verdict = self.driver.execute_script(CAPTCHA_DETECT_SCRIPT)
+        except Exception:
+            return False
+
+        url = (verdict or {}).get("url") or ""
+        if not (verdict or {}).get("kinds"):
+            self.scheduler.report_ok(url)
+            return False
+
+        print(f"🛑 Challenge detected ({', '.join(verdict.get('kinds', []))}) on {url[:80]}")
+        self.scheduler.report_captcha(url)
+
+        try:
+            for index in verdict.get("frames", []):
                 try:
-                    src = frame.get_attribute("src")
-                    if src and ("recaptcha" in src or "captcha" in src):
-                        self.driver.switch_to.frame(frame)
-                        try:
-                            checkbox = self.driver.find_element(By.ID, "recaptcha-anchor")
-                            checkbox.click()
-                            print("🤖 Auto-clicked CAPTCHA!")
-                            time.sleep(2)
-                        except: pass
-                        self.driver.switch_to.default_content()
-                except:
+                    frame = self.driver.find_elements(By.TAG_NAME, "iframe")[index]
+                    self.driver.switch_to.frame(frame)
+                    try:
+                        self.driver.find_element(By.ID, "recaptcha-anchor").click()
+                        print("🤖 Auto-clicked CAPTCHA!")
+                        time.sleep(2)
+                    except: pass
+                finally:
                     self.driver.switch_to.default_content()
-            
-            buttons = self.driver.find_elements(By.XPATH, "//button[contains(text(), 'human') or contains(text(), 'verify')]")
-            for btn in buttons:
-                try:
-                    btn.click()
-                    print("🤖 Auto-clicked Verification Button!")
-                    time.sleep(2)
-                except: pass
+
+            if verdict.get("button"):
+                buttons = self.driver.find_elements(By.XPATH, "//button[contains(text(), 'human') or contains(text(), 'verify')]")
+                for btn in buttons:
+                    try:
+                        btn.click()
+                        print("🤖 Auto-clicked Verification Button!")
+                        time.sleep(2)
+                    except: pass
         except Exception:
             pass
-        return False
+        return True
 
     def search_google(self, query):
         print(f"G-Search: '{query}'")
+        cached = self.search_cache.get("google", query)
+        if cached is not None:
+            print("💾 SERP cache hit")
+            serp_text, results = cached
+            return format_serp(serp_text, results[:4]), [r["url"] for r in results[:4]]
         try:
-            self.driver.get("https://www.google.com")
+            self.navigate("https://www.google.com")
             try:
                 wait = WebDriverWait(self.driver, 5)
                 box = wait.until(EC.presence_of_element_located((By.NAME, "q")))
@@ -118,24 +246,23 @@ class ResearchBrowser:
             except: pass
             
             time.sleep(1) 
-            serp_text = self.driver.find_element(By.TAG_NAME, "body").text
-            results = []
-            elements = self.driver.find_elements(By.CSS_SELECTOR, "div.g a h3")
-            for el in elements[:4]: 
-                try:
-                    parent = el.find_element(By.XPATH, "./../..")
-                    link = parent.get_attribute("href")
-                    if link and "google.com" not in link: results.append(link)
-                except: continue
-            return serp_text, results
+            serp_text, results = self.parse_serp("google", limit=4)
+            if replay.recording(): replay.record_serp("google", query, self.driver.page_source)
+            if results: self.search_cache.put("google", query, serp_text, results)
+            return format_serp(serp_text, results), [r["url"] for r in results]
         except Exception as e:
             print(f"❌ Google Error: {e}")
             return "", []
 
     def search_duckduckgo(self, query):
         print(f"D-Search: '{query}'")
+        cached = self.search_cache.get("ddg", query)
+        if cached is not None:
+            print("💾 SERP cache hit")
+            serp_text, results = cached
+            return format_serp(serp_text, results[:4]), [r["url"] for r in results[:4]]
         try:
-            self.driver.get("https://duckduckgo.com")
+            self.navigate("https://duckduckgo.com")
             self.check_and_solve_captcha()
             try:
                 wait = WebDriverWait(self.driver, 5)
@@ -157,20 +284,163 @@ class ResearchBrowser:
                 )
             except: pass
             
-            serp_text = self.driver.find_element(By.TAG_NAME, "body").text
-            results = []
-            elements = self.driver.find_elements(By.CSS_SELECTOR, "a[data-testid='result-title-a']")
-            for el in elements[:4]:
-                try:
-                    link = el.get_attribute("href")
-                    if link: results.append(link)
-                except: continue
-            return serp_text, results
+            serp_text, results = self.parse_serp("ddg", limit=4)
+            if replay.recording(): replay.record_serp("ddg", query, self.driver.page_source)
+            if results: self.search_cache.put("ddg", query, serp_text, results)
+            return format_serp(serp_text, results), [r["url"] for r in results]
         except Exception as e:
              # Fallback if selectors change
             print(f"❌ DDG Error: {e}")
             return "", []
 
+    def parse_serp(self, engine, limit=10):
+        """Body text and organic results of the SERP in the current tab, in one round trip."""
+        title_sel, box_sel, snippet_sel, skip_host = SERP_LAYOUTS[engine]
+        try:
+            data = self.driver.execute_script(SERP_SCRIPT, title_sel, box_sel, snippet_sel, skip_host, limit,
+                                              config.ARCHIVE_ENABLED) or {}
+        except Exception as e:
+            print(f"⚠️ SERP parse failed ({engine}): {e}")
+            return "", []
+        if data.get("html"):
+            get_archive().add(data.get("url") or engine, data["html"], kind="serp", source="browser")
+        return data.get("text") or "", data.get("results") or []
+
+    def navigate(self, url, allow=()):
+        """
+        Loads a URL in the current tab. Every page load goes through here.
+        allow: resource groups ("image", "font", "media", "tracker") to let through text-only mode.
+        """
+        self._track(url)
+        self.set_text_only(allow)
+        with self.scheduler.slot(url):
+            self.driver.get(replay.local_url(url, via="browser") if replay.replaying() else url)
+        if replay.recording():
+            self._record_current(url)
+
+    def _record_current(self, url):
+        """Record mode: stores the rendered DOM of the current tab as the fixture for `url`."""
+        try:
+            replay.record_page("browser", url, self.driver.current_url, 200, "text/html; charset=utf-8", self.driver.page_source)
+        except Exception as e:
+            print(f"⚠️ Record failed for {url}: {e}")
+
+    @contextmanager
+    def page_load_timeout(self, seconds):
+        """
+        Temporarily caps how long a driver command waits on a pending navigation.
+        chromedriver holds switch_to / execute_script until a loading tab is ready,
+        so polling several loading tabs needs a short cap to honour per-tab deadlines.
+        """
+        self.driver.set_page_load_timeout(seconds)
+        try:
+            yield
+        finally:
+            self.driver.set_page_load_timeout(config.PAGE_LOAD_TIMEOUT)
+
+    def open_background_tab(self, url, allow=()):
+        """
+        Opens a URL in a new tab without waiting for it to load. Returns the new window handle.
+        The caller books the request with the scheduler (see ParallelBrowserEngine).
+        """
+        self._track(url)
+        before = set(self.driver.window_handles)
+        self.driver.execute_script("window.open('about:blank', '_blank');")
+        new_handles = [h for h in self.driver.window_handles if h not in before]
+        if not new_handles:
+            return None
+        # Blocking must be in place before the real load starts, so open blank first
+        self.driver.switch_to.window(new_handles[0])
+        self.set_text_only(allow)
+        self.driver.execute_script("window.location.href = arguments[0];",
+                                   replay.local_url(url, via="browser") if replay.replaying() else url)
+        return new_handles[0]
+
+    def set_text_only(self, allow=()):
+        """
+        Blocks images, fonts, media and tracker hosts in the current tab via DevTools
+        request blocking, except for the groups listed in `allow`.
+        """
+        patterns = []
+        if config.TEXT_ONLY_MODE:
+            for group, group_patterns in BLOCKED_RESOURCE_PATTERNS.items():
+                if group not in allow:
+                    patterns.extend(group_patterns)
+
+        try:
+            handle = self.driver.current_window_handle
+            if self._blocking.get(handle) == patterns:
+                return
+            self.driver.execute_cdp_cmd("Network.enable", {})
+            self.driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+            self._blocking[handle] = patterns
+        except Exception:
+            pass  # Non-Chromium driver or tab gone - load everything
+
+    def _track(self, url):
+        self.pages_loaded += 1
+        parsed = urlparse(url)
+        if parsed.scheme in ("http", "https"):
+            self.visited_origins.add(f"{parsed.scheme}://{parsed.netloc}")
+
+    def reset_session(self, clear_cookies=True):
+        """Returns the browser to a clean state between domains: one blank tab, no cookies or site storage."""
+        handles = self.driver.window_handles
+        for handle in handles[1:]:
+            self.driver.switch_to.window(handle)
+            self.driver.close()
+        self.driver.switch_to.window(handles[0])
+        self.driver.get("about:blank")
+        self._blocking = {h: p for h, p in self._blocking.items() if h == handles[0]}
+
+        if clear_cookies:
+            try: self.driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+            except: pass
+        for origin in self.visited_origins:
+            try:
+                self.driver.execute_cdp_cmd("Storage.clearDataForOrigin", {
+                    "origin": origin,
+                    "storageTypes": "local_storage,session_storage,indexeddb,websql,service_workers,cache_storage",
+                })
+            except: pass
+        self.visited_origins.clear()
+
+    def memory_mb(self):
+        """Resident memory of the whole browser process tree (Linux /proc), 0 if unknown."""
+        try:
+            root = self.driver.service.process.pid
+        except Exception:
+            return 0
+        children = {}
+        for stat_path in glob.glob("/proc/[0-9]*/stat"):
+            try:
+                with open(stat_path) as f:
+                    data = f.read()
+                pid = int(data.split(" ", 1)[0])
+                ppid = int(data.rsplit(")", 1)[1].split()[1])
+                children.setdefault(ppid, []).append(pid)
+            except Exception:
+                continue
+
+        total_pages = 0
+        stack = [root]
+        while stack:
+            pid = stack.pop()
+            stack.extend(children.get(pid, []))
+            try:
+                with open(f"/proc/{pid}/statm") as f:
+                    total_pages += int(f.read().split()[1])
+            except Exception:
+                continue
+        return total_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+    def is_alive(self):
+        try:
+            self.driver.window_handles
+            return True
+        except Exception:
+            return False
+
     def open_new_tab(self, url="about:blank"):
         self.driver.execute_script(f"window.open('{url}');")
         self.driver.switch_to.window(self.driver.window_handles[-1])
@@ -186,38 +456,102 @@ class ResearchBrowser:
 
     def extract_logo(self, domain):
         url = f"https://{domain}" if not domain.startswith("http") else domain
+        cached = self.page_cache.get("logo", url)
+        if cached is not None:
+            print(f"🖼️  Logo cache hit: {url}")
+            return cached
+
         print(f"🖼️  Hunting for logo on: {url}")
         try:
-            self.driver.get(url)
+            self.navigate(url, allow=("image",))
             try: WebDriverWait(self.driver, 5).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
             except: pass
             
+            logo = ""
             try:
                 og_img = self.driver.find_element(By.CSS_SELECTOR, 'meta[property="og:image"]').get_attribute("content")
-                if og_img: return og_img
+                if og_img: logo = og_img
             except: pass
-            return ""
+            # Cache misses too, so reruns don't reload a site that has no og:image
+            self.page_cache.put("logo", url, logo)
+            return logo
         except: return ""
 
     def scrape_text(self, url):
-        print(f"📄 Surfing: {url}")
+        """Page cache, then plain-HTTP fetch, full browser load only if the page needs JavaScript."""
+        cached = self.page_cache.get("text", url)
+        if cached is not None:
+            print(f"💾 Cache hit: {url}")
+            return cached
+
+        result = self.fetcher.fetch(url)
+        if not result.needs_browser:
+            print(f"⚡ Fetched: {url}")
+            content = extract_page(result.html)
+        else:
+            print(f"📄 Surfing: {url} ({result.reason})")
+            content = self._scrape_with_browser(url)
+
+        if content:
+            self.page_cache.put("text", url, content)
+        return content
+
+    def scrape_many(self, urls, limit=None):
+        """
+        Serves what it can from the page cache, fetches the rest concurrently over
+        HTTP, then falls back to the browser (one at a time) for pages that need
+        JavaScript until `limit` pages are read.
+        Returns {url: content} in input order.
+        """
+        limit = limit or len(urls)
+        pages = {}
+
+        for url in urls:
+            if len(pages) >= limit: break
+            cached = self.page_cache.get("text", url)
+            if cached is not None:
+                print(f"💾 Cache hit: {url}")
+                pages[url] = cached
+
+        to_fetch = [url for url in urls if url not in pages] if len(pages) < limit else []
+        fetched = self.fetcher.fetch_many(to_fetch)
+
+        for url in to_fetch:
+            if len(pages) >= limit: break
+            result = fetched.get(url)
+            if result and not result.needs_browser:
+                print(f"⚡ Fetched: {url}")
+                pages[url] = extract_page(result.html)
+                self.page_cache.put("text", url, pages[url])
+
+        for url in to_fetch:
+            if len(pages) >= limit: break
+            if url in pages: continue
+            reason = fetched[url].reason if url in fetched else "not fetched"
+            print(f"📄 Surfing: {url} ({reason})")
+            content = self._scrape_with_browser(url)
+            if content:
+                pages[url] = content
+                self.page_cache.put("text", url, content)
+
+        return {url: pages[url] for url in urls if url in pages}
+
+    def _scrape_with_browser(self, url):
         try:
-            self.driver.get(url)
+            self.navigate(url)
             self.check_and_solve_captcha()
             try: WebDriverWait(self.driver, 15).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
             except: pass
             
-            try:
-                self.driver.execute_script("""
-                    var elements = document.getElementsByTagName('script');
-                    while (elements[0]) elements[0].parentNode.removeChild(elements[0]);
-                """)
-            except: pass
-            
-            body = self.driver.find_element(By.TAG_NAME, "body").text
-            return f"CONTENT:\n{' '.join(body.split())[:15000]}"
+            if replay.recording():
+                self._record_current(url)  # Re-record once the body is there, JS pages render late
+            # Parse the rendered DOM like a fetched page: JSON-LD, tel:/mailto: links, main content
+            html = self.driver.page_source
+            get_archive().add(url, html, self.driver.current_url, source="browser")
+            return extract_page(html)
         except: return ""
 
     def close(self):
         try: self.driver.quit()
-        except: pass
\ No newline at end of file
+        except: pass
+        self.profile_manager.release(self.profile_dir)
\ No newline at end of file
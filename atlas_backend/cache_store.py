@@ -0,0 +1,226 @@
+"""
+Persistent Caches - SQLite backed, shared by every worker
+=========================================================
+PageCache: URL-keyed scraped content with per-host TTLs, a size cap
+with LRU eviction and hit/miss counters.
+SearchCache: SERP text + result URLs keyed by (engine, normalized query).
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse, urldefrag
+
+import config
+
+
+class SqliteCache:
+    """
+    Base class: one table of compressed values with expiry + LRU bookkeeping.
+    Subclasses choose the table name, size cap and TTL policy.
+    """
+
+    TABLE = "cache"
+
+    def __init__(self, path: str, max_bytes: int):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self.TABLE} (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                expires REAL NOT NULL,
+                last_access REAL NOT NULL
+            )""")
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{self.TABLE}_lru ON {self.TABLE}(last_access)")
+        self._conn.commit()
+        self._total_bytes = self._conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {self.TABLE}").fetchone()[0]
+
+    def _get(self, key: str) -> Optional[bytes]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, expires, size FROM {self.TABLE} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            value, expires, size = row
+            if expires < now:
+                self._conn.execute(f"DELETE FROM {self.TABLE} WHERE key = ?", (key,))
+                self._conn.commit()
+                self._total_bytes -= size
+                self.misses += 1
+                return None
+            self._conn.execute(f"UPDATE {self.TABLE} SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        return zlib.decompress(value)
+
+    def _put(self, key: str, value: bytes, ttl: float):
+        now = time.time()
+        blob = zlib.compress(value, 6)
+        with self._lock:
+            old = self._conn.execute(f"SELECT size FROM {self.TABLE} WHERE key = ?", (key,)).fetchone()
+            if old:
+                self._total_bytes -= old[0]
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.TABLE} (key, value, size, created, expires, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, blob, len(blob), now, now + ttl, now),
+            )
+            self._total_bytes += len(blob)
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """Drops least recently used entries until the cache is back under 90% of its cap."""
+        target = self.max_bytes * 0.9
+        rows = self._conn.execute(f"SELECT key, size FROM {self.TABLE} ORDER BY last_access ASC").fetchall()
+        for key, size in rows:
+            if self._total_bytes <= target:
+                break
+            self._conn.execute(f"DELETE FROM {self.TABLE} WHERE key = ?", (key,))
+            self._total_bytes -= size
+
+    def stats(self) -> Dict:
+        with self._lock:
+            entries = self._conn.execute(f"SELECT COUNT(*) FROM {self.TABLE}").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "entries": entries,
+            "size_mb": round(self._total_bytes / (1024 * 1024), 1),
+        }
+
+
+class PageCache(SqliteCache):
+    """Scraped page content and logo lookups, keyed by (kind, URL)."""
+
+    TABLE = "pages"
+
+    def __init__(self, path: str = None, max_mb: int = None):
+        path = path or os.path.join(config.CACHE_DIR, "pages.sqlite")
+        super().__init__(path, (max_mb or config.PAGE_CACHE_MAX_MB) * 1024 * 1024)
+
+    def _key(self, kind: str, url: str) -> str:
+        return f"{kind}:{urldefrag(url.strip())[0]}"
+
+    def ttl_for(self, url: str) -> float:
+        host = urlparse(url if "://" in url else f"https://{url}").netloc.lower()
+        for suffix, ttl in config.PAGE_CACHE_HOST_TTLS.items():
+            if host == suffix or host.endswith("." + suffix):
+                return ttl
+        return config.PAGE_CACHE_TTL
+
+    def get(self, kind: str, url: str) -> Optional[str]:
+        value = self._get(self._key(kind, url))
+        return value.decode("utf-8") if value is not None else None
+
+    def put(self, kind: str, url: str, content: str):
+        self._put(self._key(kind, url), content.encode("utf-8"), self.ttl_for(url))
+
+
+def normalize_query(query: str) -> str:
+    """Case/whitespace-insensitive cache key; search operators keep their meaning."""
+    tokens = []
+    for token in query.split():
+        # Google only treats upper-case OR/AND as operators
+        tokens.append(token if token in ("OR", "AND") else token.lower())
+    return " ".join(tokens)
+
+
+class SearchCache(SqliteCache):
+    """Search engine results keyed by (engine, normalized query)."""
+
+    TABLE = "serps"
+
+    def __init__(self, path: str = None, max_mb: int = None):
+        path = path or os.path.join(config.CACHE_DIR, "serps.sqlite")
+        super().__init__(path, (max_mb or config.SEARCH_CACHE_MAX_MB) * 1024 * 1024)
+
+    def _key(self, engine: str, query: str) -> str:
+        return f"{engine}:{normalize_query(query)}"
+
+    def get(self, engine: str, query: str) -> Optional[Tuple[str, List[Dict]]]:
+        """Returns (body text, [{title, url, snippet}]) or None."""
+        value = self._get(self._key(engine, query))
+        if value is None:
+            return None
+        entry = json.loads(value)
+        if "results" not in entry:  # Entries written before snippets were kept
+            entry["results"] = [{"title": "", "url": url, "snippet": ""} for url in entry.get("urls", [])]
+        return entry["text"], entry["results"]
+
+    def put(self, engine: str, query: str, serp_text: str, results: List[Dict]):
+        entry = json.dumps({"text": serp_text, "results": results})
+        self._put(self._key(engine, query), entry.encode("utf-8"), config.SEARCH_CACHE_TTL)
+
+
+class LLMCache(SqliteCache):
+    """LLM responses keyed by a hash of model, options, system prompt and user prompt."""
+
+    TABLE = "responses"
+
+    def __init__(self, path: str = None, max_mb: int = None):
+        path = path or os.path.join(config.CACHE_DIR, "llm.sqlite")
+        super().__init__(path, (max_mb or config.LLM_CACHE_MAX_MB) * 1024 * 1024)
+
+    def _key(self, model: str, options: Dict, system_prompt: str, prompt: str) -> str:
+        material = json.dumps([model, options, system_prompt, prompt], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get(self, model: str, options: Dict, system_prompt: str, prompt: str) -> Optional[str]:
+        value = self._get(self._key(model, options, system_prompt, prompt))
+        return value.decode("utf-8") if value is not None else None
+
+    def put(self, model: str, options: Dict, system_prompt: str, prompt: str, response: str):
+        self._put(self._key(model, options, system_prompt, prompt), response.encode("utf-8"), config.LLM_CACHE_TTL)
+
+
+_page_cache = None
+_search_cache = None
+_llm_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_page_cache() -> PageCache:
+    """Process-wide page cache shared by all browser workers."""
+    global _page_cache
+    with _cache_lock:
+        if _page_cache is None:
+            _page_cache = PageCache()
+    return _page_cache
+
+
+def get_search_cache() -> SearchCache:
+    """Process-wide SERP cache shared by all browser workers."""
+    global _search_cache
+    with _cache_lock:
+        if _search_cache is None:
+            _search_cache = SearchCache()
+    return _search_cache
+
+
+def get_llm_cache() -> LLMCache:
+    """Process-wide LLM response cache."""
+    global _llm_cache
+    with _cache_lock:
+        if _llm_cache is None:
+            _llm_cache = LLMCache()
+    return _llm_cache
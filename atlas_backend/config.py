@@ -5,7 +5,26 @@ import os
 # Recommended: "qwen2.5:7b" or "llama3.2" or "mistral"
 #"qwen3:4b-instruct-2507-q4_K_M qwen3:1.7b"
 MODEL_NAME = "qwen3:1.7b" 
+# Small model tried first for easy fields; escalates to MODEL_NAME on empty/invalid answers ("" = off)
+MODEL_SMALL = os.environ.get("ATLAS_MODEL_SMALL", "qwen3:0.6b")
+ROUTER_SMALL_FIELDS = {"acronym", "short_description", "industry", "sector", "sub_industry", "tags",
+                       "description", "industry_details", "hq_indicator"}
 TIMEOUT = 120 # Seconds for LLM generation
+LLM_NUM_CTX = 4096 # Context window requested from Ollama; prompts are packed to fit it
+LLM_OUTPUT_RESERVE = 1024 # Tokens kept free for the model's answer
+LLM_CHAT_OVERHEAD = 32 # Chat template tokens around system + user messages
+# Tokenizer used to count prompt tokens (needs the optional `tokenizers` package; "" = estimate)
+TOKENIZER_NAME = os.environ.get("ATLAS_TOKENIZER", "Qwen/Qwen3-1.7B")
+CHARS_PER_TOKEN = 3.5 # Conservative estimate when the tokenizer is unavailable
+CONTEXT_CHUNK_TOKENS = 120 # Paragraph chunk size for packing / dedupe
+EVIDENCE_TOP_K = 6 # BM25 chunks per field in a prompt
+OLLAMA_HOST = os.environ.get("OLLAMA_HOST", "http://127.0.0.1:11434")
+# Requests sent to Ollama at once; match the server's OLLAMA_NUM_PARALLEL, extra calls queue here
+LLM_MAX_IN_FLIGHT = int(os.environ.get("OLLAMA_NUM_PARALLEL", "2"))
+LLM_STREAM_JSON = True # Stream JSON answers and stop generating once the object closes
+LLM_KEEP_ALIVE = os.environ.get("ATLAS_LLM_KEEP_ALIVE", "30m") # Keep the model loaded between calls ("-1m" = forever)
+LLM_COLD_LOAD_MS = 500 # A call whose model load took longer than this counts as a cold load
+LLM_LOG_TIMINGS = os.environ.get("ATLAS_LLM_LOG_TIMINGS", "0") == "1" # Print load / prompt-eval / eval per call
 
 # --- BROWSER CONFIGURATION ---
 # Path to your Brave Browser executable
@@ -17,6 +36,95 @@ BRAVE_PATH = "/opt/brave.com/brave/brave"
 # Path to your User Profile (Keep this to reuse cookies/logins)
 USER_DATA_DIR = os.path.expanduser("~/.config/BraveSoftware/Brave-Browser")
 PROFILE_DIR = "Default"
+# Block images, fonts, media and trackers while scraping (we only read text)
+TEXT_ONLY_MODE = True
+# Per-browser profile clones live here; the trimmed template is rebuilt after MAX_AGE
+PROFILE_ROOT = "/tmp"
+PROFILE_TEMPLATE_MAX_AGE = 24 * 3600
+# "eager": loads return at DOMContentLoaded, and a tab still loading only blocks driver
+# commands until then (not until every subresource is in), which keeps tab deadlines enforceable
+PAGE_LOAD_STRATEGY = "eager"
+PAGE_LOAD_TIMEOUT = 45 # Seconds a driver.get / command may wait on a navigation
+
+# --- FAST FETCH (plain HTTP tier, Selenium only as fallback) ---
+HTTP_TIMEOUT = 10 # Seconds per page on the plain-HTTP tier
+HTTP_MAX_CONNECTIONS = 32 # Pooled connections shared by all workers
+HTTP_MIN_TEXT_CHARS = 200 # Less visible text than this => page needs JavaScript
+CONTENT_MAX_CHARS = 8000 # Main-content text kept per page
+STRUCTURED_MAX_CHARS = 3000 # Phones, emails, addresses, JSON-LD, legal lines per page
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36"
+
+# --- PAGE CACHE (persistent, shared across runs) ---
+CACHE_DIR = os.environ.get("ATLAS_CACHE_DIR", "cache")
+PAGE_CACHE_MAX_MB = 512 # LRU eviction kicks in above this size
+PAGE_CACHE_TTL = 7 * 24 * 3600 # Default seconds a scraped page stays fresh
+# Per-host overrides (suffix match). Registries change rarely, news pages often.
+PAGE_CACHE_HOST_TTLS = {
+    "company-information.service.gov.uk": 30 * 24 * 3600,
+    "companieshouse.gov.uk": 30 * 24 * 3600,
+    "endole.co.uk": 30 * 24 * 3600,
+    "opencorporates.com": 30 * 24 * 3600,
+    "crunchbase.com": 14 * 24 * 3600,
+    "linkedin.com": 3 * 24 * 3600,
+}
+
+# --- SEARCH RESULT CACHE (skip the browser for repeated queries) ---
+SEARCH_CACHE_TTL = 3 * 24 * 3600 # Seconds a SERP stays fresh
+SEARCH_CACHE_MAX_MB = 128
+
+# --- LLM RESPONSE CACHE (identical prompt + model + options = same answer at temperature 0) ---
+LLM_CACHE_TTL = 30 * 24 * 3600
+LLM_CACHE_MAX_MB = 256
+
+# --- POLITENESS (rate limits shared by every worker) ---
+# Host or engine -> (requests per second, burst). Engines are keyed "google" / "ddg".
+HOST_RATE_LIMITS = {
+    "google": (0.5, 2),
+    "ddg": (1.0, 3),
+}
+DEFAULT_HOST_RATE = (2.0, 4) # Any other site
+ENGINE_CONCURRENCY = {"google": 2, "ddg": 3} # Max pages loading at once per engine, fleet-wide
+CAPTCHA_BACKOFF_MAX = 16 # Max slowdown factor after repeated captchas
+CAPTCHA_COOLDOWN = 30 # Base seconds a host is paused after a captcha
+
+# --- PARALLEL SEARCH TABS ---
+SEARCH_TAB_TIMEOUT = 15 # Per-tab deadline (seconds) before a SERP is collected as-is
+SEARCH_POLL_INTERVAL = 0.1 # Pause between readiness sweeps when no tab became ready
+SEARCH_TAB_COMMAND_TIMEOUT = 2 # While polling tabs, max seconds one command waits on a tab's pending navigation
+
+# --- BULK PROCESSING ---
+# Number of parallel browser workers used for CSV bulk runs.
+# Each worker owns one Brave instance, so budget ~1 CPU core + ~500MB RAM per worker.
+BULK_WORKERS = 4
+
+# --- BROWSER SESSIONS (warm browsers lent to agents) ---
+SESSION_POOL_SIZE = BULK_WORKERS # Max browsers alive at once across all jobs
+SESSION_MAX_PAGES = 300 # Recycle a browser after this many page loads...
+SESSION_MAX_MEMORY_MB = 2048 # ...or once its process tree uses this much RAM
+SESSION_RESET_COOKIES = True # Clear cookies between domains
+
+# --- FIELD TASK GRAPH (independent fields of one domain researched concurrently) ---
+FIELD_LANES = 3 # Max browsers one agent researches fields with (its own + spares leased from the session pool)
+
+# --- OFFICIAL SITE CRAWL (first-party pages shared by every field) ---
+CRAWL_MAX_PAGES = 8 # Pages fetched per company domain, homepage included
+CRAWL_PAGES_PER_CATEGORY = 2 # Best-ranked pages kept per category (contact, about, team...)
+CRAWL_SITEMAP_MAX_URLS = 2000 # Stop reading sitemaps after this many URLs
+
+# --- PATTERN EXTRACTORS (phones, emails, VAT, company no., SIC, socials without the LLM) ---
+PATTERN_MIN_CONFIDENCE = 0.8 # Below this a pattern hit is left to the LLM
+
+# --- RECORD / REPLAY (offline benchmarks, see replay.py) ---
+REPLAY_MODE = os.environ.get("ATLAS_REPLAY_MODE", "off") # off | record | replay
+FIXTURE_DIR = os.environ.get("ATLAS_FIXTURE_DIR", "fixtures")
+REPLAY_PORT = int(os.environ.get("ATLAS_REPLAY_PORT", "0")) # 0 = any free port
+REPLAY_LLM_LATENCY = os.environ.get("ATLAS_REPLAY_LLM_LATENCY", "recorded") # Seconds per call, or "recorded"
+
+# --- RAW PAGE ARCHIVE (every fetched page + SERP, for re-extraction without re-crawling) ---
+ARCHIVE_ENABLED = REPLAY_MODE != "replay" # Replays would only archive copies of the fixtures
+ARCHIVE_DIR = os.environ.get("ATLAS_ARCHIVE_DIR", "archive")
+ARCHIVE_SEGMENT_MB = 256 # Start a new segment file past this size
+ARCHIVE_ZSTD_LEVEL = 6
 
 # --- OUTPUT ---
 REPORT_DIR = "reports"
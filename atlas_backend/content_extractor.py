@@ -0,0 +1,265 @@
+"""
+Main-Content Extraction
+=======================
+Turns a raw HTML page into the text worth sending to the LLM:
+- STRUCTURED: tel:/mailto: links, <address> blocks, schema.org JSON-LD,
+  social profile links and the legal/registration lines from the footer.
+- CONTENT: the main article text, with navigation, cookie banners,
+  headers/footers and link-heavy menus dropped.
+Structured data goes first so later truncation never cuts it.
+"""
+
+import json
+import re
+from html.parser import HTMLParser
+from typing import Dict, List
+from urllib.parse import unquote
+
+import config
+from http_fetcher import html_to_text
+
+SKIP_TAGS = {"script", "style", "noscript", "template", "svg", "head", "iframe"}
+BOILERPLATE_TAGS = {"nav", "header", "footer", "aside", "form", "dialog"}
+VOID_TAGS = {"br", "img", "meta", "link", "input", "hr", "source", "wbr", "area", "base", "col", "embed", "track"}
+BLOCK_TAGS = {
+    "p", "div", "li", "ul", "ol", "tr", "td", "th", "table", "section", "article", "main",
+    "h1", "h2", "h3", "h4", "h5", "h6", "address", "blockquote", "pre", "dd", "dt", "figcaption",
+    "nav", "header", "footer", "aside", "form", "dialog", "br",
+}
+
+# id/class tokens that mark site chrome rather than content. Whole tokens only ("-" and "_"
+# split a class name), so "site-nav" or "cookie-banner" count but a restaurant's "menu"
+# section, a sidebar holding contact details or a "hero-banner" tagline is kept
+BOILERPLATE_HINTS = re.compile(
+    r"(?<![a-z0-9])(?:nav|navbar|navigation|footer|cookies?|consent|gdpr|breadcrumbs?|"
+    r"newsletter|popup|modal|advert|skip-link)(?![a-z0-9])",
+    re.IGNORECASE,
+)
+
+SOCIAL_HOSTS = ("linkedin.com", "facebook.com", "twitter.com", "x.com", "instagram.com", "youtube.com", "tiktok.com")
+
+# Footer lines worth keeping even though the footer itself is boilerplate
+LEGAL_LINE = re.compile(
+    r"registered|company (no|number|reg)|\breg\.? no|\bvat\b|incorporated|registration|"
+    r"\bltd\b|limited|\bllp\b|\bplc\b|gmbh|copyright|©|\btel\b|phone|e-?mail|address",
+    re.IGNORECASE,
+)
+
+# JSON-LD keys kept from Organization / LocalBusiness style nodes
+JSONLD_KEYS = [
+    "@type", "name", "legalName", "alternateName", "description", "url", "logo", "telephone",
+    "faxNumber", "email", "address", "vatID", "taxID", "leiCode", "foundingDate", "founder",
+    "numberOfEmployees", "sameAs", "openingHours", "areaServed", "naics", "isicV4",
+]
+
+
+class _PageParser(HTMLParser):
+    """Splits a page into text blocks tagged as main / boilerplate / link-heavy."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.blocks: List[Dict] = []
+        self.tel: List[str] = []
+        self.mailto: List[str] = []
+        self.social: List[str] = []
+        self.addresses: List[str] = []
+        self.jsonld: List[str] = []
+        self.meta_description = ""
+
+        self._stack: List[tuple] = []  # (tag, boilerplate, main, skip)
+        self._text: List[str] = []
+        self._link_chars = 0
+        self._in_link = 0
+        self._address: List[str] = []
+        self._in_address = 0
+        self._jsonld_buf: List[str] = []
+        self._in_jsonld = False
+        self.has_main = False
+
+    # --- state helpers ---
+    def _flags(self):
+        if not self._stack:
+            return False, False, False
+        return self._stack[-1][1], self._stack[-1][2], self._stack[-1][3]
+
+    def _flush(self):
+        text = " ".join("".join(self._text).split())
+        if text:
+            boiler, main, _ = self._flags()
+            self.blocks.append({"text": text, "links": self._link_chars, "boiler": boiler, "main": main})
+        self._text = []
+        self._link_chars = 0
+
+    # --- HTMLParser hooks ---
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "meta" and (attrs.get("name") or "").lower() == "description":
+            self.meta_description = attrs.get("content") or ""
+        if tag == "a":
+            href = (attrs.get("href") or "").strip()
+            lowered = href.lower()
+            if lowered.startswith("tel:"):
+                self.tel.append(unquote(href[4:]).strip())
+            elif lowered.startswith("mailto:"):
+                self.mailto.append(unquote(href[7:].split("?")[0]).strip())
+            elif any(host in lowered for host in SOCIAL_HOSTS) and lowered.startswith("http"):
+                self.social.append(href)
+            self._in_link += 1
+        if tag == "script" and (attrs.get("type") or "").lower() == "application/ld+json":
+            self._in_jsonld = True
+            self._jsonld_buf = []
+        if tag == "address":
+            self._in_address += 1
+        if tag in VOID_TAGS:
+            if tag == "br":
+                self._text.append(" ")
+            return
+
+        if tag in BLOCK_TAGS:
+            self._flush()
+        boiler, main, skip = self._flags()
+        hint = f"{attrs.get('id') or ''} {attrs.get('class') or ''}"
+        role = (attrs.get("role") or "").lower()
+        is_main = tag in ("main", "article") or role == "main"
+        if is_main:
+            self.has_main = True
+        boiler = boiler or tag in BOILERPLATE_TAGS or role in ("navigation", "banner", "contentinfo") \
+            or bool(BOILERPLATE_HINTS.search(hint))
+        self._stack.append((tag, boiler and not is_main, main or is_main, skip or tag in SKIP_TAGS))
+
+    def handle_endtag(self, tag):
+        if tag == "a":
+            self._in_link = max(0, self._in_link - 1)
+        if tag == "script" and self._in_jsonld:
+            self._in_jsonld = False
+            self.jsonld.append("".join(self._jsonld_buf))
+        if tag == "address" and self._in_address:
+            self._in_address -= 1
+            if not self._in_address:
+                text = " ".join(" ".join(self._address).split())
+                if text:
+                    self.addresses.append(text)
+                self._address = []
+        if tag in VOID_TAGS:
+            return
+        # Pop to the matching open tag; unclosed <p>/<li> are common in the wild
+        for i in range(len(self._stack) - 1, -1, -1):
+            if self._stack[i][0] == tag:
+                if tag in BLOCK_TAGS:
+                    self._flush()
+                del self._stack[i:]
+                break
+
+    def handle_data(self, data):
+        if self._in_jsonld:
+            self._jsonld_buf.append(data)
+            return
+        if self._flags()[2]:
+            return
+        self._text.append(data)
+        if self._in_link:
+            self._link_chars += len(data.strip())
+        if self._in_address:
+            self._address.append(data)
+
+    def close(self):
+        super().close()
+        self._flush()
+
+
+def _flatten_jsonld(raw: str) -> List[str]:
+    """Pulls the organisation-level facts out of one JSON-LD script."""
+    try:
+        data = json.loads(raw)
+    except Exception:
+        return []
+    nodes = data if isinstance(data, list) else [data]
+    flat = []
+    for node in nodes:
+        if isinstance(node, dict) and isinstance(node.get("@graph"), list):
+            flat.extend(node["@graph"])
+        else:
+            flat.append(node)
+
+    lines = []
+    for node in flat:
+        if not isinstance(node, dict):
+            continue
+        node_type = node.get("@type")
+        types = node_type if isinstance(node_type, list) else [node_type]
+        if not any(t and any(k in str(t) for k in ("Organization", "Business", "Corporation", "Store", "Place", "Person")) for t in types):
+            continue
+        for key in JSONLD_KEYS:
+            value = node.get(key)
+            if not value:
+                continue
+            if isinstance(value, dict):
+                value = ", ".join(str(v) for k, v in value.items() if not k.startswith("@") and v)
+            elif isinstance(value, list):
+                value = ", ".join(str(v.get("name", v)) if isinstance(v, dict) else str(v) for v in value)
+            lines.append(f"{key}: {value}")
+    return lines
+
+
+def _dedupe(items: List[str]) -> List[str]:
+    seen = set()
+    out = []
+    for item in items:
+        key = item.strip().lower()
+        if key and key not in seen:
+            seen.add(key)
+            out.append(item.strip())
+    return out
+
+
+def extract_page(html: str) -> str:
+    """Returns 'STRUCTURED:' facts followed by 'CONTENT:' main text for one HTML page."""
+    parser = _PageParser()
+    try:
+        parser.feed(html)
+        parser.close()
+    except Exception:
+        pass
+
+    # --- Main text: prefer <main>/<article>, drop chrome and link farms ---
+    main_blocks = []
+    for block in parser.blocks:
+        if parser.has_main and not block["main"]:
+            continue
+        if block["boiler"]:
+            continue
+        length = len(block["text"])
+        if length < 80 and block["links"] >= length * 0.5:
+            continue  # Menu entries, "Read more" links, tag clouds
+        main_blocks.append(block["text"])
+    main_text = " ".join(_dedupe(main_blocks))
+
+    # Heuristics misfire on odd layouts - never return less than the page obviously has
+    if len(main_text) < config.HTTP_MIN_TEXT_CHARS:
+        main_text = " ".join(html_to_text(html).split())
+
+    # --- Structured bits (the footer is boilerplate but carries phone / VAT / reg no.) ---
+    structured = []
+    for phone in _dedupe(parser.tel):
+        structured.append(f"PHONE: {phone}")
+    for email in _dedupe(parser.mailto):
+        structured.append(f"EMAIL: {email}")
+    for address in _dedupe(parser.addresses):
+        structured.append(f"ADDRESS: {address}")
+    for raw in parser.jsonld:
+        structured.extend(f"JSON-LD {line}" for line in _flatten_jsonld(raw))
+    for link in _dedupe(parser.social):
+        structured.append(f"SOCIAL: {link}")
+    legal = [b["text"] for b in parser.blocks
+             if b["boiler"] and len(b["text"]) < 400 and LEGAL_LINE.search(b["text"])
+             and re.search(r"\d|@", b["text"])]
+    for line in _dedupe(legal):
+        structured.append(f"LEGAL: {line}")
+    if parser.meta_description:
+        structured.append(f"META DESCRIPTION: {' '.join(parser.meta_description.split())}")
+
+    structured_text = "\n".join(_dedupe(structured))[:config.STRUCTURED_MAX_CHARS]
+    main_text = main_text[:config.CONTENT_MAX_CHARS]
+    if structured_text:
+        return f"STRUCTURED:\n{structured_text}\n\nCONTENT:\n{main_text}"
+    return f"CONTENT:\n{main_text}"
@@ -0,0 +1,200 @@
+"""
+Token-Aware Context Packer
+==========================
+Builds the evidence part of a prompt to fit the model's context window
+instead of slicing strings at fixed character offsets:
+- counts tokens with the model's own tokenizer when the optional
+  `tokenizers` package (and the tokenizer files) are available, otherwise
+  with a conservative characters-per-token estimate;
+- splits every source into paragraph chunks and drops paragraphs already
+  seen in another SERP or page (menus, footers, repeated snippets);
+- fills the token budget with the highest-value chunks first, then prints
+  them back in their original order under their section/source headers.
+"""
+
+import math
+import re
+import threading
+from typing import Callable, List, Optional, Tuple
+
+import config
+
+try:
+    from tokenizers import Tokenizer
+except ImportError:  # Optional: heuristic counting without it
+    Tokenizer = None
+
+# Lines that label the text below them rather than being evidence themselves
+SOURCE_HEADER = re.compile(r"^-{3}\s.*\s-{3}$|^={3}\s.*\s={3}$|^[A-Z][A-Z ]+ (RESULTS|SPECIFIC)\b.*:$")
+BLOCK_MARKERS = ("STRUCTURED:", "CONTENT:", "RESULTS:", "PAGE:")
+
+
+class TokenCounter:
+    """Exact counts from the model tokenizer if it can be loaded, estimates otherwise."""
+
+    def __init__(self, tokenizer_name: str = None):
+        self.tokenizer = None
+        name = tokenizer_name or config.TOKENIZER_NAME
+        if Tokenizer is not None and name:
+            try:
+                self.tokenizer = Tokenizer.from_pretrained(name)
+            except Exception as e:
+                print(f"⚠️ Tokenizer '{name}' unavailable ({e}); estimating token counts")
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self.tokenizer is not None:
+            return len(self.tokenizer.encode(text, add_special_tokens=False).ids)
+        return math.ceil(len(text) / config.CHARS_PER_TOKEN)
+
+
+_counter = None
+_counter_lock = threading.Lock()
+
+
+def get_token_counter() -> TokenCounter:
+    """Process-wide counter so the tokenizer is loaded once."""
+    global _counter
+    with _counter_lock:
+        if _counter is None:
+            _counter = TokenCounter()
+    return _counter
+
+
+def evidence_budget(*fixed_texts: str) -> int:
+    """Tokens left for evidence once the prompt template, system prompt and answer are accounted for."""
+    counter = get_token_counter()
+    used = sum(counter.count(text) for text in fixed_texts) + config.LLM_CHAT_OVERHEAD
+    return max(0, config.LLM_NUM_CTX - config.LLM_OUTPUT_RESERVE - used)
+
+
+class Chunk:
+    """One paragraph-sized piece of evidence and where it came from."""
+
+    def __init__(self, section: str, source: str, text: str, order: int, position: int, structured: bool):
+        self.section = section
+        self.source = source
+        self.text = text
+        self.order = order  # Global order, used to print chunks back as they appeared
+        self.position = position  # Index within its section, earlier is usually better
+        self.structured = structured
+        self.tokens = 0
+        self.score = 0.0
+
+
+def _normalize(text: str) -> str:
+    return " ".join(re.sub(r"[^\w@.+]+", " ", text.lower()).split())
+
+
+class ContextPacker:
+    """Splits, dedupes and packs evidence sections into a token budget."""
+
+    def __init__(self, counter: TokenCounter = None):
+        self.counter = counter or get_token_counter()
+
+    def split(self, section: str, text: str, start: int = 0) -> List[Chunk]:
+        """Paragraph chunks of roughly CONTEXT_CHUNK_TOKENS, each tagged with its source header."""
+        chunks: List[Chunk] = []
+        source = ""
+        structured = False
+        buffer: List[str] = []
+        limit_chars = config.CONTEXT_CHUNK_TOKENS * config.CHARS_PER_TOKEN
+
+        def flush():
+            if buffer:
+                chunks.append(Chunk(section, source, "\n".join(buffer), start + len(chunks), len(chunks), structured))
+                buffer.clear()
+
+        for line in (text or "").splitlines():
+            line = line.strip()
+            if not line:
+                flush()
+                continue
+            if SOURCE_HEADER.match(line):
+                flush()
+                source = line
+                structured = False
+                continue
+            if line in BLOCK_MARKERS:
+                flush()
+                structured = line == "STRUCTURED:"
+                continue
+            # Very long lines (body.text of a whole page) are cut at sentence ends
+            while len(line) > limit_chars:
+                cut = line.rfind(". ", 0, int(limit_chars))
+                cut = cut + 1 if cut > limit_chars / 3 else int(limit_chars)
+                buffer.append(line[:cut].strip())
+                flush()
+                line = line[cut:].strip()
+            if sum(len(b) for b in buffer) + len(line) > limit_chars:
+                flush()
+            buffer.append(line)
+        flush()
+        return chunks
+
+    def prepare(self, sections: List[Tuple[str, str, float]]) -> List[Chunk]:
+        """
+        sections: (label, text, weight) in the order they should appear in the prompt.
+        Returns deduped chunks with token counts and a base score: section weight,
+        structured facts first, earlier paragraphs before later ones.
+        """
+        chunks: List[Chunk] = []
+        seen = set()
+        next_order = 0
+        for label, text, weight in sections:
+            section_chunks = self.split(label, text, start=next_order)
+            next_order += len(section_chunks)
+            for chunk in section_chunks:
+                key = _normalize(chunk.text)
+                if not key or key in seen:
+                    continue
+                seen.add(key)
+                chunk.tokens = self.counter.count(chunk.text) + 1
+                chunk.score = weight * (2.0 if chunk.structured else 1.0) / (1 + 0.05 * chunk.position)
+                chunks.append(chunk)
+        return chunks
+
+    def fill(self, ranked: List[Chunk], budget: int) -> List[Chunk]:
+        """Takes chunks in the given priority order while they fit the budget."""
+        chosen = []
+        used = 0
+        headers = set()
+        for chunk in ranked:
+            # A chunk also pays for the section/source header it would introduce
+            cost = chunk.tokens
+            for header in (chunk.section, chunk.source):
+                if header and header not in headers:
+                    cost += self.counter.count(header) + 1
+            if used + cost > budget:
+                continue
+            used += cost
+            headers.update(h for h in (chunk.section, chunk.source) if h)
+            chosen.append(chunk)
+        return chosen
+
+    def render(self, chosen: List[Chunk]) -> str:
+        """Chosen chunks back in their original order under their section/source headers."""
+        lines = []
+        section = source = None
+        for chunk in sorted(chosen, key=lambda c: c.order):
+            if chunk.section != section:
+                section, source = chunk.section, None
+                lines.append(f"\n{chunk.section}:" if lines else f"{chunk.section}:")
+            if chunk.source and chunk.source != source:
+                source = chunk.source
+                lines.append(chunk.source)
+            lines.append(chunk.text)
+        return "\n".join(lines)
+
+    def pack(self, sections: List[Tuple[str, str, float]], budget: int,
+             scorer: Optional[Callable[[Chunk], float]] = None) -> str:
+        """
+        Fills the budget with the highest-scoring chunks of `sections`.
+        scorer: optional relevance multiplier on top of the base score.
+        """
+        chunks = self.prepare(sections)
+        if scorer is not None:
+            for chunk in chunks:
+                chunk.score *= scorer(chunk)
+        return self.render(self.fill(sorted(chunks, key=lambda c: (-c.score, c.order)), budget))
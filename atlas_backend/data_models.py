@@ -13,63 +13,63 @@ class GraphEdge(BaseModel):
     relation: str # "works_at", "hq_at", "produces", "uses_tech"
 
 class KeyPerson(BaseModel):
-    name: str = ""
-    title: str = ""
-    role_category: str = "Management"
-    email: Optional[str] = None
-    linkedin_url: Optional[str] = None
+    name: str = Field("", description="Full name of the person")
+    title: str = Field("", description="Job title as written on the source")
+    role_category: str = Field("Management", description="Management, Board, Technical, Sales or Operations")
+    email: Optional[str] = Field(None, description="Their work email, if published")
+    linkedin_url: Optional[str] = Field(None, description="Their LinkedIn profile URL, if found")
 
 class CompanyProfile(BaseModel):
     # Company Info
     name: str = ""
     domain: str = ""
     domain_status: str = "Active"
-    company_registration_number: Optional[str] = None
-    vat_number: Optional[str] = None
-    acronym: Optional[str] = None
+    company_registration_number: Optional[str] = Field(None, description="Companies House number, 8 characters")
+    vat_number: Optional[str] = Field(None, description="VAT number with country prefix")
+    acronym: Optional[str] = Field(None, description="Common abbreviation of the company name")
     logo_url: Optional[str] = None
     
     # Description & Industry
-    description_short: str = ""
-    description_long: str = ""
-    industry: str = ""
-    sub_industry: str = ""
-    sector: str = ""
-    sic_code: Optional[str] = None
-    sic_text: Optional[str] = None
-    tags: List[str] = []
+    description_short: str = Field("", description="One-sentence summary of the company")
+    description_long: str = Field("", description="2-3 paragraphs on what the company does, for whom, and its mission")
+    industry: str = Field("", description="Primary industry category")
+    sub_industry: str = Field("", description="Specific niche within the industry")
+    sector: str = Field("", description="Broad business sector")
+    sic_code: Optional[str] = Field(None, description="Five-digit UK SIC code")
+    sic_text: Optional[str] = Field(None, description="Official description of the SIC code")
+    tags: List[str] = Field([], description="Keyword describing the products or services")
     
     # Products & Services
-    products_services: List[str] = []
-    service_type: Optional[str] = None 
+    products_services: List[str] = Field([], description="Name of one product or service offered")
+    service_type: Optional[str] = Field(None, description="Kind of offering: Product, Service, SaaS, Consultancy...")
 
     # Certifications
-    certifications: List[str] = []
+    certifications: List[str] = Field([], description="Certification or accreditation held")
 
     # Locations & Contact
-    locations: List[str] = [] 
-    full_address: Optional[str] = None
-    hq_indicator: str = "" 
+    locations: List[str] = Field([], description="Office location as city and country")
+    full_address: Optional[str] = Field(None, description="Registered or head office postal address with postcode")
+    hq_indicator: str = Field("", description="Headquarters location, or Yes/No if only that is known")
     
-    contact_email: Optional[str] = None
-    contact_phone: Optional[str] = None
-    sales_phone: Optional[str] = None
-    fax: Optional[str] = None
-    mobile: Optional[str] = None
-    other_numbers: List[str] = []
-    hours_of_operation: Optional[str] = None
+    contact_email: Optional[str] = Field(None, description="General enquiries email address")
+    contact_phone: Optional[str] = Field(None, description="Main switchboard phone number")
+    sales_phone: Optional[str] = Field(None, description="Sales line phone number")
+    fax: Optional[str] = Field(None, description="Fax number")
+    mobile: Optional[str] = Field(None, description="Mobile phone number")
+    other_numbers: List[str] = Field([], description="Any other published phone number")
+    hours_of_operation: Optional[str] = Field(None, description="Opening hours as written on the site")
     
     # Social Media
-    social_linkedin: Optional[str] = None
-    social_facebook: Optional[str] = None
-    social_twitter: Optional[str] = None 
-    social_instagram: Optional[str] = None
-    social_youtube: Optional[str] = None
-    social_blog: Optional[str] = None
-    social_articles: List[str] = []
+    social_linkedin: Optional[str] = Field(None, description="LinkedIn company page URL")
+    social_facebook: Optional[str] = Field(None, description="Facebook page URL")
+    social_twitter: Optional[str] = Field(None, description="X / Twitter profile URL")
+    social_instagram: Optional[str] = Field(None, description="Instagram profile URL")
+    social_youtube: Optional[str] = Field(None, description="YouTube channel URL")
+    social_blog: Optional[str] = Field(None, description="Company blog or news page URL")
+    social_articles: List[str] = Field([], description="URL of an article about the company")
 
     # Tech Stack
-    tech_stack: List[str] = []
+    tech_stack: List[str] = Field([], description="Technology, language or platform the company uses")
     
     # Key People
     key_people: List[KeyPerson] = []
@@ -0,0 +1,125 @@
+"""
+Per-Field Evidence Ranking (BM25)
+=================================
+Splits all SERPs and pages of one company into paragraph chunks (via the
+context packer, so repeats are already dropped) and indexes them with
+Okapi BM25. Each field is then answered from its own top-k chunks -
+`vat_number` sees the footer line with the VAT number, `key_people` sees
+the team page - instead of one blob of everything.
+"""
+
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Tuple
+
+import config
+from context_packer import Chunk, ContextPacker
+
+TOKEN = re.compile(r"[a-z0-9]+")
+
+# Query terms per field (names used by MicroAgent and the optimized pipeline)
+FIELD_QUERIES = {
+    "description": "about us company overview mission who we are what we do founded",
+    "long_description": "about us company overview mission who we are what we do services clients founded",
+    "short_description": "about company tagline overview we are leading provider",
+    "industry_details": "industry sector sub industry market specialists services solutions",
+    "industry": "industry sector market services solutions provider",
+    "sub_industry": "specialist niche industry sector services solutions",
+    "sector": "sector industry market",
+    "tags": "services products solutions platform expertise offering",
+    "products_services": "products services solutions platform offering pricing features",
+    "locations": "offices locations address headquarters branch city uk street road",
+    "hq_indicator": "headquarters head office registered office address hq",
+    "key_people": "ceo founder director managing chief officer team leadership board chairman partner",
+    "tech_stack": "technology stack engineering developer python java javascript react aws azure cloud hiring",
+    "contact_granular": "contact phone telephone tel email fax mobile address opening hours support sales",
+    "social_media": "linkedin twitter facebook instagram youtube blog follow us social",
+    "registration_details": "registered company number registration vat sic incorporated companies house",
+    "company_registration_number": "company number registered in england wales registration companies house incorporated",
+    "vat_number": "vat number registration gb tax",
+    "sic_code": "sic code nature of business standard industrial classification companies house",
+    "sic_text": "sic nature of business activities standard industrial classification",
+    "acronym": "abbreviation acronym stands for known as ltd limited",
+    "certifications": "iso certified certification accredited accreditation cyber essentials gdpr compliance",
+}
+
+
+def _tokens(text: str) -> List[str]:
+    return TOKEN.findall(text.lower())
+
+
+class EvidenceIndex:
+    """BM25 over one company's evidence chunks."""
+
+    def __init__(self, packer: ContextPacker = None, k1: float = 1.5, b: float = 0.75):
+        self.packer = packer or ContextPacker()
+        self.k1 = k1
+        self.b = b
+        self.chunks: List[Chunk] = []
+        self._tf: List[Counter] = []
+        self._lengths: List[int] = []
+        self._df: Counter = Counter()
+        self._avg_len = 0.0
+
+    def build(self, sections: List[Tuple[str, str, float]]) -> "EvidenceIndex":
+        """sections: (label, text, weight), as for ContextPacker.pack."""
+        self.chunks = self.packer.prepare(sections)
+        self._tf, self._lengths, self._df = [], [], Counter()
+        for chunk in self.chunks:
+            # Source headers carry URL words like /contact or /about-us that are strong hints
+            terms = _tokens(f"{chunk.source} {chunk.text}")
+            tf = Counter(terms)
+            self._tf.append(tf)
+            self._lengths.append(len(terms))
+            self._df.update(tf.keys())
+        self._avg_len = sum(self._lengths) / len(self._lengths) if self._lengths else 0.0
+        return self
+
+    def _idf(self, term: str) -> float:
+        n = len(self.chunks)
+        df = self._df.get(term, 0)
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def scores(self, query: str) -> List[float]:
+        terms = set(_tokens(query))
+        out = []
+        for tf, length in zip(self._tf, self._lengths):
+            score = 0.0
+            norm = self.k1 * (1 - self.b + self.b * length / (self._avg_len or 1))
+            for term in terms:
+                freq = tf.get(term, 0)
+                if freq:
+                    score += self._idf(term) * freq * (self.k1 + 1) / (freq + norm)
+            out.append(score)
+        return out
+
+    def top_k(self, field: str, k: int = None, query: str = "") -> List[Chunk]:
+        """Best chunks for one field: BM25 relevance weighted by the chunk's base score."""
+        query = query or FIELD_QUERIES.get(field, field.replace("_", " "))
+        ranked = [
+            (score * chunk.score, chunk)
+            for score, chunk in zip(self.scores(query), self.chunks) if score > 0
+        ]
+        ranked.sort(key=lambda item: (-item[0], item[1].order))
+        return [chunk for _, chunk in ranked[:k or config.EVIDENCE_TOP_K]]
+
+    def pack_for_fields(self, fields: List[str], budget: int, k: int = None,
+                        queries: Dict[str, str] = None) -> str:
+        """
+        Evidence for one or more fields in one prompt: every field's best chunk first,
+        then every field's second best, and so on until the budget is full.
+        queries: optional per-field query text replacing FIELD_QUERIES.
+        """
+        queries = queries or {}
+        per_field = [self.top_k(field, k, queries.get(field, "")) for field in fields]
+        ranked, seen = [], set()
+        for rank in range(max((len(chunks) for chunks in per_field), default=0)):
+            for chunks in per_field:
+                if rank < len(chunks) and id(chunks[rank]) not in seen:
+                    seen.add(id(chunks[rank]))
+                    ranked.append(chunks[rank])
+        if not ranked:
+            # Nothing matched lexically (e.g. non-English pages): fall back to the base ranking
+            ranked = sorted(self.chunks, key=lambda c: (-c.score, c.order))
+        return self.packer.render(self.packer.fill(ranked, budget))
@@ -0,0 +1,222 @@
+"""
+Fast Fetch Tier - Plain HTTP before Selenium
+============================================
+Most company pages are static HTML, so they are downloaded over a pooled
+async HTTP client and parsed without a browser. A page is handed back to
+the Selenium path only when it looks like it needs JavaScript
+(empty body, JS app shell or a bot wall).
+"""
+
+import asyncio
+import threading
+from html.parser import HTMLParser
+from typing import Dict, List, Optional
+
+import httpx
+
+import async_runtime
+import config
+import replay
+from page_archive import get_archive
+from rate_limiter import get_scheduler
+
+# Tags whose content is never visible text
+SKIP_TAGS = {"script", "style", "noscript", "template", "svg", "head", "iframe"}
+
+# Tags that start a new line of text when rendered
+BLOCK_TAGS = {
+    "p", "div", "br", "li", "ul", "ol", "tr", "td", "th", "table", "section", "article",
+    "header", "footer", "nav", "aside", "main", "h1", "h2", "h3", "h4", "h5", "h6",
+    "address", "blockquote", "pre", "form", "dd", "dt",
+}
+
+BOT_WALL_STATUSES = {403, 429, 503}
+BOT_WALL_MARKERS = [
+    "cf-browser-verification", "cf-chl-", "just a moment...", "attention required",
+    "are you a robot", "unusual traffic", "verify you are human", "captcha",
+]
+JS_SHELL_MARKERS = [
+    "enable javascript", "requires javascript", "javascript is disabled",
+    'id="root"', 'id="__next"', 'id="app"', "ng-app", "__nuxt",
+]
+
+
+class _TextExtractor(HTMLParser):
+    """Collects visible text the way body.text would roughly render it."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self.parts.append(data)
+
+
+def html_to_text(html: str) -> str:
+    """Visible text of an HTML document (scripts, styles and head removed)."""
+    parser = _TextExtractor()
+    try:
+        parser.feed(html)
+        parser.close()
+    except Exception:
+        pass
+    return "".join(parser.parts)
+
+
+class FetchResult:
+    """Outcome of one plain-HTTP fetch."""
+
+    def __init__(self, url: str, final_url: str = "", status: int = 0, html: str = "",
+                 text: str = "", needs_browser: bool = True, reason: str = ""):
+        self.url = url
+        self.final_url = final_url or url
+        self.status = status
+        self.html = html
+        self.text = text
+        self.needs_browser = needs_browser
+        self.reason = reason
+
+
+class FastFetcher:
+    """Pooled async HTTP client shared by every browser worker."""
+
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+        self.scheduler = get_scheduler()
+
+    async def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                follow_redirects=True,
+                timeout=config.HTTP_TIMEOUT,
+                limits=httpx.Limits(
+                    max_connections=config.HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=config.HTTP_MAX_CONNECTIONS,
+                ),
+                headers={
+                    "User-Agent": config.USER_AGENT,
+                    "Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.8",
+                    "Accept-Language": "en-GB,en;q=0.9",
+                },
+            )
+        return self._client
+
+    async def _get(self, url: str) -> httpx.Response:
+        """One scheduled GET; in replay mode it goes to the local fixture server instead."""
+        client = await self._get_client()
+        await self.scheduler.wait_async(url)
+        return await client.get(replay.local_url(url) if replay.replaying() else url)
+
+    @staticmethod
+    def _final_url(response: httpx.Response) -> str:
+        return response.headers.get("x-atlas-final-url") or str(response.url)
+
+    async def afetch(self, url: str) -> FetchResult:
+        """Downloads a page and decides whether it still needs a real browser."""
+        try:
+            response = await self._get(url)
+        except Exception as e:
+            return FetchResult(url, reason=f"http_error: {type(e).__name__}")
+
+        result = FetchResult(url, final_url=self._final_url(response), status=response.status_code)
+        content_type = response.headers.get("content-type", "").lower()
+        if "html" not in content_type:
+            if replay.recording():
+                replay.record_page("http", url, result.final_url, result.status, content_type, "")
+            result.reason = f"non_html: {content_type or 'unknown'}"
+            return result
+
+        result.html = response.text
+        # Compression and the SQLite index write would stall every fetch and LLM call on the loop
+        await asyncio.to_thread(get_archive().add, url, result.html, result.final_url, result.status,
+                                source="http", content_type=content_type)
+        if replay.recording():
+            replay.record_page("http", url, result.final_url, result.status, content_type, result.html)
+        result.text = " ".join(html_to_text(result.html).split())
+        result.reason = self._needs_browser_reason(result)
+        # A bot wall here only means "escalate to the browser": the host is not
+        # paused, only a challenge the browser itself hits reports a captcha
+        result.needs_browser = bool(result.reason)
+        return result
+
+    async def afetch_raw(self, url: str) -> FetchResult:
+        """Downloads any text resource (robots.txt, sitemap XML) as-is into .html."""
+        try:
+            response = await self._get(url)
+        except Exception as e:
+            return FetchResult(url, reason=f"http_error: {type(e).__name__}")
+        result = FetchResult(url, final_url=self._final_url(response), status=response.status_code,
+                             needs_browser=False)
+        if replay.recording():
+            replay.record_page("http", url, result.final_url, result.status,
+                               response.headers.get("content-type", ""), response.text)
+        if response.status_code < 400:
+            result.html = response.text
+        else:
+            result.reason = f"http_status: {response.status_code}"
+        return result
+
+    def _needs_browser_reason(self, result: FetchResult) -> str:
+        """Returns why the page needs JavaScript, or "" if the HTTP copy is good enough."""
+        lowered = result.html.lower()
+        if result.status in BOT_WALL_STATUSES:
+            return f"bot_wall: HTTP {result.status}"
+        if result.status >= 400:
+            return f"http_status: {result.status}"
+
+        text_len = len(result.text)
+        if text_len < config.HTTP_MIN_TEXT_CHARS:
+            if any(marker in lowered for marker in BOT_WALL_MARKERS):
+                return "bot_wall"
+            if any(marker in lowered for marker in JS_SHELL_MARKERS):
+                return "js_shell"
+            return "empty_body"
+
+        # Large app shells ship a little static text plus a "please enable JS" notice
+        if text_len < config.HTTP_MIN_TEXT_CHARS * 5 and "enable javascript" in lowered:
+            return "js_shell"
+        return ""
+
+    async def afetch_many(self, urls: List[str]) -> Dict[str, FetchResult]:
+        results = await asyncio.gather(*(self.afetch(url) for url in urls))
+        return {r.url: r for r in results}
+
+    def fetch(self, url: str) -> FetchResult:
+        """Blocking wrapper for browser threads."""
+        return async_runtime.run(self.afetch(url))
+
+    def fetch_raw(self, url: str) -> FetchResult:
+        return async_runtime.run(self.afetch_raw(url))
+
+    def fetch_many(self, urls: List[str]) -> Dict[str, FetchResult]:
+        """Fetches all URLs concurrently over the shared connection pool."""
+        if not urls:
+            return {}
+        return async_runtime.run(self.afetch_many(urls))
+
+
+_fetcher = None
+_fetcher_lock = threading.Lock()
+
+
+def get_fetcher() -> FastFetcher:
+    """Process-wide fetcher so all workers share one connection pool."""
+    global _fetcher
+    with _fetcher_lock:
+        if _fetcher is None:
+            _fetcher = FastFetcher()
+    return _fetcher
@@ -0,0 +1,185 @@
+"""
+Incremental JSON Parsing for Streamed LLM Output
+================================================
+Feeds model output in as it streams and reports the moment the first
+top-level JSON object closes, so generation can be cancelled right there:
+no trailing explanations, no second object, no closing markdown fence.
+
+Text before the object (fences, "Here is the JSON:") and <think>...</think>
+blocks are skipped. A stream that ends inside the object (length limit,
+timeout) is repaired by closing the open brackets; a member whose value
+was cut off (mid-string or mid-token) is dropped rather than completed.
+"""
+
+import json
+import re
+from typing import Optional
+
+THINK_OPEN = "<think>"
+THINK_CLOSE = "</think>"
+TRAILING_COMMA = re.compile(r",(\s*[}\]])")
+
+
+def _scan(text: str):
+    """Open-bracket stack and whether `text` ends inside a string."""
+    stack, in_string, escaped = [], False, False
+    for ch in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+        elif ch in "}]" and stack:
+            stack.pop()
+    return stack, in_string
+
+
+def _loads(text: str) -> Optional[dict]:
+    for candidate in (text, TRAILING_COMMA.sub(r"\1", text)):
+        try:
+            value = json.loads(candidate)
+            return value if isinstance(value, dict) else None
+        except json.JSONDecodeError:
+            continue
+    return None
+
+
+def repair(text: str) -> Optional[dict]:
+    """
+    Best-effort object from a truncated one: cut back member by member until
+    closing the open brackets parses. A value cut off mid-string is dropped,
+    never closed, so a half VAT number or sentence cannot pass as complete.
+    """
+    for attempt in range(32):
+        stack, in_string = _scan(text)
+        candidate = text.rstrip(" \t\r\n,:")
+        # A bare number / literal the stream ended on may be cut short too (2025 -> 20);
+        # once cut back to a separator, whatever precedes it was complete
+        if not in_string and (attempt or candidate[-1:] in ('"', "]", "}", "[", "{")):
+            value = _loads(candidate + "".join(reversed(stack)))
+            if value is not None:
+                return value
+        cut = _last_separator(text)
+        if cut <= 0:
+            return None
+        text = text[:cut]
+    return None
+
+
+def _last_separator(text: str) -> int:
+    """Index of the last "," or opening bracket outside a string (where a member can be cut)."""
+    last, in_string, escaped = -1, False, False
+    for i, ch in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == ",":
+            last = i
+        elif ch in "{[":
+            last = i + 1
+    return last
+
+
+class JsonStreamParser:
+    """Tracks string/escape state and bracket depth across arbitrary chunk boundaries."""
+
+    def __init__(self):
+        self.raw = []  # Everything fed, for logging and recording
+        self.buffer = []  # The current candidate object
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.in_think = False
+        self._pending = ""  # Tail that might be the start of a <think> tag
+        self.value: Optional[dict] = None
+
+    @property
+    def done(self) -> bool:
+        return self.value is not None
+
+    def feed(self, chunk: str) -> bool:
+        """Consumes one streamed chunk. True once a complete top-level object has been parsed."""
+        if self.done or not chunk:
+            return self.done
+        self.raw.append(chunk)
+        text = self._pending + chunk
+        self._pending = ""
+        i = 0
+        while i < len(text):
+            if self.depth == 0:
+                # Outside the object: skip reasoning blocks and chatter until the first "{"
+                if self.in_think:
+                    end = text.find(THINK_CLOSE, i)
+                    if end < 0:
+                        self._pending = text[max(i, len(text) - len(THINK_CLOSE) + 1):]
+                        return False
+                    self.in_think = False
+                    i = end + len(THINK_CLOSE)
+                    continue
+                start = text.find("{", i)
+                think = text.find(THINK_OPEN, i)
+                if think >= 0 and (start < 0 or think < start):
+                    self.in_think = True
+                    i = think + len(THINK_OPEN)
+                    continue
+                if start < 0:
+                    # Keep a possible partial "<think" for the next chunk
+                    lt = text.rfind("<", i)
+                    if lt >= 0 and THINK_OPEN.startswith(text[lt:]):
+                        self._pending = text[lt:]
+                    return False
+                i = start
+            ch = text[i]
+            self.buffer.append(ch)
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif ch == "\\":
+                    self.escaped = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"':
+                self.in_string = True
+            elif ch in "{[":
+                self.depth += 1
+            elif ch in "}]":
+                self.depth -= 1
+                if self.depth == 0:
+                    self.value = _loads("".join(self.buffer))
+                    if self.value is not None:
+                        return True
+                    # Not valid JSON after all (e.g. "{placeholder}" in prose); look for the next object
+                    self.buffer = []
+            i += 1
+        return False
+
+    def text(self) -> str:
+        """The object's JSON text once complete, otherwise everything received."""
+        return "".join(self.buffer) if self.done else "".join(self.raw)
+
+    def finish(self) -> Optional[dict]:
+        """The parsed object; a repaired one if the stream stopped mid-object."""
+        if self.done:
+            return self.value
+        if self.depth > 0 and self.buffer:
+            return repair("".join(self.buffer))
+        return None
+
+
+def parse(text: str) -> Optional[dict]:
+    """First JSON object in a complete response."""
+    parser = JsonStreamParser()
+    parser.feed(text or "")
+    return parser.finish()
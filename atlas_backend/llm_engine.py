@@ -1,48 +1,378 @@
+import asyncio
 import ollama
-import json
 import re
+import threading
+import time
+import async_runtime
 import config
+from cache_store import get_llm_cache
+import json_stream
+from pattern_extractors import vat_checksum
+import replay
+import schemas
+
+# One client (one HTTP connection pool) and one in-flight limit for the whole process.
+# Both live on the shared async loop; sync callers submit to it from their threads.
+_client = None
+_slots = None
+_client_lock = threading.Lock()
+
+ERROR_RESPONSE = "Error generating response."
+JSON_SYSTEM_PROMPT = "You are a JSON generator. Output only raw JSON."
+JSON_SUFFIX = "\n\nIMPORTANT: Return ONLY valid JSON. No markdown formatting."
+# Chunks read past the closing brace while waiting for Ollama's final message (its timings);
+# with a `format` schema decoding ends right there, so this only bounds a misbehaving stream
+STREAM_DRAIN_CHUNKS = 16
+
+
+def _get_client():
+    global _client, _slots
+    with _client_lock:
+        if _client is None:
+            _client = ollama.AsyncClient(host=config.OLLAMA_HOST, timeout=config.TIMEOUT)
+            _slots = asyncio.Semaphore(config.LLM_MAX_IN_FLIGHT)
+    return _client, _slots
+
+
+def _timing(response, started, first_token=None, chunks=0):
+    """
+    Per-call timings in ms. Ollama reports load / prompt-eval / eval durations in its
+    final message; a stream cut off early never gets it, so only the client-side
+    time to first token and a chunk-count estimate of generation are known then.
+    """
+    now = time.time()
+    timing = {
+        "exact": response is not None,
+        "ttft_ms": (first_token - started) * 1000 if first_token else 0.0,
+        "total_ms": (now - started) * 1000,
+    }
+    if response is not None:
+        get = lambda key: response.get(key) or 0
+        timing.update(load_ms=get("load_duration") / 1e6, prompt_tokens=get("prompt_eval_count"),
+                      prompt_eval_ms=get("prompt_eval_duration") / 1e6, eval_tokens=get("eval_count"),
+                      eval_ms=get("eval_duration") / 1e6)
+    else:
+        timing.update(load_ms=0.0, prompt_tokens=0, prompt_eval_ms=0.0, eval_tokens=chunks,
+                      eval_ms=(now - first_token) * 1000 if first_token else 0.0)
+    return timing
+
+
+class LLMTimings:
+    """Process-wide totals of per-call timings, to check warm loads and prompt-prefix reuse."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.exact_calls = 0
+        self.streamed_calls = 0
+        self.cold_loads = 0
+        self.totals = {"load_ms": 0.0, "prompt_tokens": 0, "prompt_eval_ms": 0.0,
+                       "eval_tokens": 0, "eval_ms": 0.0, "ttft_ms": 0.0}
+
+    def record(self, timing):
+        with self._lock:
+            self.calls += 1
+            if timing["exact"]:
+                self.exact_calls += 1
+                self.cold_loads += timing["load_ms"] > config.LLM_COLD_LOAD_MS
+                for key in ("load_ms", "prompt_tokens", "prompt_eval_ms"):
+                    self.totals[key] += timing[key]
+            if timing["ttft_ms"]:
+                self.streamed_calls += 1
+                self.totals["ttft_ms"] += timing["ttft_ms"]
+            self.totals["eval_tokens"] += timing["eval_tokens"]
+            self.totals["eval_ms"] += timing["eval_ms"]
+
+    def stats(self):
+        with self._lock:
+            t, exact, streamed = dict(self.totals), self.exact_calls, self.streamed_calls
+            calls, cold = self.calls, self.cold_loads
+        return {
+            "calls": calls,
+            "cold_loads": cold,
+            "avg_load_ms": round(t["load_ms"] / exact, 1) if exact else 0.0,
+            # Tokens Ollama actually evaluated: a reused prefix is not counted, so this drops when caching works
+            "avg_prompt_tokens_evaluated": round(t["prompt_tokens"] / exact, 1) if exact else 0.0,
+            "prompt_tokens_per_s": round(t["prompt_tokens"] / (t["prompt_eval_ms"] / 1000), 1) if t["prompt_eval_ms"] else 0.0,
+            "avg_ttft_ms": round(t["ttft_ms"] / streamed, 1) if streamed else 0.0,
+            "eval_tokens_per_s": round(t["eval_tokens"] / (t["eval_ms"] / 1000), 1) if t["eval_ms"] else 0.0,
+        }
+
+
+_timings = LLMTimings()
+
+
+def get_llm_timings() -> LLMTimings:
+    return _timings
+
+
+# Answers a small model gives up with, or placeholders it copies from the prompt
+NON_ANSWERS = {"", "string", "n/a", "na", "unknown", "none", "not found", "null", "no information"}
+
+
+def _is_empty(value) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() in NON_ANSWERS or schemas.is_placeholder(value)
+    if isinstance(value, dict):
+        return all(_is_empty(v) for v in value.values())
+    if isinstance(value, list):
+        return all(_is_empty(v) for v in value)
+    return value is None
+
+
+def _short_label(value) -> bool:
+    return isinstance(value, str) and 2 <= len(value.strip()) <= 80 and len(value.split()) <= 8
+
+
+# Field-level checks on a small-model answer; failing one escalates to the large model
+FIELD_VALIDATORS = {
+    "acronym": lambda v: isinstance(v, str) and bool(re.fullmatch(r"[A-Z0-9&.\-]{2,10}", v.strip())),
+    "short_description": lambda v: isinstance(v, str) and 20 <= len(v.strip()) <= 250,
+    "long_description": lambda v: isinstance(v, str) and len(v.strip()) >= 120,
+    "description": lambda v: isinstance(v, str) and len(v.strip()) >= 80,
+    "industry": _short_label,
+    "sector": _short_label,
+    "sub_industry": _short_label,
+    "hq_indicator": _short_label,
+    "industry_details": lambda v: isinstance(v, dict) and _short_label(v.get("industry")) and _short_label(v.get("sector")),
+    "tags": lambda v: isinstance(v, list) and len([t for t in v if not _is_empty(t)]) >= 2,
+    "sic_code": lambda v: isinstance(v, str) and bool(re.fullmatch(r"\d{5}", v.strip())),
+    "vat_number": lambda v: isinstance(v, str) and vat_checksum(re.sub(r"\D", "", v)[:9]),
+    "company_registration_number": lambda v: isinstance(v, str) and bool(re.fullmatch(r"[A-Z]{2}\d{6}|\d{7,8}", v.strip().upper())),
+}
+
+
+class ModelRouter:
+    """
+    Chooses the model per field: easy fields start on MODEL_SMALL and escalate to
+    MODEL_NAME only when the answer is empty or fails the field's validator.
+    Keeps per-field escalation counts.
+    """
+
+    def __init__(self):
+        self.small_model = config.MODEL_SMALL
+        self.large_model = config.MODEL_NAME
+        self.small_fields = set(config.ROUTER_SMALL_FIELDS)
+        self._lock = threading.Lock()
+        self._counts = {}  # field -> [small-model answers, escalations]
+
+    def routes_small(self, field) -> bool:
+        return bool(self.small_model) and self.small_model != self.large_model and field in self.small_fields
+
+    def accepts(self, field, value) -> bool:
+        if _is_empty(value):
+            return False
+        check = FIELD_VALIDATORS.get(field)
+        try:
+            return check(value) if check else True
+        except Exception:
+            return False
+
+    def record(self, field, escalated: bool):
+        with self._lock:
+            counts = self._counts.setdefault(field, [0, 0])
+            counts[0] += 1
+            counts[1] += escalated
+
+    def stats(self):
+        with self._lock:
+            return {
+                field: {"small_calls": calls, "escalations": escalated,
+                        "escalation_rate": round(escalated / calls, 3) if calls else 0.0}
+                for field, (calls, escalated) in self._counts.items()
+            }
+
+
+_router = None
+_router_lock = threading.Lock()
+
+
+def get_model_router() -> ModelRouter:
+    """Process-wide router so escalation rates cover every worker."""
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = ModelRouter()
+    return _router
+
+
+async def _warm_up(model):
+    client, _ = _get_client()
+    started = time.time()
+    try:
+        # An empty chat only loads the model (or extends its keep-alive if it is already resident)
+        response = await client.chat(model=model, messages=[], keep_alive=config.LLM_KEEP_ALIVE)
+        load_ms = (response.get("load_duration") or 0) / 1e6
+        print(f"🔥 LLM {model} resident (load {load_ms:.0f} ms, "
+              f"ready in {time.time() - started:.1f}s, keep-alive {config.LLM_KEEP_ALIVE})")
+    except Exception as e:
+        print(f"⚠️ LLM warm-up failed for {model}: {e}")
+
+
+def warm_up():
+    """Starts loading the model(s) in the background so the first extraction doesn't pay the cold load."""
+    if replay.replaying():
+        return
+    router = get_model_router()
+    models = [router.large_model] + ([router.small_model] if router.small_fields and router.small_model else [])
+    for model in dict.fromkeys(models):
+        asyncio.run_coroutine_threadsafe(_warm_up(model), async_runtime.get_loop())
+
 
 class LLMEngine:
     def __init__(self):
         self.model = config.MODEL_NAME
+        self.options = {
+            'temperature': 0,
+            'num_ctx': config.LLM_NUM_CTX # Prompts are packed to fit (see context_packer)
+        }
+        self.cache = get_llm_cache()
+        self.last_timing = None  # Timings of this engine's most recent live call (see _timing)
 
-    def generate(self, prompt, system_prompt="You are a helpful research assistant."):
-        """Standard text generation."""
-        try:
-            response = ollama.chat(
-                model=self.model,
-                messages=[
-                    {'role': 'system', 'content': system_prompt},
-                    {'role': 'user', 'content': prompt}
-                ],
-                options={
-                    'temperature': 0,
-                    'num_ctx': 4096 # Ensure enough context for search results
-                }
-            )
-            return response['message']['content']
-        except Exception as e:
-            print(f"❌ LLM Error: {e}")
-            return "Error generating response."
-
-    def generate_json(self, prompt):
-        """Forces JSON output from the LLM."""
-        full_prompt = f"{prompt}\n\nIMPORTANT: Return ONLY valid JSON. No markdown formatting."
-        response = self.generate(full_prompt, system_prompt="You are a JSON generator. Output only raw JSON.")
-        
-        # Cleaner: Extract JSON if wrapped in markdown
-        cleaned = response.replace("```json", "").replace("```", "").strip()
-        
+    async def agenerate(self, prompt, system_prompt="You are a helpful research assistant.", timeout=None,
+                        use_cache=True, until_json=False, schema=None, model=None):
+        """
+        Standard text generation, awaitable. Answers from the response cache when the
+        same model/options/prompts ran before (use_cache=False forces a fresh call);
+        otherwise waits for one of LLM_MAX_IN_FLIGHT slots, then gives the request
+        `timeout` seconds (config.TIMEOUT by default).
+        until_json: stream the answer and stop generating once the first JSON object closes.
+        schema: JSON Schema passed as Ollama's `format`, constraining decoding to that shape.
+        model: overrides self.model for this call (see ModelRouter).
+        """
+        model = model or self.model
+        if replay.replaying():
+            # Queue for the same LLM_MAX_IN_FLIGHT slots as a live call, so replayed latency
+            # models Ollama serving only OLLAMA_NUM_PARALLEL requests at a time
+            _, slots = _get_client()
+            async with slots:
+                return await replay.replay_llm(model, system_prompt, prompt)
+        # The output format is part of what produced the answer, so it is part of the cache key
+        key_options = {**self.options, "format": schema} if schema else self.options
+        if use_cache and not replay.recording():  # Recording must capture every live call
+            # SQLite + zlib would block the shared loop, so the cache runs on a worker thread
+            cached = await asyncio.to_thread(self.cache.get, model, key_options, system_prompt, prompt)
+            if cached is not None:
+                return cached
+        content = await self._chat(prompt, system_prompt, timeout, until_json, schema, model)
+        if content != ERROR_RESPONSE:
+            await asyncio.to_thread(self.cache.put, model, key_options, system_prompt, prompt, content)
+        return content
+
+    async def _chat(self, prompt, system_prompt, timeout, until_json=False, schema=None, model=None):
+        client, slots = _get_client()
+        timeout = timeout or config.TIMEOUT
+        messages = [
+            {'role': 'system', 'content': system_prompt},
+            {'role': 'user', 'content': prompt}
+        ]
+        async with slots:
+            started = time.time()
+            try:
+                if until_json:
+                    content, timing = await asyncio.wait_for(
+                        self._stream_json(client, messages, schema, started, model), timeout)
+                else:
+                    response = await asyncio.wait_for(client.chat(
+                        model=model,
+                        messages=messages,
+                        format=schema or '',
+                        options=self.options,
+                        keep_alive=config.LLM_KEEP_ALIVE
+                    ), timeout)
+                    content = response['message']['content']
+                    timing = _timing(response, started)
+                self._record_timing(timing)
+                if replay.recording():
+                    replay.record_llm(model, system_prompt, prompt, content, time.time() - started)
+                return content
+            except asyncio.TimeoutError:
+                print(f"❌ LLM Error: no response after {timeout}s")
+                return ERROR_RESPONSE
+            except Exception as e:
+                print(f"❌ LLM Error: {e}")
+                return ERROR_RESPONSE
+
+    async def _stream_json(self, client, messages, schema, started, model):
+        """
+        Streams the answer through an incremental JSON parser. Once the top-level
+        object is complete, at most STREAM_DRAIN_CHUNKS more chunks are read for the
+        final message carrying Ollama's exact timings; then the stream is closed
+        (Ollama stops generating). Returns (text, timing).
+        """
+        parser = json_stream.JsonStreamParser()
+        stream = await client.chat(model=model, messages=messages, format=schema or '',
+                                   options=self.options, keep_alive=config.LLM_KEEP_ALIVE, stream=True)
+        first_token, chunks, final, tail = None, 0, None, 0
         try:
-            return json.loads(cleaned)
-        except json.JSONDecodeError:
-            # Fallback regex extraction
-            match = re.search(r'\{.*\}', cleaned, re.DOTALL)
-            if match:
-                try:
-                    return json.loads(match.group(0))
-                except:
-                    pass
-            print(f"⚠️ JSON Parse Failed. Raw: {cleaned[:50]}...")
-            return {}
\ No newline at end of file
+            async for part in stream:
+                chunk = part['message']['content']
+                if parser.done:
+                    tail += 1
+                elif chunk:
+                    first_token = first_token or time.time()
+                    chunks += 1
+                    parser.feed(chunk)
+                if part.get('done'):
+                    final = part
+                    break
+                if tail >= STREAM_DRAIN_CHUNKS:
+                    break
+        finally:
+            if hasattr(stream, "aclose"):
+                await stream.aclose()
+        return parser.text(), _timing(final, started, first_token, chunks)
+
+    def _record_timing(self, timing):
+        self.last_timing = timing
+        get_llm_timings().record(timing)
+        if config.LLM_LOG_TIMINGS:
+            print(f"⏱️ LLM call: load {timing['load_ms']:.0f} ms, prompt {timing['prompt_tokens']} tok "
+                  f"in {timing['prompt_eval_ms']:.0f} ms, first token {timing['ttft_ms']:.0f} ms, "
+                  f"{timing['eval_tokens']} tok in {timing['eval_ms']:.0f} ms")
+
+    async def agenerate_json(self, prompt, timeout=None, use_cache=True, schema=None, model=None):
+        """
+        Forces JSON output from the LLM, awaitable. With a schema (see schemas.py) decoding
+        is constrained to it; without one, to any valid JSON.
+        """
+        full_prompt = f"{prompt}{JSON_SUFFIX}"
+        response = await self.agenerate(full_prompt, system_prompt=JSON_SYSTEM_PROMPT, timeout=timeout,
+                                        use_cache=use_cache, until_json=config.LLM_STREAM_JSON,
+                                        schema=schema or "json", model=model)
+        return self._parse_json(response)
+
+    async def agenerate_json_routed(self, prompt, field, schema=None, timeout=None, use_cache=True):
+        """
+        Cascade for one field: easy fields try the small model first and keep its answer
+        if it passes the field's validator; anything else runs on the large model.
+        """
+        router = get_model_router()
+        if router.routes_small(field):
+            result = await self.agenerate_json(prompt, timeout, use_cache, schema, model=router.small_model)
+            accepted = router.accepts(field, result.get("data", result))
+            router.record(field, escalated=not accepted)
+            if accepted:
+                return result
+        return await self.agenerate_json(prompt, timeout, use_cache, schema, model=router.large_model)
+
+    def generate(self, prompt, system_prompt="You are a helpful research assistant.", timeout=None, use_cache=True):
+        """Standard text generation (blocking wrapper for agent threads)."""
+        return async_runtime.run(self.agenerate(prompt, system_prompt, timeout, use_cache))
+
+    def generate_json(self, prompt, timeout=None, use_cache=True, schema=None, model=None):
+        """Forces JSON output from the LLM (blocking wrapper for agent threads)."""
+        return async_runtime.run(self.agenerate_json(prompt, timeout, use_cache, schema, model))
+
+    def generate_json_routed(self, prompt, field, schema=None, timeout=None, use_cache=True):
+        """Small-model-first JSON generation for one field (blocking wrapper for agent threads)."""
+        return async_runtime.run(self.agenerate_json_routed(prompt, field, schema, timeout, use_cache))
+
+    def _parse_json(self, response):
+        # First JSON object in the text: fences, chatter and <think> blocks are skipped,
+        # a truncated object is closed off rather than thrown away
+        parsed = json_stream.parse(response)
+        if parsed is None:
+            print(f"⚠️ JSON Parse Failed. Raw: {response.strip()[:50]}...")
+            return {}
+        return parsed
@@ -9,14 +9,20 @@ New 5-Step Pipeline:
 5. Validate & targeted retry only for missing fields
 """
 
-from llm_engine import LLMEngine
-from browser_engine import ResearchBrowser
+from llm_engine import LLMEngine, JSON_SUFFIX, JSON_SYSTEM_PROMPT, get_model_router
+from context_packer import ContextPacker, evidence_budget
+from evidence_index import EvidenceIndex
+from pattern_extractors import extract_fields
+from schemas import bulk_schema, is_placeholder, schema_hint
+from browser_engine import ResearchBrowser, format_serp
+from cache_store import get_search_cache
+from rate_limiter import get_scheduler
+import replay
 from data_models import CompanyProfile, KeyPerson, GraphNode, GraphEdge
 import config
-import json
 import time
 from typing import Dict, List, Tuple, Optional
-from urllib.parse import urlparse
+from urllib.parse import urlparse, quote_plus
 
 
 class QueryGenerator:
@@ -246,6 +252,10 @@ class ParallelBrowserEngine:
         self.all_urls: Dict[str, str] = {}  # url -> field that found it
         self.scraped_content: Dict[str, str] = {}  # url -> content
         self.search_results: Dict[str, str] = {}  # field -> SERP text
+        self.snippets: Dict[str, str] = {}  # url -> "title: snippet" from the SERP
+        self.search_cache = get_search_cache()
+        self.scheduler = get_scheduler()
+        self.timed_out_tabs: List[Tuple[str, str, str]] = []  # (field, engine, query)
     
     def _log(self, message: str):
         if self.log_callback:
@@ -255,7 +265,9 @@ class ParallelBrowserEngine:
     
     def execute_parallel_searches(self, queries: Dict[str, Dict[str, str]]) -> Tuple[Dict[str, str], List[str]]:
         """
-        Opens all searches in parallel tabs (alternating Google/DDG).
+        Opens all searches in parallel tabs (alternating Google/DDG) as fast as the
+        politeness scheduler allows, and collects each tab as soon as its results
+        render, or when its deadline passes.
         Returns: (field_serp_texts, all_unique_urls)
         """
         self._log(f"🚀 Starting parallel search for {len(queries)} fields...")
@@ -279,97 +291,153 @@ class ParallelBrowserEngine:
                     tab_info.append((current_tab, field, engine, query))
                     current_tab += 1
         
-        self._log(f"📑 Opening {len(tab_info)} search tabs...")
-        
-        # Open all tabs first (without waiting for results)
-        for idx, (tab_idx, field, engine, query) in enumerate(tab_info):
-            if idx == 0:
-                # First tab - use existing window
-                self._execute_search(engine, query, field)
-            else:
-                # New tabs
-                self.browser.open_new_tab()
-                self._execute_search(engine, query, field)
-            
-            # Small delay to prevent rate limiting
-            time.sleep(0.3)
-        
-        self._log(f"⏳ Waiting for all tabs to load...")
-        time.sleep(2)  # Let all tabs finish loading
-        
-        # Now collect results from all tabs
+        # Serve repeated (engine, query) pairs from the SERP cache - no tab, no captcha risk
         all_urls = []
-        handles = self.browser.driver.window_handles
-        
-        for idx, (tab_idx, field, engine, query) in enumerate(tab_info):
-            if idx < len(handles):
-                self.browser.driver.switch_to.window(handles[idx])
-                time.sleep(0.5)
-                
-                # Get SERP text
-                try:
-                    serp_text = self.browser.driver.find_element("tag name", "body").text
-                    existing = self.search_results.get(field, "")
-                    self.search_results[field] = f"{existing}\n\n--- {engine.upper()} RESULTS ---\n{serp_text[:5000]}"
-                except:
-                    pass
+        live_tabs = []
+        for tab in tab_info:
+            tab_idx, field, engine, query = tab
+            cached = self.search_cache.get(engine, query)
+            if cached is None:
+                live_tabs.append(tab)
+                continue
+            serp_text, results = cached
+            self._record_serp(field, engine, serp_text, results, all_urls)
+            self._log(f"💾 Cache: {engine.upper()} for '{field}' - {len(results)} URLs")
+        
+        self._log(f"📑 Opening {len(live_tabs)} search tabs ({len(tab_info) - len(live_tabs)} served from cache)...")
+        
+        # Tabs open as soon as the scheduler allows (host rate + engine concurrency cap)
+        # and each is collected the moment its result selector shows up
+        home_handle = self.browser.driver.current_window_handle
+        waiting = list(live_tabs)  # not opened yet
+        pending = {}  # handle -> (field, engine, query, url, deadline)
+        collected = 0
+        timed_out = []
+        started = time.time()
+        # A tab whose navigation has not reached DOMContentLoaded blocks driver commands;
+        # the short cap turns that into a "pending" poll so the deadline below holds
+        with self.browser.page_load_timeout(config.SEARCH_TAB_COMMAND_TIMEOUT):
+            while waiting or pending:
+                progressed = False
+                for tab in list(waiting):
+                    tab_idx, field, engine, query = tab
+                    url = self._search_url(engine, query)
+                    if not self.scheduler.try_acquire(url, hold_slot=True):
+                        continue
+                    waiting.remove(tab)
+                    progressed = True
+                    # window.open returns before the page loads
+                    handle = self._open_search_tab(url, field)
+                    if handle:
+                        pending[handle] = (field, engine, query, url, time.time() + config.SEARCH_TAB_TIMEOUT)
+                    else:
+                        self.scheduler.release(url)
+            
+                for handle, (field, engine, query, url, deadline) in list(pending.items()):
+                    state = self._tab_state(handle, engine)
+                    expired = time.time() >= deadline
+                    if state == "pending" and not expired:
+                        continue
                 
-                # Extract URLs
-                urls = self._extract_urls_from_current_page(engine)
-                for url in urls:
-                    if url not in self.all_urls:
-                        self.all_urls[url] = field
-                    all_urls.append(url)
+                    del pending[handle]
+                    self.scheduler.release(url)
+                    progressed = True
+                    collected += 1
+                    serp_text, results = self.browser.parse_serp(engine, limit=6)
+                    self._record_serp(field, engine, serp_text, results, all_urls)
                 
-                self._log(f"✓ Tab {idx+1}: {engine.upper()} for '{field}' - Found {len(urls)} URLs")
+                    if state == "captcha":
+                        self.scheduler.report_captcha(url)
+                    elif state == "ready":
+                        self.scheduler.report_ok(url)
+                        if results:
+                            self.search_cache.put(engine, query, serp_text, results)
+                        if replay.recording():
+                            replay.record_serp(engine, query, self.browser.driver.page_source)
+                    if state == "pending":
+                        timed_out.append((field, engine, query))
+                        self._log(f"⌛ Tab {collected}: {engine.upper()} for '{field}' timed out after {config.SEARCH_TAB_TIMEOUT}s - kept {len(results)} URLs")
+                    else:
+                        self._log(f"✓ Tab {collected}: {engine.upper()} for '{field}' ({state}, {time.time() - started:.1f}s) - Found {len(results)} URLs")
+            
+                if (waiting or pending) and not progressed:
+                    time.sleep(config.SEARCH_POLL_INTERVAL)
+        
         
-        # Close extra tabs, keep only first
-        while len(self.browser.driver.window_handles) > 1:
-            self.browser.driver.switch_to.window(self.browser.driver.window_handles[-1])
-            self.browser.driver.close()
-        self.browser.driver.switch_to.window(self.browser.driver.window_handles[0])
+        self.timed_out_tabs.extend(timed_out)
+        if timed_out:
+            self._log(f"⚠️ {len(timed_out)} tabs timed out: " + ", ".join(f"{e}:{f}" for f, e, _ in timed_out))
+        if live_tabs:
+            self._log(f"⏱️ Search phase took {time.time() - started:.1f}s for {len(live_tabs)} tabs")
+        
+        # Close search tabs, keep only the window we started from (timed-out ones may still be loading)
+        with self.browser.page_load_timeout(config.SEARCH_TAB_COMMAND_TIMEOUT):
+            for handle in self.browser.driver.window_handles:
+                if handle != home_handle:
+                    try:
+                        self.browser.driver.switch_to.window(handle)
+                        self.browser.driver.close()
+                    except Exception:
+                        pass
+        self.browser.driver.switch_to.window(home_handle)
         
         unique_urls = list(set(all_urls))
         self._log(f"📊 Total unique URLs found: {len(unique_urls)}")
         
         return self.search_results, unique_urls
     
-    def _execute_search(self, engine: str, query: str, field: str):
-        """Execute search on current tab without waiting for full load."""
+    def _record_serp(self, field: str, engine: str, serp_text: str, results: List[Dict], all_urls: List[str]):
+        """Adds one engine's SERP to the field's search context, the URL pool and the snippet map."""
+        context = format_serp(serp_text, results)
+        if context:
+            existing = self.search_results.get(field, "")
+            self.search_results[field] = f"{existing}\n\n--- {engine.upper()} RESULTS ---\n{context[:5000]}"
+        for result in results:
+            url = result["url"]
+            if url not in self.all_urls:
+                self.all_urls[url] = field
+            if result.get("snippet") and url not in self.snippets:
+                self.snippets[url] = f"{result.get('title', '')}: {result['snippet']}"
+            all_urls.append(url)
+    
+    # CSS selector that means "results are rendered" for each engine
+    RESULT_SELECTORS = {
+        "google": "div.g",
+        "ddg": "a[data-testid='result-title-a']",
+    }
+    
+    # One round trip per poll: results rendered, challenge page, no results, or still loading
+    TAB_STATE_SCRIPT = """
+        var sel = arguments[0];
+        if (document.querySelector(sel)) return 'ready';
+        if (document.readyState !== 'complete') return 'pending';
+        var head = document.body ? document.body.innerText.slice(0, 3000) : '';
+        if (document.querySelector("iframe[src*='captcha'], form#captcha-form") ||
+            /unusual traffic|not a robot/i.test(head)) return 'captcha';
+        if (/no results found|did not match any documents/i.test(head)) return 'empty';
+        return 'pending';
+    """
+    
+    def _search_url(self, engine: str, query: str) -> str:
+        if engine == "google":
+            return f"https://www.google.com/search?q={quote_plus(query)}"
+        return f"https://duckduckgo.com/?q={quote_plus(query)}"
+    
+    def _open_search_tab(self, url: str, field: str) -> Optional[str]:
+        """Opens the SERP in a new tab without waiting for it to load. Returns its window handle."""
         try:
-            if engine == "google":
-                self.browser.driver.get(f"https://www.google.com/search?q={query.replace(' ', '+')}")
-            else:
-                self.browser.driver.get(f"https://duckduckgo.com/?q={query.replace(' ', '+')}")
+            return self.browser.open_background_tab(url)
         except Exception as e:
             self._log(f"⚠️ Search error for {field}: {e}")
+            return None
     
-    def _extract_urls_from_current_page(self, engine: str) -> List[str]:
-        """Extract result URLs from current search page."""
-        urls = []
+    def _tab_state(self, handle: str, engine: str) -> str:
         try:
-            if engine == "google":
-                elements = self.browser.driver.find_elements("css selector", "div.g a")
-                for el in elements[:6]:
-                    try:
-                        href = el.get_attribute("href")
-                        if href and "google.com" not in href and href.startswith("http"):
-                            urls.append(href)
-                    except:
-                        continue
-            else:  # DuckDuckGo
-                elements = self.browser.driver.find_elements("css selector", "a[data-testid='result-title-a']")
-                for el in elements[:6]:
-                    try:
-                        href = el.get_attribute("href")
-                        if href and href.startswith("http"):
-                            urls.append(href)
-                    except:
-                        continue
-        except Exception as e:
-            self._log(f"URL extraction error: {e}")
-        
-        return urls
+            self.browser.driver.switch_to.window(handle)
+            return self.browser.driver.execute_script(self.TAB_STATE_SCRIPT, self.RESULT_SELECTORS[engine]) or "pending"
+        except Exception:
+            # Tab crashed or navigation is mid-flight; the deadline still applies
+            return "pending"
     
     def scrape_deduplicated_urls(self, urls: List[str], max_urls: int = 10) -> str:
         """
@@ -384,10 +452,8 @@ class ParallelBrowserEngine:
         # Skip social media and irrelevant domains
         skip_domains = ["facebook.com", "twitter.com", "instagram.com", "youtube.com", "tiktok.com"]
         
+        candidates = []
         for url in urls[:max_urls * 2]:  # Check more in case some are skipped
-            if scraped_count >= max_urls:
-                break
-            
             # Skip already scraped
             if url in self.scraped_content:
                 combined_content += f"\n\n--- CACHED: {url} ---\n{self.scraped_content[url]}"
@@ -397,18 +463,29 @@ class ParallelBrowserEngine:
             domain = urlparse(url).netloc.lower()
             if any(skip in domain for skip in skip_domains):
                 continue
-            
-            try:
-                self._log(f"  → Scraping: {url[:60]}...")
-                content = self.browser.scrape_text(url)
-                if content:
-                    self.scraped_content[url] = content
-                    combined_content += f"\n\n--- SOURCE: {url} ---\n{content}"
-                    scraped_count += 1
-            except Exception as e:
-                self._log(f"  ⚠️ Failed: {url[:40]}... ({e})")
-        
-        self._log(f"✅ Successfully scraped {scraped_count} pages")
+            candidates.append(url)
+        
+        # Plain-HTTP tier fetches all candidates at once; browser only for JS pages
+        self._log(f"  → Fetching {len(candidates)} pages (HTTP first, browser fallback)...")
+        try:
+            pages = self.browser.scrape_many(candidates, limit=max_urls)
+        except Exception as e:
+            self._log(f"  ⚠️ Batch fetch failed: {e}")
+            pages = {}
+        
+        for url, content in pages.items():
+            self.scraped_content[url] = content
+            combined_content += f"\n\n--- SOURCE: {url} ---\n{content}"
+            scraped_count += 1
+        
+        # Pages we did not open still contribute what the search engine showed for them
+        snippet_count = 0
+        for url in candidates:
+            if url not in pages and url in self.snippets:
+                combined_content += f"\n\n--- SNIPPET: {url} ---\n{self.snippets[url]}"
+                snippet_count += 1
+        
+        self._log(f"✅ Successfully scraped {scraped_count} pages (+{snippet_count} result snippets)")
         return combined_content
 
 
@@ -418,116 +495,101 @@ class BulkExtractor:
     Prioritizes Excel output format fields.
     """
     
+    # Prompt entry per field: (priority, instructions); the output shape comes from schemas.bulk_schema
+    FIELD_SPECS = {
+        "long_description": ("CRITICAL", [
+            "A comprehensive 2-3 paragraph description",
+            "What the company does, their mission, services, target market",
+            "Include any acronym meanings if applicable",
+        ]),
+        "short_description": ("CRITICAL", [
+            "A brief one-sentence description or tagline",
+            "Maximum 200 characters",
+        ]),
+        "sic_code": ("IMPORTANT", [
+            "Standard Industrial Classification code number",
+            "Format: 5-digit number",
+            "UK companies often have this on Companies House",
+        ]),
+        "sic_text": ("IMPORTANT", [
+            "The text description for the SIC code",
+            'E.g., "Information technology consultancy activities"',
+        ]),
+        "sub_industry": ("IMPORTANT", [
+            "Specific sub-industry or niche",
+            'E.g., "Cybersecurity", "E-commerce", "Data Analytics"',
+        ]),
+        "industry": ("CRITICAL", [
+            "Primary industry category",
+            'E.g., "Information Technology", "Healthcare", "Finance"',
+        ]),
+        "sector": ("CRITICAL", [
+            "Business sector",
+            'E.g., "Technology", "Financial Services", "Retail"',
+        ]),
+        "tags": ("IMPORTANT", [
+            "Array of relevant keywords describing products/services",
+            'E.g., ["cloud computing", "ai solutions", "data security"]',
+        ]),
+        "company_registration_number": ("IMPORTANT", [
+            "Official company registration number (e.g., from Companies House)",
+            "Format: Usually 8 digits for UK",
+        ]),
+        "vat_number": ("IMPORTANT", [
+            "Value Added Tax registration number",
+            "Format: Country code + 9 digits",
+        ]),
+        "acronym": ("USEFUL", [
+            "Common abbreviation or short name for the company where applicable",
+            'E.g., "IBM" for "International Business Machines"',
+        ]),
+        "tech_stack": ("IMPORTANT", [
+            "Programming languages, frameworks, cloud providers mentioned",
+            'E.g., ["Python", "React", "AWS", "TensorFlow"]',
+        ]),
+    }
+
     def __init__(self, llm: LLMEngine):
         self.llm = llm
-    
-    def extract_all_fields(self, domain: str, search_results: Dict[str, str], 
+        self.packer = ContextPacker()
+
+    def extract_all_fields(self, domain: str, search_results: Dict[str, str],
                            scraped_content: str, required_fields: List[str]) -> Dict:
         """
-        Extracts all required fields from combined context in one LLM call.
+        Extracts all required fields from combined context in one LLM call per model:
+        easy fields go to the small model first, the rest (plus any easy field whose
+        answer failed validation) to the large model.
         Focuses on Excel output format fields first.
         """
-        
-        # Build context from search results - prioritize by field
-        serp_context = "\n".join([f"=== {field.upper()} SEARCH ===\n{text[:4000]}" 
-                                   for field, text in search_results.items()])
-        
-        company_name = domain.split('.')[0].replace('-', ' ').replace('_', ' ')
-        
-        prompt = f"""You are an expert business data extraction AI. Extract comprehensive company information from the provided data.
-
-TARGET COMPANY: {domain} ({company_name})
-
-=== SEARCH ENGINE RESULTS ===
-{serp_context[:15000]}
-
-=== WEBSITE CONTENT ===
-{scraped_content[:25000]}
 
-=== PRIMARY EXTRACTION TASK (EXCEL OUTPUT FIELDS) ===
-These are the MOST IMPORTANT fields - extract with highest priority:
-
-1. "long_description" (CRITICAL): 
-   - A comprehensive 2-3 paragraph description
-   - What the company does, their mission, services, target market
-   - Include any acronym meanings if applicable
-
-2. "short_description" (CRITICAL):
-   - A brief one-sentence description or tagline
-   - Maximum 200 characters
-
-3. "sic_code" (IMPORTANT):
-   - Standard Industrial Classification code number
-   - Format: 5-digit number (e.g., "62020")
-   - UK companies often have this on Companies House
-
-4. "sic_text" (IMPORTANT):
-   - The text description for the SIC code
-   - E.g., "Information technology consultancy activities"
-
-5. "sub_industry" (IMPORTANT):
-   - Specific sub-industry or niche
-   - E.g., "Cybersecurity", "E-commerce", "Data Analytics"
-
-6. "industry" (CRITICAL):
-   - Primary industry category
-   - E.g., "Information Technology", "Healthcare", "Finance"
-
-7. "sector" (CRITICAL):
-   - Business sector
-   - E.g., "Technology", "Financial Services", "Retail"
-
-8. "tags" (IMPORTANT):
-   - Array of relevant keywords describing products/services
-   - E.g., ["cloud computing", "ai solutions", "data security"]
-
-9. "company_registration_number" (IMPORTANT):
-   - Official company registration number (e.g., from Companies House)
-   - Format: Usually 8 digits for UK
-
-10. "vat_number" (IMPORTANT):
-    - Value Added Tax registration number
-    - Format: Country code + 9 digits (e.g., GB123456789)
-
-11. "acronym" (USEFUL):
-    - Common abbreviation or short name for the company where applicable
-    - E.g., "IBM" for "International Business Machines"
-
-12. "tech_stack" (IMPORTANT):
-    - Programming languages, frameworks, cloud providers mentioned
-    - E.g., ["Python", "React", "AWS", "TensorFlow"]
-
-=== REQUIRED OUTPUT FORMAT (JSON) ===
-Return ONLY valid JSON with these fields:
-
-{{
-    "long_description": "Comprehensive 2-3 paragraph company description...",
-    "short_description": "One-sentence company tagline/summary",
-    "sic_code": "62020",
-    "sic_text": "Information technology consultancy activities",
-    "sub_industry": "Specific niche/sub-industry",
-    "industry": "Primary Industry Category",
-    "sector": "Business Sector",
-    "tags": ["keyword1", "keyword2", "keyword3"],
-    "company_registration_number": "12345678",
-    "vat_number": "GB123456789",
-    "acronym": "ABC",
-    "tech_stack": ["React", "Python", "AWS"],
-    "description_long": "Same as long_description for compatibility",
-    "description_short": "Same as short_description for compatibility"
-}}
-
-=== EXTRACTION RULES ===
-1. Extract REAL data ONLY - never make up information
-2. If a field cannot be determined from the data, use empty string "" or empty array []
-3. Cross-reference multiple sources for accuracy
-4. For UK companies, look for SIC codes from Companies House data
-5. For tags, include: service types, technology keywords, industry terms
-6. Prefer official website content over third-party sources
+        company_name = domain.split('.')[0].replace('-', ' ').replace('_', ' ')
+        fields = [f for f in self.FIELD_SPECS if f in required_fields]
+        if not fields:
+            return {}
 
-Return ONLY the JSON. No markdown formatting, no explanations."""
+        sections = [(f"{field.upper()} SEARCH", text, 1.0) for field, text in search_results.items()]
+        sections.append(("WEBSITE CONTENT", scraped_content, 1.2))
+        index = EvidenceIndex(self.packer).build(sections)
 
-        result = self.llm.generate_json(prompt)
+        router = get_model_router()
+        small = [f for f in fields if router.routes_small(f)]
+        result = {}
+        if small:
+            answer = self._extract(domain, company_name, index, small, router.small_model)
+            for field in small:
+                value = answer.get(field)
+                accepted = router.accepts(field, value)
+                router.record(field, escalated=not accepted)
+                if accepted:
+                    result[field] = value
+        large = [f for f in fields if f not in result]
+        if large:
+            answer = self._extract(domain, company_name, index, large, router.large_model)
+            # A description echoed back from the output template is not data
+            for field, value in answer.items():
+                if isinstance(value, list):
+                    value = [item for item in value if not is_placeholder(item)]
+                result[field] = "" if is_placeholder(value) else value
         
         # Ensure backwards compatibility - copy fields both ways
         if result:
@@ -545,6 +607,49 @@ Return ONLY the JSON. No markdown formatting, no explanations."""
         
         return result if result else {}
 
+    def _extract(self, domain: str, company_name: str, index: EvidenceIndex, fields: List[str], model: str) -> Dict:
+        # Evidence is ranked per field (BM25) and interleaved, so every asked field gets its
+        # own best paragraphs instead of whatever came first in one big blob
+        budget = evidence_budget(self._build_prompt(domain, company_name, "", fields), JSON_SYSTEM_PROMPT, JSON_SUFFIX)
+        prompt = self._build_prompt(domain, company_name, index.pack_for_fields(fields, budget), fields)
+        # Decoding is constrained to exactly these keys and types (strings, string arrays)
+        return self.llm.generate_json(prompt, schema=bulk_schema(fields), model=model)
+
+    def _build_prompt(self, domain: str, company_name: str, evidence: str, fields: List[str]) -> str:
+        specs = [(field, self.FIELD_SPECS[field]) for field in fields if field in self.FIELD_SPECS]
+        field_lines = "\n\n".join(
+            f'{i}. "{field}" ({priority}):\n' + "\n".join(f"   - {line}" for line in lines)
+            for i, (field, (priority, lines)) in enumerate(specs, 1)
+        )
+        # Same definition that constrains decoding, with each field's description as its value
+        output_format = schema_hint(bulk_schema(fields))
+        # Fixed instructions first, company and evidence last: every call shares the longest
+        # possible prefix, so Ollama can reuse its KV cache instead of re-reading the instructions
+        return f"""You are an expert business data extraction AI. Extract comprehensive company information from the provided data.
+
+=== EXTRACTION RULES ===
+1. Extract REAL data ONLY - never make up information
+2. If a field cannot be determined from the data, use empty string "" or empty array []
+3. Cross-reference multiple sources for accuracy
+4. For UK companies, look for SIC codes from Companies House data
+5. For tags, include: service types, technology keywords, industry terms
+6. Prefer official website content over third-party sources
+
+=== PRIMARY EXTRACTION TASK (EXCEL OUTPUT FIELDS) ===
+These are the MOST IMPORTANT fields - extract with highest priority:
+
+{field_lines}
+
+=== REQUIRED OUTPUT FORMAT (JSON) ===
+Return ONLY valid JSON with these fields (no markdown formatting, no explanations):
+
+{output_format}
+
+TARGET COMPANY: {domain} ({company_name})
+
+=== EVIDENCE (SEARCH ENGINE RESULTS + WEBSITE CONTENT) ===
+{evidence}"""
+
 
 class ValidationEngine:
     """
@@ -665,11 +770,13 @@ class OptimizedResearchAgent:
         "tech_stack"
     ]
     
-    def __init__(self, domain: str, log_callback=None):
+    def __init__(self, domain: str, log_callback=None, browser: ResearchBrowser = None):
         self.domain = domain
         self.log_callback = log_callback
         self.llm = LLMEngine()
-        self.browser = ResearchBrowser()
+        # A browser lent by the session pool outlives this agent, so only close our own
+        self.owns_browser = browser is None
+        self.browser = browser or ResearchBrowser()
         self.profile = CompanyProfile(name=domain.split('.')[0].title(), domain=domain)
         
         # Initialize components
@@ -710,11 +817,14 @@ class OptimizedResearchAgent:
         self._log("📄 STEP 3: Scraping unique URLs (deduplicating)...")
         scraped_content = self.parallel_browser.scrape_deduplicated_urls(all_urls, max_urls=10)
         
-        # ----- STEP 4: Bulk Extraction (Single LLM Call) -----
-        self._log("🧠 STEP 4: Bulk extraction - all fields in single LLM call...")
+        # ----- STEP 4: Bulk Extraction (patterns first, then a single LLM call) -----
+        pattern_data = self._extract_patterns(scraped_content)
+        llm_fields = [f for f in self.EXCEL_FIELDS if f not in pattern_data]
+        self._log(f"🧠 STEP 4: Bulk extraction - {len(llm_fields)} fields in single LLM call...")
         extracted_data = self.bulk_extractor.extract_all_fields(
-            self.domain, search_results, scraped_content, self.EXCEL_FIELDS
+            self.domain, search_results, scraped_content, llm_fields
         )
+        extracted_data.update(pattern_data)
         self._log(f"   Extracted {len(extracted_data)} data points")
         
         # ----- STEP 5: Validation & Targeted Retry Per Missing Field -----
@@ -742,13 +852,23 @@ class OptimizedResearchAgent:
         self._log_final_status(extracted_data)
         
         # ----- Cleanup -----
-        self._log("🏁 Pipeline complete! Closing browser...")
-        self.browser.close()
+        if self.owns_browser:
+            self._log("🏁 Pipeline complete! Closing browser...")
+            self.browser.close()
+        else:
+            self._log("🏁 Pipeline complete! Returning browser to pool.")
         
         self._build_graph()
         
         return self.profile
     
+    def _extract_patterns(self, scraped_content: str) -> Dict:
+        """Fields read deterministically from the scraped pages (VAT, company no., SIC, contacts, socials)."""
+        found = extract_fields(scraped_content, self.domain)
+        if found:
+            self._log(f"   🔎 Pattern extractors filled {len(found)} fields without the LLM: {list(found)}")
+        return found
+
     def _retry_missing_fields(self, data: Dict, missing_fields: List[str]) -> Dict:
         """
         Batch retry for ALL missing fields in parallel.
@@ -782,11 +902,14 @@ class OptimizedResearchAgent:
             self._log(f"      Scraping {len(all_urls)} new URLs...")
             scraped_content = self.parallel_browser.scrape_deduplicated_urls(all_urls, max_urls=8)
             
-            # 4. Extract (Targeted for missing fields)
-            self._log(f"      Extracting missing fields...")
+            # 4. Extract (Targeted for missing fields; pattern hits need no LLM call)
+            pattern_data = self._extract_patterns(scraped_content)
+            llm_fields = [f for f in current_missing if f not in pattern_data]
+            self._log(f"      Extracting {len(llm_fields)} missing fields...")
             new_data = self.bulk_extractor.extract_all_fields(
-                self.domain, search_results, scraped_content, current_missing
+                self.domain, search_results, scraped_content, llm_fields
             )
+            new_data.update(pattern_data)
             
             # 5. Merge & Re-validate
             for field, value in new_data.items():
@@ -0,0 +1,257 @@
+"""
+Raw Page Archive - Re-extract Without Re-crawling
+=================================================
+Every fetched page and SERP is appended, untouched, to WARC-style segment
+files: one record per page (URL, final URL, status, fetch time, raw HTML),
+each compressed as its own zstd frame (gzip member if `zstandard` is not
+installed) so any record can be read with a single seek. A SQLite index
+maps URL and domain to (segment, offset, length).
+
+Re-extraction runs straight from disk, no browser or network:
+
+    python page_archive.py reextract --domain acme.co.uk --refresh-cache
+    python page_archive.py stats
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from email.utils import formatdate
+from typing import Dict, Iterator, Optional
+from urllib.parse import urlparse
+
+import config
+
+try:
+    import zstandard
+except ImportError:  # Optional: fall back to gzip members
+    zstandard = None
+
+
+def _domain(url: str) -> str:
+    host = urlparse(url if "://" in url else f"https://{url}").netloc.lower().split(":")[0]
+    return host[4:] if host.startswith("www.") else host
+
+
+class ArchivedPage:
+    """One archive record."""
+
+    def __init__(self, url: str, final_url: str, status: int, fetched: float, kind: str,
+                 source: str, content_type: str, html: str):
+        self.url = url
+        self.final_url = final_url
+        self.status = status
+        self.fetched = fetched
+        self.kind = kind
+        self.source = source
+        self.content_type = content_type
+        self.html = html
+
+
+class PageArchive:
+    """Append-only segments + SQLite index. Safe to share across threads."""
+
+    def __init__(self, root: str = None):
+        self.root = root or config.ARCHIVE_DIR
+        os.makedirs(self.root, exist_ok=True)
+        self.codec = "zstd" if zstandard else "gzip"
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(self.root, "index.sqlite"), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS records (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                url TEXT NOT NULL, final_url TEXT, domain TEXT, kind TEXT, source TEXT,
+                status INTEGER, fetched REAL, segment TEXT, offset INTEGER, length INTEGER, codec TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_records_url ON records(url);
+            CREATE INDEX IF NOT EXISTS idx_records_domain ON records(domain, kind);
+        """)
+        self._conn.commit()
+        self._segment: Optional[str] = None
+        self._file = None
+        self._local = threading.local()  # A ZstdCompressor must not be shared between threads
+        self.written = 0
+
+    # --- writing ---
+    def _open_segment(self):
+        if self._file is not None and self._file.tell() < config.ARCHIVE_SEGMENT_MB * 1024 * 1024:
+            return
+        if self._file is not None:
+            self._file.close()
+        ext = "warc.zst" if self.codec == "zstd" else "warc.gz"
+        self._segment = f"atlas-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{uuid.uuid4().hex[:6]}.{ext}"
+        self._file = open(os.path.join(self.root, self._segment), "ab")
+
+    def _compress(self, data: bytes) -> bytes:
+        if zstandard:
+            compressor = getattr(self._local, "compressor", None)
+            if compressor is None:
+                compressor = self._local.compressor = zstandard.ZstdCompressor(level=config.ARCHIVE_ZSTD_LEVEL)
+            return compressor.compress(data)
+        return gzip.compress(data, compresslevel=6)
+
+    def add(self, url: str, html: str, final_url: str = "", status: int = 200, kind: str = "page",
+            source: str = "http", content_type: str = "text/html"):
+        """Appends one fetched page (kind="page") or search result page (kind="serp")."""
+        if not config.ARCHIVE_ENABLED or not html:
+            return
+        fetched = time.time()
+        body = html.encode("utf-8")
+        headers = [
+            "WARC/1.1",
+            "WARC-Type: response",
+            f"WARC-Record-ID: <urn:uuid:{uuid.uuid4()}>",
+            f"WARC-Date: {time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(fetched))}",
+            f"WARC-Target-URI: {url}",
+            f"Atlas-Final-URI: {final_url or url}",
+            f"Atlas-Status: {status}",
+            f"Atlas-Kind: {kind}",
+            f"Atlas-Source: {source}",
+            f"Atlas-Fetched: {formatdate(fetched, usegmt=True)}",
+            f"Content-Type: {content_type}",
+            f"Content-Length: {len(body)}",
+        ]
+        record = self._compress("\r\n".join(headers).encode("utf-8") + b"\r\n\r\n" + body + b"\r\n\r\n")
+        try:
+            with self._lock:
+                self._open_segment()
+                offset = self._file.tell()
+                self._file.write(record)
+                self._file.flush()
+                self._conn.execute(
+                    "INSERT INTO records (url, final_url, domain, kind, source, status, fetched, segment, offset, length, codec) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (url, final_url or url, _domain(final_url or url), kind, source, status, fetched,
+                     self._segment, offset, len(record), self.codec),
+                )
+                self._conn.commit()
+                self.written += 1
+        except Exception as e:
+            print(f"⚠️ Archive write failed for {url}: {e}")
+
+    # --- reading ---
+    def _read(self, row) -> ArchivedPage:
+        segment, offset, length, codec = row[7:11]
+        with open(os.path.join(self.root, segment), "rb") as f:
+            f.seek(offset)
+            data = f.read(length)
+        if codec == "zstd":
+            if zstandard is None:
+                raise RuntimeError("zstandard is required to read zstd archive segments")
+            data = zstandard.ZstdDecompressor().decompress(data)
+        else:
+            data = gzip.decompress(data)
+        head, _, body = data.partition(b"\r\n\r\n")
+        headers = dict(line.split(": ", 1) for line in head.decode("utf-8").split("\r\n")[1:] if ": " in line)
+        return ArchivedPage(
+            url=row[0], final_url=row[1], status=row[2], fetched=row[3], kind=row[4], source=row[5],
+            content_type=headers.get("Content-Type", ""), html=body[:-4].decode("utf-8", "replace"),
+        )
+
+    _COLUMNS = "url, final_url, status, fetched, kind, source, domain, segment, offset, length, codec"
+
+    def latest(self, url: str) -> Optional[ArchivedPage]:
+        """Most recent copy of one URL."""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {self._COLUMNS} FROM records WHERE url = ? ORDER BY fetched DESC LIMIT 1", (url,)
+            ).fetchone()
+        return self._read(row) if row else None
+
+    def iter_latest(self, domain: str = None, kind: str = "page") -> Iterator[ArchivedPage]:
+        """Newest copy of every archived URL, optionally for one domain, in segment order (sequential reads)."""
+        query = (f"SELECT {self._COLUMNS} FROM records WHERE id IN "
+                 f"(SELECT MAX(id) FROM records WHERE kind = ?{' AND domain = ?' if domain else ''} GROUP BY url) "
+                 f"ORDER BY segment, offset")
+        params = (kind, _domain(domain)) if domain else (kind,)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        for row in rows:
+            try:
+                yield self._read(row)
+            except Exception as e:
+                print(f"⚠️ Unreadable archive record for {row[0]}: {e}")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            records, urls, domains = self._conn.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT url), COUNT(DISTINCT domain) FROM records"
+            ).fetchone()
+            segments = [r[0] for r in self._conn.execute("SELECT DISTINCT segment FROM records")]
+        size = sum(os.path.getsize(os.path.join(self.root, s)) for s in segments if os.path.exists(os.path.join(self.root, s)))
+        return {"records": records, "urls": urls, "domains": domains, "segments": len(segments),
+                "size_mb": round(size / 1024 / 1024, 1), "codec": self.codec}
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+_archive = None
+_archive_lock = threading.Lock()
+
+
+def get_archive() -> PageArchive:
+    """Process-wide archive so every worker appends to the same segments."""
+    global _archive
+    with _archive_lock:
+        if _archive is None:
+            _archive = PageArchive()
+    return _archive
+
+
+def reextract(domain: str = None, out: str = None, refresh_cache: bool = False) -> int:
+    """Runs the current content extractor over archived pages. Returns the number of pages."""
+    from content_extractor import extract_page
+    from cache_store import get_page_cache
+
+    cache = get_page_cache() if refresh_cache else None
+    sink = open(out, "w") if out else None
+    count = 0
+    started = time.time()
+    try:
+        for page in get_archive().iter_latest(domain):
+            if page.status >= 400 or "html" not in page.content_type:
+                continue
+            content = extract_page(page.html)
+            if cache is not None and content:
+                cache.put("text", page.url, content)
+            if sink:
+                sink.write(json.dumps({"url": page.url, "final_url": page.final_url, "fetched": page.fetched,
+                                       "content": content}) + "\n")
+            count += 1
+    finally:
+        if sink:
+            sink.close()
+    print(f"♻️  Re-extracted {count} pages in {time.time() - started:.1f}s")
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Raw page archive tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rx = sub.add_parser("reextract", help="Run extract_page over archived HTML")
+    rx.add_argument("--domain")
+    rx.add_argument("--out", help="Write {url, content} JSON lines here")
+    rx.add_argument("--refresh-cache", action="store_true", help="Replace page-cache text with the new extraction")
+    sub.add_parser("stats", help="Show archive size and record counts")
+    args = parser.parse_args()
+
+    if args.command == "stats":
+        print(json.dumps(get_archive().stats(), indent=2))
+        return 0
+    reextract(args.domain, args.out, args.refresh_cache)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,313 @@
+"""
+Deterministic Field Extractors
+==============================
+Phones, emails, UK VAT numbers, Companies House numbers, SIC codes,
+postcoded addresses and social profile links follow fixed formats, so they
+are read straight from the scraped text instead of asking the LLM:
+- anchors first: the STRUCTURED lines content_extractor builds from
+  tel:/mailto: links, JSON-LD, <address> blocks, social links and legal
+  footer lines count more than a match in running text;
+- every candidate is validated (UK numbering plan, HMRC VAT mod-97,
+  Companies House prefixes, SIC range) before it counts;
+- first-party pages (host matches the company domain) outrank third-party
+  ones, and an identifier seen with two different values is left to the LLM;
+- a registration identifier (VAT, company no., SIC) from third-party pages
+  only counts once two independent sites agree on it. A lone directory hit
+  may describe a namesake company, so it stays evidence for the LLM.
+
+Only values at or above PATTERN_MIN_CONFIDENCE are returned; those fields
+skip the LLM prompt and the retry loop entirely.
+"""
+
+import re
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import config
+
+SOURCE_LINE = re.compile(r"^-{3}\s(?:SOURCE|SNIPPET):\s*(\S+)\s-{3}$")
+# Line labels written by content_extractor.extract_page for anchor-derived facts
+STRUCTURED_LABELS = {"PHONE", "EMAIL", "ADDRESS", "SOCIAL", "LEGAL", "META DESCRIPTION"}
+# Identifiers that need a first-party source or CORROBORATING_SOURCES independent third-party hosts
+CORROBORATED_FIELDS = {"vat_number", "company_registration_number", "sic_code"}
+CORROBORATING_SOURCES = 2
+
+PHONE = re.compile(r"(?<![\w+])(?:\+|00)?\(?\d[\d\s\-().]{7,18}\d(?!\w)")
+PHONE_CONTEXT = re.compile(r"(tel|phone|call(?: us)?(?: on)?|switchboard|contact|mobile|mob|\bt)[\s.:]*$",
+                           re.IGNORECASE)
+FAX_CONTEXT = re.compile(r"(fax|\bf)[\s.:]*$", re.IGNORECASE)
+
+EMAIL = re.compile(r"(?<![\w.+-])[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,24}(?![\w-])")
+EMAIL_JUNK = re.compile(r"\.(png|jpe?g|gif|svg|webp)$|^(example|domain|email|yourcompany|sentry)\.|"
+                        r"@(example|domain|email|sentry|wixpress|sentry-next)\.", re.IGNORECASE)
+
+VAT = re.compile(r"\b(?:GB\s?)?(\d{3})\s?(\d{4})\s?(\d{2})(?:\s?(\d{3}))?\b")
+VAT_CONTEXT = re.compile(r"\bVAT\b|vatID|taxID", re.IGNORECASE)
+
+COMPANY_NUMBER = re.compile(
+    r"(?:company|registration|registered|reg\.?)\s*(?:in\s+(?:england|scotland|wales|northern ireland)[\w\s&,]{0,20}?)?"
+    r"(?:no\.?|number|num\.?)?\s*[:.#]?\s*(?:no\.?|number)?\s*[:.#]?\s*\b([A-Z]{2}\d{6}|\d{7,8})\b",
+    re.IGNORECASE,
+)
+CH_PREFIXES = {"SC", "NI", "OC", "SO", "NC", "LP", "SL", "NL", "FC", "SF", "NF", "GE", "IP", "SP", "RS",
+               "SE", "IC", "CE", "CS", "RC", "SR", "ZC", "NO", "NP", "SA", "SZ", "R0"}
+
+SIC = re.compile(r"\bSIC\b[^0-9\n]{0,40}?\b(\d{5})\b(?:\s*[-–:]\s*([A-Z][^\n.;|]{3,120}))?", re.IGNORECASE)
+
+POSTCODE = re.compile(r"\b([A-Z]{1,2}\d[A-Z\d]?)\s*(\d[ABD-HJLNP-UW-Z]{2})\b")
+
+SOCIAL_FIELDS = {
+    "linkedin.com": "social_linkedin",
+    "twitter.com": "social_twitter",
+    "x.com": "social_twitter",
+    "facebook.com": "social_facebook",
+    "instagram.com": "social_instagram",
+    "youtube.com": "social_youtube",
+}
+SOCIAL_JUNK = re.compile(r"/share|sharer|/intent/|/hashtag/|/status/|/posts?/|/watch|/p/|/pulse/|/embed|"
+                         r"/dialog/|/plugins/|/tr\?|/home\?", re.IGNORECASE)
+
+# Identifiers that belong to exactly one company; conflicting values mean "not sure"
+UNIQUE_FIELDS = {"vat_number", "company_registration_number"}
+
+
+class Hit:
+    """One validated candidate value for a profile field."""
+
+    def __init__(self, field: str, value: str, confidence: float, key: str = None, extra: Dict = None):
+        self.field = field
+        self.value = value
+        self.confidence = confidence
+        self.key = key or value  # Normalised form used to group repeats of the same value
+        self.extra = extra or {}
+        self.source = ""  # Host of the page the hit came from, set by scan()
+        self.first_party = False
+
+
+def _host(url: str) -> str:
+    host = urlparse(url if "://" in url else f"https://{url}").netloc.lower().split(":")[0]
+    return host[4:] if host.startswith("www.") else host
+
+
+def _same_site(host: str, domain: str) -> bool:
+    site = _host(domain) if domain and "." in domain else ""
+    return bool(site and host) and (host == site or host.endswith("." + site))
+
+
+# --- validators ---
+def uk_phone(raw: str) -> Optional[Tuple[str, str]]:
+    """(display form, national digits) for a valid UK number, else None."""
+    digits = re.sub(r"\D", "", raw)
+    international = raw.lstrip("(").startswith(("+", "00"))
+    if digits.startswith("0044"):
+        digits, international = digits[2:], True
+    if international:
+        if not digits.startswith("44"):
+            return None
+        digits = digits[2:]
+        national = digits if digits.startswith("0") else "0" + digits  # "+44 (0)20..."
+    else:
+        national = digits
+    if not national.startswith("0") or len(national) not in (10, 11) or national[1] not in "1235789":
+        return None
+    # Ten digits only for some 01 area codes and the 0800 freephone range (0800 123 456)
+    if len(national) == 10 and not national.startswith(("01", "0800")):
+        return None
+    return " ".join(raw.split()), national
+
+
+def vat_checksum(digits: str) -> bool:
+    """HMRC mod-97 check (old and 9755 schemes) on the 9-digit VAT core."""
+    if len(digits) != 9 or digits == "000000000":
+        return False
+    total = sum(int(d) * w for d, w in zip(digits[:7], range(8, 1, -1))) + int(digits[7:])
+    return total % 97 == 0 or (total + 55) % 97 == 0
+
+
+def company_number(raw: str) -> Optional[str]:
+    """Companies House number padded to its 8-character form."""
+    raw = raw.upper()
+    if raw[:2].isalpha():
+        return raw if raw[:2] in CH_PREFIXES else None
+    if int(raw) == 0:
+        return None
+    return raw.zfill(8)
+
+
+def uk_postcode(text: str) -> Optional[str]:
+    match = POSTCODE.search(text.upper())
+    return f"{match.group(1)} {match.group(2)}" if match else None
+
+
+def social_link(url: str) -> Optional[Tuple[str, str, float]]:
+    """(field, canonical URL, confidence) for a company profile link."""
+    url = url.strip().split("?")[0].split("#")[0].rstrip("/")
+    host = _host(url)
+    field = next((f for h, f in SOCIAL_FIELDS.items() if host == h or host.endswith("." + h)), None)
+    if not field or SOCIAL_JUNK.search(url) or urlparse(url).path.strip("/") == "":
+        return None
+    confidence = 1.0
+    if field == "social_linkedin" and "/company/" not in url and "/school/" not in url and "/showcase/" not in url:
+        confidence = 0.5  # Personal profile, not the company page
+    return field, "https://" + url.split("://", 1)[-1], confidence
+
+
+# --- scanning ---
+def _scan_line(line: str, first_party: bool, domain: str) -> List[Hit]:
+    hits: List[Hit] = []
+    label = line.split(":", 1)[0] if ":" in line[:30] else ""
+    structured = label if label in STRUCTURED_LABELS or label.startswith("JSON-LD ") else ""
+    # Third-party pages describe many companies; their anchors count for less
+    source_weight = 1.0 if first_party else 0.85
+
+    # Phones: tel: anchors and JSON-LD telephone/faxNumber, or numbers labelled in text
+    if not structured or structured in ("PHONE", "LEGAL", "JSON-LD telephone", "JSON-LD faxNumber", "ADDRESS"):
+        for match in PHONE.finditer(line):
+            parsed = uk_phone(match.group(0))
+            if not parsed:
+                continue
+            display, national = parsed
+            before = line[max(0, match.start() - 25):match.start()]
+            if structured == "JSON-LD faxNumber" or FAX_CONTEXT.search(before):
+                field = "fax"
+            elif national.startswith("07") and not national.startswith(("070", "076")):
+                field = "mobile"
+            else:
+                field = "contact_phone"
+            if structured in ("PHONE", "JSON-LD telephone", "JSON-LD faxNumber"):
+                confidence = 1.0
+            elif PHONE_CONTEXT.search(before) or FAX_CONTEXT.search(before):
+                confidence = 0.9
+            else:
+                confidence = 0.4
+            # Phone numbers on directory pages are usually someone else's
+            hits.append(Hit(field, display, confidence * (1.0 if first_party else 0.6), key=national))
+
+    # Emails: mailto: anchors, JSON-LD, or addresses on the company's own domain
+    for match in EMAIL.finditer(line):
+        email = match.group(0).strip(".").lower()
+        if EMAIL_JUNK.search(email):
+            continue
+        own = _same_site(email.split("@", 1)[1], domain)
+        if structured in ("EMAIL", "JSON-LD email"):
+            confidence = 1.0 if (first_party or own) else 0.6
+        else:
+            confidence = 0.9 if own else (0.5 if first_party else 0.2)
+        hits.append(Hit("contact_email", email, confidence))
+
+    # VAT: checksum-valid numbers, labelled as VAT (or JSON-LD vatID/taxID)
+    for match in VAT.finditer(line):
+        core = "".join(match.group(i) for i in (1, 2, 3))
+        if not vat_checksum(core):
+            continue
+        before = line[max(0, match.start() - 40):match.start()]
+        has_prefix = match.group(0).upper().startswith("GB")
+        if VAT_CONTEXT.search(before) or structured in ("JSON-LD vatID", "JSON-LD taxID"):
+            confidence = 1.0
+        elif has_prefix:
+            confidence = 0.6
+        else:
+            continue
+        value = "GB" + core + (match.group(4) or "")
+        hits.append(Hit("vat_number", value, confidence * source_weight))
+
+    # Companies House number: only next to "company / registration number" wording
+    for match in COMPANY_NUMBER.finditer(line):
+        if re.search(r"\bVAT\b", line[max(0, match.start() - 15):match.start(1)], re.IGNORECASE):
+            continue
+        number = company_number(match.group(1))
+        if number:
+            hits.append(Hit("company_registration_number", number, source_weight))
+
+    # SIC: a five-digit code in the valid range next to "SIC", with its description if given
+    for match in SIC.finditer(line):
+        code = match.group(1)
+        if not 1110 <= int(code) <= 99999:
+            continue
+        text = " ".join((match.group(2) or "").split()).rstrip(" ,-")
+        hits.append(Hit("sic_code", code, source_weight, extra={"sic_text": text} if text else None))
+
+    # Address: an <address> block or JSON-LD address carrying a valid UK postcode
+    if first_party and structured in ("ADDRESS", "JSON-LD address"):
+        address = line.split(":", 1)[1].strip()
+        postcode = uk_postcode(address)
+        if postcode and len(address) < 300:
+            hits.append(Hit("full_address", address, 1.0, key=postcode))
+
+    # Social profiles: links from the company's own pages only
+    if first_party and structured in ("SOCIAL", "JSON-LD sameAs"):
+        for url in re.split(r",\s*|\s+", line.split(":", 1)[1]):
+            parsed = social_link(url) if url.startswith("http") else None
+            if parsed:
+                field, url, confidence = parsed
+                hits.append(Hit(field, url, confidence, key=url.lower()))
+    return hits
+
+
+def scan(text: str, domain: str = "", first_party: bool = None) -> List[Hit]:
+    """
+    All validated hits in `text`. Pages are told apart by their
+    "--- SOURCE: url ---" headers; first_party overrides the host check.
+    """
+    hits: List[Hit] = []
+    is_first = bool(first_party)
+    source = ""
+    for line in (text or "").splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        header = SOURCE_LINE.match(line)
+        if header:
+            source = _host(header.group(1))
+            is_first = first_party if first_party is not None else _same_site(source, domain)
+            continue
+        for hit in _scan_line(line, is_first, domain):
+            hit.source, hit.first_party = source, is_first
+            hits.append(hit)
+    return hits
+
+
+def _corroborated(group: List[Hit]) -> bool:
+    """A first-party hit, or the same value on enough independent third-party sites."""
+    if any(h.first_party for h in group):
+        return True
+    return len({h.source for h in group}) >= CORROBORATING_SOURCES
+
+
+def resolve(hits: List[Hit], min_confidence: float = None) -> Dict[str, str]:
+    """
+    Confident value per profile field. Repeats of a value add up (capped at 1.0);
+    a unique identifier seen with two confident values is dropped, and a
+    registration identifier needs a first-party or corroborated source.
+    """
+    threshold = config.PATTERN_MIN_CONFIDENCE if min_confidence is None else min_confidence
+    grouped: Dict[str, Dict[str, List[Hit]]] = defaultdict(lambda: defaultdict(list))
+    for hit in hits:
+        grouped[hit.field][hit.key].append(hit)
+
+    found: Dict[str, str] = {}
+    for field, values in grouped.items():
+        scored = []
+        for order, (key, group) in enumerate(values.items()):
+            if field in CORROBORATED_FIELDS and not _corroborated(group):
+                continue
+            best = max(h.confidence for h in group)
+            score = min(1.0, best + 0.1 * (len(group) - 1))
+            scored.append((score, len(group), -order, group))
+        confident = [s for s in scored if s[0] >= threshold]
+        if not confident or (field in UNIQUE_FIELDS and len(confident) > 1):
+            continue
+        _, _, _, group = max(confident, key=lambda s: s[:3])
+        best_hit = max(group, key=lambda h: h.confidence)
+        found[field] = best_hit.value
+        if field == "sic_code":
+            text = next((h.extra["sic_text"] for h in group if h.extra.get("sic_text")), "")
+            if text:
+                found["sic_text"] = text
+    return found
+
+
+def extract_fields(text: str, domain: str = "", first_party: bool = None) -> Dict[str, str]:
+    """Profile fields (contact_phone, vat_number, social_linkedin, ...) read from `text` without the LLM."""
+    return resolve(scan(text, domain, first_party))
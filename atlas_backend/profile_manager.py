@@ -0,0 +1,151 @@
+"""
+Browser Profile Manager
+=======================
+Builds a trimmed copy of the user's Brave profile once (the "template"),
+then hands every browser its own cheap clone in a unique directory.
+Large immutable files are hardlinked; anything Chrome writes in place
+(SQLite DBs, LevelDB logs, Preferences) is copied so clones never write
+back into the template. Clones are removed on close and at exit, and
+clones left behind by dead processes are swept on startup.
+"""
+
+import atexit
+import glob
+import os
+import shutil
+import tempfile
+import threading
+import time
+from typing import Set
+
+import config
+
+# Caches and per-session state that Chrome rebuilds on its own
+TEMPLATE_IGNORE = shutil.ignore_patterns(
+    "Cache*", "Code Cache*", "GPUCache", "GrShaderCache", "ShaderCache", "GraphiteDawnCache",
+    "DawnCache", "Media Cache", "Service Worker", "Crashpad", "Crash Reports", "BrowserMetrics*",
+    "Singleton*", "lock", "LOCK", "History*", "Favicons*", "Top Sites*", "Visited Links",
+    "Sessions", "Session Storage", "Safe Browsing*", "component_crx_cache", "optimization_guide*",
+    "OnDeviceHeadSuggestModel", "VideoDecodeStats", "blob_storage", "File System",
+)
+
+# Files Chrome only ever creates or replaces, never rewrites in place
+LINKABLE_SUFFIXES = (".ldb", ".pak", ".bdic", ".crx", ".png", ".jpg", ".svg", ".js", ".css", ".wasm")
+
+TEMPLATE_MARKER = ".atlas_template_ready"
+CLONE_PREFIX = "Atlas_Profile_"
+
+
+def _link_or_copy(src, dst):
+    """Hardlinks immutable files (extensions, LevelDB tables) and copies the rest."""
+    if src.endswith(LINKABLE_SUFFIXES) or f"{os.sep}Extensions{os.sep}" in src:
+        try:
+            os.link(src, dst)
+            return dst
+        except OSError:
+            pass  # Cross-device or FS without hardlinks
+    return shutil.copy2(src, dst)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class ProfileManager:
+    """Owns the template profile and every per-browser clone made from it."""
+
+    def __init__(self, source_dir: str = None, root_dir: str = None):
+        self.source_dir = source_dir or config.USER_DATA_DIR
+        self.root_dir = root_dir or config.PROFILE_ROOT
+        self.template_dir = os.path.join(self.root_dir, "Atlas_Browser_Template")
+        self._lock = threading.Lock()
+        self._active: Set[str] = set()
+        os.makedirs(self.root_dir, exist_ok=True)
+        self.cleanup_stale()
+        atexit.register(self.release_all)
+
+    def _ensure_template(self):
+        """Builds the trimmed template once; later calls reuse it until it goes stale."""
+        marker = os.path.join(self.template_dir, TEMPLATE_MARKER)
+        if os.path.exists(marker) and time.time() - os.path.getmtime(marker) < config.PROFILE_TEMPLATE_MAX_AGE:
+            return
+
+        print("🧰 Building trimmed browser profile template...")
+        # Build beside the final path and rename, so a half-copied template is never used
+        staging = tempfile.mkdtemp(prefix="Atlas_Template_build_", dir=self.root_dir)
+        try:
+            if os.path.isdir(self.source_dir):
+                shutil.copytree(self.source_dir, staging, ignore=TEMPLATE_IGNORE,
+                                dirs_exist_ok=True, ignore_dangling_symlinks=True)
+        except Exception as e:
+            # Partial copies are fine: Chrome fills in whatever is missing
+            print(f"⚠️ Profile template copy incomplete: {e}")
+        open(os.path.join(staging, TEMPLATE_MARKER), "w").close()
+
+        shutil.rmtree(self.template_dir, ignore_errors=True)
+        try:
+            os.rename(staging, self.template_dir)
+        except OSError:
+            # Another process won the race - use theirs
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def rebuild_template(self):
+        """Forces a fresh template, e.g. after logging in again in the real profile."""
+        with self._lock:
+            shutil.rmtree(self.template_dir, ignore_errors=True)
+            self._ensure_template()
+
+    def acquire(self) -> str:
+        """Returns a new private profile directory cloned from the template."""
+        with self._lock:
+            # Cloning under the lock keeps a stale-template rebuild from pulling files away mid-copy
+            self._ensure_template()
+            clone = tempfile.mkdtemp(prefix=f"{CLONE_PREFIX}{os.getpid()}_", dir=self.root_dir)
+            self._active.add(clone)
+            try:
+                shutil.copytree(self.template_dir, clone, copy_function=_link_or_copy,
+                                ignore=shutil.ignore_patterns(TEMPLATE_MARKER), dirs_exist_ok=True)
+            except Exception as e:
+                print(f"⚠️ Profile clone incomplete: {e}")
+        return clone
+
+    def release(self, clone: str):
+        with self._lock:
+            self._active.discard(clone)
+        shutil.rmtree(clone, ignore_errors=True)
+
+    def release_all(self):
+        with self._lock:
+            clones = list(self._active)
+            self._active.clear()
+        for clone in clones:
+            shutil.rmtree(clone, ignore_errors=True)
+
+    def cleanup_stale(self):
+        """Removes clones whose owning process is gone (crashes, kill -9)."""
+        for path in glob.glob(os.path.join(self.root_dir, f"{CLONE_PREFIX}*")):
+            try:
+                pid = int(os.path.basename(path)[len(CLONE_PREFIX):].split("_")[0])
+            except ValueError:
+                continue
+            if pid != os.getpid() and not _pid_alive(pid):
+                shutil.rmtree(path, ignore_errors=True)
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_profile_manager() -> ProfileManager:
+    """Process-wide manager so the template is built once per process."""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = ProfileManager()
+    return _manager
@@ -0,0 +1,195 @@
+"""
+Politeness Scheduler - Shared Rate Limits for Every Navigation
+==============================================================
+One scheduler per process, used by every browser worker and the HTTP tier:
+- token bucket per host (search engines get their own, stricter buckets)
+- concurrency caps per search engine across the whole fleet
+- adaptive backoff: a captcha slows the host down and pauses it for a
+  cooldown; clean pages slowly restore the normal rate
+"""
+
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict
+from urllib.parse import urlparse
+
+import config
+
+
+def host_key(url: str) -> str:
+    """Groups URLs into rate-limit buckets: 'google', 'ddg' or the bare host name."""
+    host = urlparse(url if "://" in url else f"https://{url}").netloc.lower().split(":")[0]
+    if host.startswith("www."):
+        host = host[4:]
+    if host.startswith("google.") or ".google." in host:
+        return "google"
+    if host.endswith("duckduckgo.com"):
+        return "ddg"
+    return host
+
+
+class TokenBucket:
+    """Classic token bucket; reservations may go negative so callers queue fairly."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float, slowdown: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate / slowdown)
+        self.updated = now
+
+    def reserve(self, now: float, slowdown: float = 1.0) -> float:
+        """Takes one token and returns how long the caller must wait for it."""
+        self._refill(now, slowdown)
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens * slowdown / self.rate
+
+    def try_take(self, now: float, slowdown: float = 1.0) -> bool:
+        self._refill(now, slowdown)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class PolitenessScheduler:
+    """Process-wide gate that every page load and search goes through."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._slowdown: Dict[str, float] = {}
+        self._cooldown_until: Dict[str, float] = {}
+        self._slots = {engine: threading.BoundedSemaphore(n) for engine, n in config.ENGINE_CONCURRENCY.items()}
+        self.captchas: Dict[str, int] = {}
+        self.checks: Dict[str, int] = {}
+        self.requests: Dict[str, int] = {}
+
+    def _bucket(self, key: str) -> TokenBucket:
+        if key not in self._buckets:
+            rate, burst = config.HOST_RATE_LIMITS.get(key, config.DEFAULT_HOST_RATE)
+            self._buckets[key] = TokenBucket(rate, burst)
+        return self._buckets[key]
+
+    # --- rate limiting ---
+    def reserve(self, url: str) -> float:
+        """Books the next request to this host and returns the delay before it may start."""
+        key = host_key(url)
+        with self._lock:
+            now = time.monotonic()
+            delay = self._bucket(key).reserve(now, self._slowdown.get(key, 1.0))
+            delay = max(delay, self._cooldown_until.get(key, 0) - now)
+            self.requests[key] = self.requests.get(key, 0) + 1
+        return max(0.0, delay)
+
+    def wait(self, url: str):
+        delay = self.reserve(url)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def wait_async(self, url: str):
+        delay = self.reserve(url)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def try_acquire(self, url: str, hold_slot: bool = False) -> bool:
+        """
+        Non-blocking: takes a token (and an engine slot if hold_slot) only if both
+        are free right now. Callers holding a slot must call release(url).
+        """
+        key = host_key(url)
+        slot = self._slots.get(key) if hold_slot else None
+        if slot is not None and not slot.acquire(blocking=False):
+            return False
+        with self._lock:
+            now = time.monotonic()
+            ok = now >= self._cooldown_until.get(key, 0) and \
+                self._bucket(key).try_take(now, self._slowdown.get(key, 1.0))
+            if ok:
+                self.requests[key] = self.requests.get(key, 0) + 1
+        if not ok and slot is not None:
+            slot.release()
+        return ok
+
+    def release(self, url: str):
+        slot = self._slots.get(host_key(url))
+        if slot is not None:
+            try: slot.release()
+            except ValueError: pass
+
+    @contextmanager
+    def slot(self, url: str):
+        """Blocking gate for a page load: engine concurrency cap + host rate limit."""
+        sem = self._slots.get(host_key(url))
+        if sem is not None:
+            sem.acquire()
+        try:
+            self.wait(url)
+            yield
+        finally:
+            if sem is not None:
+                sem.release()
+
+    # --- adaptive backoff ---
+    def report_captcha(self, url: str):
+        """A challenge page means we are too fast for this host: slow down and pause."""
+        key = host_key(url)
+        with self._lock:
+            slowdown = min(config.CAPTCHA_BACKOFF_MAX, self._slowdown.get(key, 1.0) * 2)
+            self._slowdown[key] = slowdown
+            self._cooldown_until[key] = time.monotonic() + config.CAPTCHA_COOLDOWN * slowdown / 2
+            self.captchas[key] = self.captchas.get(key, 0) + 1
+            self.checks[key] = self.checks.get(key, 0) + 1
+            captchas, checks = self.captchas[key], self.checks[key]
+        print(f"🐢 Captcha on {key} ({captchas}/{checks} pages, {captchas / checks:.0%}): "
+              f"slowing to 1/{slowdown:.0f} rate, pausing {config.CAPTCHA_COOLDOWN * slowdown / 2:.0f}s")
+
+    def report_ok(self, url: str):
+        """Clean page: recover a little of the normal rate."""
+        key = host_key(url)
+        with self._lock:
+            self.checks[key] = self.checks.get(key, 0) + 1
+            if key in self._slowdown:
+                self._slowdown[key] = max(1.0, self._slowdown[key] * 0.9)
+                if self._slowdown[key] == 1.0:
+                    del self._slowdown[key]
+
+    def captcha_rate(self, url: str) -> float:
+        """Share of checked pages on this host/engine that came back as a challenge."""
+        key = host_key(url)
+        with self._lock:
+            checks = self.checks.get(key, 0)
+            return self.captchas.get(key, 0) / checks if checks else 0.0
+
+    def stats(self) -> Dict[str, Dict]:
+        with self._lock:
+            keys = set(self.requests) | set(self.checks)
+            return {
+                key: {
+                    "requests": self.requests.get(key, 0),
+                    "captchas": self.captchas.get(key, 0),
+                    "captcha_rate": round(self.captchas.get(key, 0) / self.checks[key], 3) if self.checks.get(key) else 0.0,
+                    "slowdown": round(self._slowdown.get(key, 1.0), 2),
+                }
+                for key in keys
+            }
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> PolitenessScheduler:
+    """Process-wide scheduler so limits hold across every worker."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = PolitenessScheduler()
+    return _scheduler
@@ -0,0 +1,304 @@
+"""
+Record / Replay Harness - Offline, Reproducible Runs
+====================================================
+ATLAS_REPLAY_MODE=record runs the pipeline live and stores every SERP,
+page and LLM response in a fixture store (SQLite under FIXTURE_DIR).
+ATLAS_REPLAY_MODE=replay serves the same data with no network access:
+- the browser and the HTTP tier are pointed at a local HTTP server that
+  answers from the fixtures (search homepages get a stub search form);
+- LLMEngine answers from recorded responses after a configurable delay.
+Recorded pages are served with a CSP that blocks every external request,
+so a replay never leaves the machine.
+"""
+
+import asyncio
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, quote, urldefrag, urlparse
+
+import config
+from cache_store import normalize_query
+from rate_limiter import host_key
+
+# Rendered DOM snapshots are replayed without running their scripts or loading anything remote
+REPLAY_CSP = "default-src 'none'; style-src 'unsafe-inline'; img-src data:; form-action 'self'"
+
+SEARCH_FORM = """<!doctype html><html><head><title>{engine}</title></head><body>
+<form action="/serp/{engine}" method="get"><input name="q" type="text" autofocus></form>
+</body></html>"""
+
+NOT_RECORDED = "<!doctype html><html><body><p>Not recorded: {what}</p></body></html>"
+# Where the evidence starts in an extraction prompt (MicroAgent "DATA:", BulkExtractor "=== EVIDENCE")
+EVIDENCE_START = re.compile(r"^\s*(?:DATA:|=== EVIDENCE\b)", re.MULTILINE)
+
+
+def recording() -> bool:
+    return config.REPLAY_MODE == "record"
+
+
+def replaying() -> bool:
+    return config.REPLAY_MODE == "replay"
+
+
+def page_key(url: str) -> str:
+    """Fixture key for a URL: fragment dropped, scheme/host lower-cased, no trailing slash."""
+    url = urldefrag(url)[0]
+    parsed = urlparse(url if "://" in url else f"https://{url}")
+    key = f"{parsed.scheme.lower()}://{parsed.netloc.lower()}{parsed.path.rstrip('/')}"
+    return f"{key}?{parsed.query}" if parsed.query else key
+
+
+def _prompt_signature(model: str, system_prompt: str, prompt: str) -> str:
+    """
+    Identifies 'the same call' when evidence order differs between runs: the whole
+    prompt up to its evidence section. Instructions come first in every prompt, so
+    this is what tells calls apart: the Target/Field lines and schema (MicroAgent),
+    or the requested fields and TARGET COMPANY line (BulkExtractor).
+    """
+    match = EVIDENCE_START.search(prompt)
+    head = " ".join((prompt[:match.start()] if match else prompt).split())
+    return hashlib.sha256(f"{model}\0{system_prompt}\0{head}".encode("utf-8")).hexdigest()
+
+
+class FixtureStore:
+    """Recorded pages, SERPs and LLM responses. Unlike the caches, nothing here expires."""
+
+    def __init__(self, path: str = None):
+        path = path or os.path.join(config.FIXTURE_DIR, "fixtures.sqlite")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS pages (
+                key TEXT PRIMARY KEY, url TEXT, final_url TEXT, status INTEGER,
+                content_type TEXT, body BLOB, recorded REAL
+            );
+            CREATE TABLE IF NOT EXISTS serps (
+                key TEXT PRIMARY KEY, engine TEXT, query TEXT, body BLOB, recorded REAL
+            );
+            CREATE TABLE IF NOT EXISTS llm (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT, signature TEXT,
+                response TEXT, latency REAL, recorded REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_llm_key ON llm(key);
+            CREATE INDEX IF NOT EXISTS idx_llm_signature ON llm(signature);
+        """)
+        self._conn.commit()
+        self._signature_cursor: Dict[str, int] = {}
+        self.served = {"page": 0, "serp": 0, "llm": 0}
+        self.missing = {"page": 0, "serp": 0, "llm": 0}
+
+    # --- pages ---
+    def put_page(self, via: str, url: str, final_url: str, status: int, content_type: str, body: str):
+        """via: "http" (raw response of the fetch tier) or "browser" (rendered DOM)."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (f"{via} {page_key(url)}", url, final_url or url, status, content_type,
+                 zlib.compress(body.encode("utf-8")), time.time()),
+            )
+            self._conn.commit()
+
+    def get_page(self, via: str, url: str) -> Optional[Tuple[str, int, str, str]]:
+        """Returns (final_url, status, content_type, body), preferring the copy recorded the same way."""
+        other = "browser" if via == "http" else "http"
+        with self._lock:
+            row = None
+            for key in (f"{via} {page_key(url)}", f"{other} {page_key(url)}"):
+                row = self._conn.execute(
+                    "SELECT final_url, status, content_type, body FROM pages WHERE key = ?", (key,)
+                ).fetchone()
+                if row:
+                    break
+            self._count("page", row)
+        if row is None:
+            return None
+        return row[0], row[1], row[2], zlib.decompress(row[3]).decode("utf-8")
+
+    # --- SERPs ---
+    def put_serp(self, engine: str, query: str, body: str):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO serps VALUES (?, ?, ?, ?, ?)",
+                (f"{engine}:{normalize_query(query)}", engine, query,
+                 zlib.compress(body.encode("utf-8")), time.time()),
+            )
+            self._conn.commit()
+
+    def get_serp(self, engine: str, query: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body FROM serps WHERE key = ?", (f"{engine}:{normalize_query(query)}",)
+            ).fetchone()
+            self._count("serp", row)
+        return zlib.decompress(row[0]).decode("utf-8") if row else None
+
+    # --- LLM ---
+    def put_llm(self, model: str, system_prompt: str, prompt: str, response: str, latency: float):
+        key = hashlib.sha256(f"{model}\0{system_prompt}\0{prompt}".encode("utf-8")).hexdigest()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO llm (key, signature, response, latency, recorded) VALUES (?, ?, ?, ?, ?)",
+                (key, _prompt_signature(model, system_prompt, prompt), response, latency, time.time()),
+            )
+            self._conn.commit()
+
+    def get_llm(self, model: str, system_prompt: str, prompt: str) -> Optional[Tuple[str, float]]:
+        """
+        Exact prompt match first. Otherwise the n-th recorded call with the same
+        prompt before its evidence (same target, fields and schema), so runs whose
+        evidence arrived in another order still replay.
+        """
+        key = hashlib.sha256(f"{model}\0{system_prompt}\0{prompt}".encode("utf-8")).hexdigest()
+        signature = _prompt_signature(model, system_prompt, prompt)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, latency FROM llm WHERE key = ? ORDER BY id DESC LIMIT 1", (key,)
+            ).fetchone()
+            if row is None:
+                rows = self._conn.execute(
+                    "SELECT response, latency FROM llm WHERE signature = ? ORDER BY id", (signature,)
+                ).fetchall()
+                if rows:
+                    n = self._signature_cursor.get(signature, 0)
+                    self._signature_cursor[signature] = n + 1
+                    row = rows[min(n, len(rows) - 1)]
+            self._count("llm", row)
+        return (row[0], row[1]) if row else None
+
+    def _count(self, kind: str, row):
+        if row is None:
+            self.missing[kind] += 1
+        else:
+            self.served[kind] += 1
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {"served": dict(self.served), "missing": dict(self.missing)}
+
+
+class _ReplayHandler(BaseHTTPRequestHandler):
+    """/page?via=...&url=... recorded pages, /home/<engine> stub search forms, /serp/<engine>?q=... recorded SERPs."""
+
+    def log_message(self, format, *args):
+        pass  # One line per request would drown the agent logs
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        params = parse_qs(parsed.query)
+        store = get_store()
+        parts = parsed.path.strip("/").split("/")
+
+        if parts[0] == "home" and len(parts) == 2:
+            return self._send(200, "text/html; charset=utf-8", SEARCH_FORM.format(engine=parts[1]))
+
+        if parts[0] == "serp" and len(parts) == 2:
+            query = params.get("q", [""])[0]
+            body = store.get_serp(parts[1], query)
+            if body is None:
+                print(f"⚠️ Replay: no SERP recorded for {parts[1]}:{query!r}")
+                return self._send(200, "text/html; charset=utf-8", NOT_RECORDED.format(what="no results found"))
+            return self._send(200, "text/html; charset=utf-8", body)
+
+        if parts[0] == "page":
+            url = params.get("url", [""])[0]
+            page = store.get_page(params.get("via", ["http"])[0], url)
+            if page is None:
+                print(f"⚠️ Replay: no page recorded for {url}")
+                return self._send(404, "text/html; charset=utf-8", NOT_RECORDED.format(what=url), final_url=url)
+            final_url, status, content_type, body = page
+            return self._send(status, content_type or "text/html; charset=utf-8", body, final_url=final_url)
+
+        self._send(404, "text/plain", "unknown replay route")
+
+    def _send(self, status: int, content_type: str, body: str, final_url: str = ""):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Content-Security-Policy", REPLAY_CSP)
+        if final_url:
+            self.send_header("X-Atlas-Final-Url", final_url)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+_store = None
+_server = None
+_base_url = ""
+_lock = threading.Lock()
+
+
+def get_store() -> FixtureStore:
+    """Process-wide fixture store."""
+    global _store
+    with _lock:
+        if _store is None:
+            _store = FixtureStore()
+    return _store
+
+
+def base_url() -> str:
+    """Starts the local replay server on first use and returns its address."""
+    global _server, _base_url
+    with _lock:
+        if _server is None:
+            _server = ThreadingHTTPServer(("127.0.0.1", config.REPLAY_PORT), _ReplayHandler)
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, name="atlas-replay", daemon=True).start()
+            _base_url = f"http://127.0.0.1:{_server.server_address[1]}"
+            print(f"📼 Replay server on {_base_url} ({config.FIXTURE_DIR})")
+    return _base_url
+
+
+def local_url(url: str, via: str = "http") -> str:
+    """Where the replay server serves a live URL: SERP, stub search homepage or recorded page."""
+    parsed = urlparse(url if "://" in url else f"https://{url}")
+    engine = host_key(url)
+    query = parse_qs(parsed.query).get("q", [""])[0]
+    if engine in ("google", "ddg"):
+        if query:
+            return f"{base_url()}/serp/{engine}?q={quote(query)}"
+        if parsed.path in ("", "/"):
+            return f"{base_url()}/home/{engine}"
+    return f"{base_url()}/page?via={via}&url={quote(url, safe='')}"
+
+
+def record_page(via: str, url: str, final_url: str, status: int, content_type: str, body: str):
+    try:
+        get_store().put_page(via, url, final_url, status, content_type, body)
+    except Exception as e:
+        print(f"⚠️ Record failed for {url}: {e}")
+
+
+def record_serp(engine: str, query: str, body: str):
+    try:
+        get_store().put_serp(engine, query, body)
+    except Exception as e:
+        print(f"⚠️ Record failed for {engine}:{query}: {e}")
+
+
+def record_llm(model: str, system_prompt: str, prompt: str, response: str, latency: float):
+    try:
+        get_store().put_llm(model, system_prompt, prompt, response, latency)
+    except Exception as e:
+        print(f"⚠️ Record failed for LLM call: {e}")
+
+
+async def replay_llm(model: str, system_prompt: str, prompt: str) -> str:
+    """Recorded response after REPLAY_LLM_LATENCY seconds ('recorded' = the latency measured live)."""
+    found = get_store().get_llm(model, system_prompt, prompt)
+    response, recorded_latency = found if found else ("{}", 0.0)
+    if not found:
+        print(f"⚠️ Replay: no LLM response recorded for: {' '.join(prompt.split())[:80]}...")
+    latency = recorded_latency if config.REPLAY_LLM_LATENCY == "recorded" else float(config.REPLAY_LLM_LATENCY)
+    if latency > 0:
+        await asyncio.sleep(latency)  # Caller holds an LLM slot; requests beyond the limit queue as live
+    return response
@@ -0,0 +1,142 @@
+"""
+Extraction Schemas - One Definition per Field
+=============================================
+JSON Schemas for every LLM extraction call, derived from the pydantic
+models in data_models.py. They are passed to Ollama's `format` option, so
+the model's output is constrained to valid JSON of exactly this shape
+(keys, types, arrays) while it is generated; the prompt shows a skeleton
+of the same schema with each attribute's Field(description=...) in place of
+its value. Answers that merely copy a skeleton value are placeholders, not
+data (see is_placeholder).
+"""
+
+import json
+from typing import Dict, Iterable, List
+
+from data_models import CompanyProfile
+
+_PROFILE = CompanyProfile.model_json_schema()
+
+# Payload of MicroAgent's {"data": ...} answer per field: one profile field,
+# or sub-key -> profile field (None = not stored in the profile, plain string)
+FIELD_DATA = {
+    "description": "description_long",
+    "industry_details": {"industry": "industry", "sub_industry": "sub_industry", "sector": "sector", "tags": "tags"},
+    "products_services": "products_services",
+    "locations": "locations",
+    "hq_indicator": "hq_indicator",
+    "key_people": "key_people",
+    "tech_stack": "tech_stack",
+    "certifications": "certifications",
+    "contact_granular": {
+        "phone": "contact_phone", "sales": "sales_phone", "mobile": "mobile", "fax": "fax",
+        "other": "other_numbers", "email": "contact_email", "address": "full_address", "hours": "hours_of_operation",
+    },
+    "social_media": {
+        "linkedin": "social_linkedin", "twitter": "social_twitter", "facebook": "social_facebook",
+        "instagram": "social_instagram", "youtube": "social_youtube", "blog": "social_blog",
+        "articles": "social_articles",
+    },
+    "registration_details": {
+        "vat_number": "vat_number", "registration_number": "company_registration_number",
+        "sic_code": "sic_code", "year_founded": None,
+    },
+}
+
+# Extra top-level keys next to "data"
+FIELD_EXTRAS = {"products_services": {"type": "service_type"}}
+
+# Sub-keys asked for but not stored in the profile
+UNSTORED_PROPERTIES = {"year_founded": {"type": "string", "description": "Four-digit year the company was founded"}}
+
+# Bulk extraction field names that differ from the profile attribute
+BULK_ALIASES = {"long_description": "description_long", "short_description": "description_short"}
+
+
+def _simplify(schema: Dict) -> Dict:
+    """Pydantic property schema -> the plain form grammar-constrained decoding handles best."""
+    if "$ref" in schema:
+        return _simplify(_PROFILE["$defs"][schema["$ref"].split("/")[-1]])
+    described = {"description": schema["description"]} if "description" in schema else {}
+    if "anyOf" in schema:  # Optional[X]: the model writes "" rather than null
+        schema = next(s for s in schema["anyOf"] if s.get("type") != "null")
+    kind = schema.get("type", "string")
+    if kind == "array":
+        return {"type": "array", "items": _simplify(schema.get("items", {"type": "string"})), **described}
+    if kind == "object" and "properties" in schema:
+        return _object({key: _simplify(value) for key, value in schema["properties"].items()})
+    return {"type": kind, **described}
+
+
+def _object(properties: Dict[str, Dict]) -> Dict:
+    return {"type": "object", "properties": properties, "required": list(properties)}
+
+
+def profile_property(name: str) -> Dict:
+    """Schema of one CompanyProfile attribute (plain string for unknown names)."""
+    prop = _PROFILE["properties"].get(name) if name else None
+    return _simplify(prop) if prop else {"type": "string"}
+
+
+def data_keys(field_name: str) -> List[str]:
+    """Sub-keys of a dict-shaped MicroAgent field (empty for lists and strings)."""
+    data = FIELD_DATA.get(field_name)
+    return list(data) if isinstance(data, dict) else []
+
+
+def field_schema(field_name: str, skip: Iterable[str] = ()) -> Dict:
+    """MicroAgent answer schema: {"data": ...} plus any extras, without the sub-keys in `skip`."""
+    data = FIELD_DATA.get(field_name)
+    if isinstance(data, dict):
+        data_schema = _object({key: profile_property(attr) if attr else UNSTORED_PROPERTIES.get(key, {"type": "string"})
+                               for key, attr in data.items() if key not in skip})
+    else:
+        data_schema = profile_property(data)
+    properties = {"data": data_schema}
+    properties.update({key: profile_property(attr) for key, attr in FIELD_EXTRAS.get(field_name, {}).items()})
+    return _object(properties)
+
+
+def bulk_schema(fields: Iterable[str]) -> Dict:
+    """BulkExtractor answer schema: one key per requested field."""
+    return _object({field: profile_property(BULK_ALIASES.get(field, field)) for field in fields})
+
+
+def _skeleton(schema: Dict):
+    """Example answer: each value is its description (a list item: the list's), else its type."""
+    kind = schema.get("type")
+    if kind == "object":
+        return {key: _skeleton(value) for key, value in schema.get("properties", {}).items()}
+    if kind == "array":
+        items = schema["items"]
+        if "description" in schema and items.get("type") != "object":
+            items = {**items, "description": schema["description"]}
+        return [_skeleton(items)]
+    return schema.get("description", kind)
+
+
+def schema_hint(schema: Dict) -> str:
+    """Prompt line showing the shape the output is constrained to."""
+    return f"Return JSON: {json.dumps(_skeleton(schema))}"
+
+
+def _descriptions(schema: Dict):
+    if isinstance(schema, dict):
+        if isinstance(schema.get("description"), str):
+            yield schema["description"]
+        for value in schema.values():
+            yield from _descriptions(value)
+    elif isinstance(schema, list):
+        for value in schema:
+            yield from _descriptions(value)
+
+
+# Skeleton values a model may copy back instead of answering
+PLACEHOLDERS = {"string", "number", "integer", "boolean", "array", "object"} | {
+    text.lower() for text in _descriptions([_PROFILE, UNSTORED_PROPERTIES])
+}
+
+
+def is_placeholder(value) -> bool:
+    """True for a string that just repeats the prompt skeleton (a type name or a field description)."""
+    return isinstance(value, str) and value.strip().strip(".").lower() in PLACEHOLDERS
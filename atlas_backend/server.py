@@ -11,6 +11,9 @@ import pandas as pd
 from typing import List
 
 from agents import AutonomousLeadAgent
+from worker_pool import BrowserWorkerPool
+from session_manager import get_session_pool
+from llm_engine import warm_up
 from report_generator import generate_report
 from bulk_reporter import generate_bulk_excel
 from data_models import CompanyProfile
@@ -63,8 +66,11 @@ def run_agent_process(company: str, websocket: WebSocket, loop):
         )
 
     try:
-        agent = AutonomousLeadAgent(company, log_callback=log_bridge)
-        profile = agent.run_pipeline()
+        warm_up()  # Load the model while the browser is leased and the site crawled
+        # Borrow a warm browser; it stays open for the next request
+        with get_session_pool().lease() as browser:
+            agent = AutonomousLeadAgent(company, log_callback=log_bridge, browser=browser)
+            profile = agent.run_pipeline()
         
         # Save Outputs
         json_path = generate_report(profile) # This helper now saves JSON and PDF
@@ -110,38 +116,22 @@ def run_bulk_process(file_path: str, websocket: WebSocket, loop):
         total = len(domains)
         log_bridge(f"Found {total} valid domains to process (filtered blank rows).")
         
-        profiles = []
-        
-        # Limit removed for production run
-        # MAX_DEMO = 3 
-        processed_count = 0
-        
-        log_bridge(f"Starting full processing of {total} records.")
-
-        for i, domain in enumerate(domains):
-            log_bridge(f"--- Processing {i+1}/{total}: {domain} ---")
-            
-            try:
-                # Use domain as company name initially, agent might refine it
-                agent = AutonomousLeadAgent(domain, log_callback=log_bridge)
-                profile = agent.run_pipeline()
-                profiles.append(profile)
-                
-                # Send intermediate progress
-                asyncio.run_coroutine_threadsafe(
-                    manager.send_json({
-                        "type": "progress", 
-                        "current": i+1, 
-                        "total": total,
-                        "last_profile": profile.model_dump(mode='json')
-                    }, websocket), 
-                    loop
-                )
-            except Exception as e:
-                log_bridge(f"❌ Error processing {domain}: {str(e)}")
-                # Continue to next
-            
-            processed_count += 1
+        log_bridge(f"Starting full processing of {total} records with {config.BULK_WORKERS} workers.")
+
+        def on_result(completed, total, profile):
+            # Send intermediate progress
+            asyncio.run_coroutine_threadsafe(
+                manager.send_json({
+                    "type": "progress", 
+                    "current": completed, 
+                    "total": total,
+                    "last_profile": profile.model_dump(mode='json')
+                }, websocket), 
+                loop
+            )
+
+        pool = BrowserWorkerPool(config.BULK_WORKERS, log_callback=log_bridge)
+        profiles = pool.run(domains, on_result=on_result)
 
         # Generate Bulk Excel
         log_bridge("Generating Bulk Excel Report...")
@@ -0,0 +1,128 @@
+"""
+Browser Session Pool
+====================
+Lends already-running ResearchBrowser instances to agents so a bulk job
+does not pay a browser cold start per domain. Browsers are reset between
+leases (tabs, cookies, site storage) and recycled after a number of page
+loads or once the process tree grows past a memory threshold, which keeps
+long-lived Chrome memory leaks in check.
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import List, Optional
+
+from browser_engine import ResearchBrowser
+import config
+
+
+class BrowserSessionPool:
+    """Thread-safe pool of warm browsers, at most max_sessions alive at once."""
+
+    def __init__(self, max_sessions: int = None, log_callback=None):
+        self.max_sessions = max(1, max_sessions or config.SESSION_POOL_SIZE)
+        self.log_callback = log_callback
+        self._idle: List[ResearchBrowser] = []
+        self._alive = 0
+        self._cond = threading.Condition()
+        self.launched = 0
+        self.recycled = 0
+
+    def _log(self, message: str):
+        if self.log_callback:
+            self.log_callback(f"🔁 Sessions: {message}")
+        else:
+            print(f"🔁 Sessions: {message}")
+
+    def acquire(self, blocking: bool = True) -> Optional[ResearchBrowser]:
+        """
+        Returns a warm browser, launching one if the pool is below its limit.
+        With blocking=False returns None instead of waiting for a free session.
+        """
+        with self._cond:
+            while True:
+                while self._idle:
+                    browser = self._idle.pop()
+                    if browser.is_alive():
+                        return browser
+                    self._alive -= 1
+                    browser.close()
+                if self._alive < self.max_sessions:
+                    self._alive += 1
+                    break
+                if not blocking:
+                    return None
+                self._cond.wait()
+
+        try:
+            browser = ResearchBrowser()
+        except Exception:
+            with self._cond:
+                self._alive -= 1
+                self._cond.notify()
+            raise
+        self.launched += 1
+        return browser
+
+    def release(self, browser: ResearchBrowser, broken: bool = False):
+        """Resets the browser for the next domain, or recycles it if it is worn out."""
+        reason = "broken" if broken else self._recycle_reason(browser)
+        if not reason:
+            try:
+                browser.reset_session(clear_cookies=config.SESSION_RESET_COOKIES)
+            except Exception as e:
+                reason = f"reset failed ({e})"
+
+        if reason:
+            self._log(f"Recycling browser: {reason}")
+            browser.close()
+            self.recycled += 1
+            with self._cond:
+                self._alive -= 1
+                self._cond.notify()
+            return
+
+        with self._cond:
+            self._idle.append(browser)
+            self._cond.notify()
+
+    def _recycle_reason(self, browser: ResearchBrowser) -> str:
+        if browser.pages_loaded >= config.SESSION_MAX_PAGES:
+            return f"{browser.pages_loaded} pages loaded"
+        memory = browser.memory_mb()
+        if memory >= config.SESSION_MAX_MEMORY_MB:
+            return f"{memory:.0f} MB resident"
+        return ""
+
+    @contextmanager
+    def lease(self):
+        """with pool.lease() as browser: ... - a crash inside discards the browser."""
+        browser = self.acquire()
+        try:
+            yield browser
+        except Exception:
+            self.release(browser, broken=not browser.is_alive())
+            raise
+        self.release(browser)
+
+    def close_idle(self):
+        """Quits every idle browser (e.g. after a bulk job) to hand the memory back."""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._alive -= len(idle)
+            self._cond.notify_all()
+        for browser in idle:
+            browser.close()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_session_pool() -> BrowserSessionPool:
+    """Process-wide pool shared by single research runs and bulk workers."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BrowserSessionPool()
+    return _pool
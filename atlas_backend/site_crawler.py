@@ -0,0 +1,265 @@
+"""
+Official Site Crawler - First-Party Pages Before Search Engines
+===============================================================
+Finds the company's own contact / about / team / legal / careers pages from
+robots.txt, sitemap.xml and the homepage navigation, ranks them per category
+and reads the best few once per domain. Every field then starts from the
+same first-party text, so most of them need no search-engine traffic at all.
+"""
+
+import json
+import re
+import threading
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlparse, urldefrag
+from urllib.robotparser import RobotFileParser
+
+import config
+from content_extractor import extract_page
+from page_archive import get_archive
+
+# URL / link-text keywords per page category, strongest first
+CATEGORY_KEYWORDS = {
+    "contact": ["contact", "get-in-touch", "find-us", "locations", "offices", "support"],
+    "about": ["about", "who-we-are", "our-story", "company", "overview", "what-we-do", "services", "solutions"],
+    "team": ["team", "leadership", "management", "people", "board", "directors", "founders", "executives"],
+    "legal": ["imprint", "impressum", "legal", "terms", "privacy", "company-information", "modern-slavery"],
+    "careers": ["careers", "jobs", "join-us", "work-with-us", "vacancies", "hiring", "engineering"],
+}
+
+# Which categories answer which MicroAgent field (the homepage is always included)
+FIELD_CATEGORIES = {
+    "description": ["about"],
+    "industry_details": ["about"],
+    "products_services": ["about"],
+    "locations": ["contact", "about"],
+    "hq_indicator": ["contact", "legal"],
+    "key_people": ["team", "about"],
+    "tech_stack": ["careers"],
+    "contact_granular": ["contact", "legal"],
+    "social_media": ["contact"],
+    "registration_details": ["legal", "contact"],
+    "certifications": ["about", "legal"],
+}
+
+# Paths that are never worth reading for company facts
+SKIP_PATH = re.compile(
+    r"\.(pdf|jpe?g|png|gif|svg|webp|zip|mp4|docx?|xlsx?)$|/(wp-admin|wp-json|cart|checkout|login|signin|"
+    r"account|search|tag|category|feed)(/|$)|/(blog|news|insights|press)/.+",
+    re.IGNORECASE,
+)
+
+SITEMAP_LOC = re.compile(r"<loc>\s*(.*?)\s*</loc>", re.IGNORECASE | re.DOTALL)
+
+
+class _LinkParser(HTMLParser):
+    """Collects (href, anchor text) pairs from a page."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.links: List[Tuple[str, str]] = []
+        self._href: Optional[str] = None
+        self._text: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "a":
+            self._href = dict(attrs).get("href")
+            self._text = []
+
+    def handle_endtag(self, tag):
+        if tag == "a" and self._href:
+            self.links.append((self._href, " ".join("".join(self._text).split())))
+            self._href = None
+
+    def handle_data(self, data):
+        if self._href:
+            self._text.append(data)
+
+
+def _site_host(url: str) -> str:
+    host = urlparse(url).netloc.lower().split(":")[0]
+    return host[4:] if host.startswith("www.") else host
+
+
+def _score(url: str, text: str, keywords: List[str]) -> float:
+    """Higher for keywords early in the list, in the path, and on short (top-level) paths."""
+    path = urlparse(url).path.lower().strip("/")
+    text = text.lower()
+    best = 0.0
+    for rank, keyword in enumerate(keywords):
+        weight = len(keywords) - rank
+        if keyword in path.split("/")[-1]:
+            best = max(best, weight * 2.0)
+        elif keyword in path:
+            best = max(best, weight * 1.5)
+        elif keyword.replace("-", " ") in text:
+            best = max(best, weight * 1.0)
+    if best:
+        best /= 1 + path.count("/")
+    return best
+
+
+class OfficialSiteCrawler:
+    """Discovers and reads one company's first-party pages, shared across all fields."""
+
+    def __init__(self, browser, company: str, log_callback=None):
+        self.browser = browser
+        self.company = company
+        self.log_callback = log_callback
+        self.home_url = ""
+        self.pages_by_category: Dict[str, List[str]] = {}
+        self.content: Dict[str, str] = {}  # url -> extracted page text
+        self._home_html = ""  # Homepage as read during discovery, reused instead of a second load
+        self._robots: Optional[RobotFileParser] = None
+        self._lock = threading.Lock()
+        self._crawled = False
+
+    def _log(self, message: str):
+        if self.log_callback:
+            self.log_callback(f"🏠 Site: {message}")
+        else:
+            print(f"🏠 Site: {message}")
+
+    def _guess_home(self) -> str:
+        if "." in self.company:
+            domain = self.company.split("://")[-1].strip("/")
+            return f"https://{domain}" if domain.startswith("www.") else f"https://www.{domain}"
+        return f"https://www.{self.company.split('.')[0].replace(' ', '').lower()}.com"
+
+    # --- discovery ---
+    def _allowed(self, url: str) -> bool:
+        if self._robots is None:
+            return True
+        try:
+            return self._robots.can_fetch(config.USER_AGENT, url)
+        except Exception:
+            return True
+
+    def _internal(self, url: str) -> bool:
+        return url.startswith("http") and _site_host(url) == _site_host(self.home_url)
+
+    def _read_robots(self) -> List[str]:
+        """Parses robots.txt and returns the sitemaps it declares."""
+        result = self.browser.fetcher.fetch_raw(urljoin(self.home_url, "/robots.txt"))
+        if not result.html:
+            return []
+        robots = RobotFileParser()
+        robots.parse(result.html.splitlines())
+        self._robots = robots
+        return list(robots.site_maps() or [])
+
+    def _read_sitemaps(self, sitemaps: List[str]) -> List[str]:
+        """Walks sitemap indexes breadth-first; page sitemaps before post/product ones."""
+        queue = sitemaps or [urljoin(self.home_url, "/sitemap.xml"), urljoin(self.home_url, "/sitemap_index.xml")]
+        seen, urls = set(), []
+        while queue and len(seen) < 6 and len(urls) < config.CRAWL_SITEMAP_MAX_URLS:
+            sitemap = queue.pop(0)
+            if sitemap in seen or sitemap.endswith(".gz"):
+                continue
+            seen.add(sitemap)
+            body = self.browser.fetcher.fetch_raw(sitemap).html
+            locs = SITEMAP_LOC.findall(body or "")
+            if "<sitemapindex" in (body or "").lower():
+                children = [loc for loc in locs if self._internal(loc)]
+                children.sort(key=lambda loc: 0 if "page" in loc.lower() else 1)
+                queue.extend(children)
+                continue
+            urls.extend(loc for loc in locs if self._internal(loc))
+        return urls[:config.CRAWL_SITEMAP_MAX_URLS]
+
+    def _read_homepage(self) -> List[Tuple[str, str]]:
+        """Homepage links with their anchor text; follows the redirect to the canonical host."""
+        result = self.browser.fetcher.fetch(self.home_url)
+        html = result.html
+        if result.needs_browser and not result.reason.startswith("bot_wall"):
+            try:
+                self.browser.navigate(self.home_url)
+                html = self.browser.driver.page_source
+                get_archive().add(self.home_url, html, self.browser.driver.current_url, source="browser")
+                self.home_url = self.browser.driver.current_url or self.home_url
+                self._home_html = html
+            except Exception:
+                html = ""
+        else:
+            if result.final_url:
+                self.home_url = result.final_url
+            if not result.needs_browser:
+                self._home_html = html
+        parser = _LinkParser()
+        try:
+            parser.feed(html or "")
+            parser.close()
+        except Exception:
+            pass
+        return [(urldefrag(urljoin(self.home_url, href))[0], text) for href, text in parser.links]
+
+    def _rank(self, links: List[Tuple[str, str]]) -> Dict[str, List[str]]:
+        """Best few internal URLs per category."""
+        candidates: Dict[str, str] = {}
+        for url, text in links:
+            if self._internal(url) and not SKIP_PATH.search(urlparse(url).path) and self._allowed(url):
+                candidates.setdefault(url.rstrip("/"), text)
+
+        ranked = {}
+        for category, keywords in CATEGORY_KEYWORDS.items():
+            scored = [(_score(url, text, keywords), url) for url, text in candidates.items()]
+            scored = sorted((s for s in scored if s[0] > 0), key=lambda s: (-s[0], len(s[1])))
+            ranked[category] = [url for _, url in scored[:config.CRAWL_PAGES_PER_CATEGORY]]
+        return ranked
+
+    def _discover(self) -> Dict[str, List[str]]:
+        """Ranked page lists, served from the page cache on reruns."""
+        cached = self.browser.page_cache.get("site_links", self.home_url)
+        if cached is not None:
+            entry = json.loads(cached)
+            self.home_url = entry["home"]
+            return entry["pages"]
+
+        guessed = self.home_url
+        sitemaps = self._read_robots()
+        links = self._read_homepage()
+        links += [(url, "") for url in self._read_sitemaps(sitemaps)]
+        pages = self._rank(links)
+        self.browser.page_cache.put("site_links", guessed, json.dumps({"home": self.home_url, "pages": pages}))
+        self._log(f"Found {len(links)} links on {_site_host(self.home_url)} ("
+                  + ", ".join(f"{c}: {len(u)}" for c, u in pages.items()) + ")")
+        return pages
+
+    def crawl(self):
+        """Reads the homepage plus the top pages of every category, once per domain."""
+        with self._lock:
+            if self._crawled:
+                return
+            self._crawled = True
+            self.home_url = self._guess_home()
+            try:
+                self.pages_by_category = self._discover()
+            except Exception as e:
+                self._log(f"Discovery failed: {e}")
+                self.pages_by_category = {}
+
+            wanted = [self.home_url]
+            for urls in self.pages_by_category.values():
+                wanted.extend(url for url in urls if url not in wanted)
+            wanted = wanted[:config.CRAWL_MAX_PAGES]
+            # Discovery already loaded the homepage; only the other pages are fetched
+            home_text = extract_page(self._home_html) if self._home_html else ""
+            if home_text:
+                self.content[self.home_url] = home_text
+                self.browser.page_cache.put("text", self.home_url, home_text)
+            try:
+                pages = {**self.content, **self.browser.scrape_many([url for url in wanted if url not in self.content])}
+                self.content = {url: pages[url] for url in wanted if url in pages}
+            except Exception as e:
+                self._log(f"Page fetch failed: {e}")
+            self._log(f"Read {len(self.content)}/{len(wanted)} first-party pages")
+
+    def pages_for(self, field_name: str) -> str:
+        """First-party text relevant to one field: its categories' pages, then the homepage."""
+        self.crawl()
+        urls = []
+        for category in FIELD_CATEGORIES.get(field_name, ["about", "contact"]):
+            urls.extend(url for url in self.pages_by_category.get(category, []) if url not in urls)
+        urls.append(self.home_url)
+        return "".join(f"\n--- SOURCE: {url} ---\n{self.content[url]}\n" for url in urls if url in self.content)
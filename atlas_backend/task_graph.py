@@ -0,0 +1,174 @@
+"""
+Field Task Graph - Independent Fields Researched Concurrently
+============================================================
+An agent's pipeline as named tasks with declared dependencies (domain and
+logo first, the site crawl before the fields, the knowledge graph last).
+The executor starts every task whose dependencies are done, so independent
+fields overlap: while one waits on the LLM queue another is loading pages,
+and wall-clock time per domain approaches the slowest field instead of the
+sum of all of them.
+
+A Selenium driver is not thread-safe, so browser tasks run on lanes: the
+agent's own browser plus spare browsers leased from the session pool while
+it has capacity. With no spare (e.g. every bulk worker holds one) the
+fields simply queue on the agent's own browser, as before.
+"""
+
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import config
+from session_manager import get_session_pool
+
+
+class Task:
+    def __init__(self, name: str, fn: Callable, deps: Iterable[str] = (), needs_browser: bool = False):
+        self.name = name
+        self.fn = fn  # fn(lane) for browser tasks, fn() otherwise
+        self.deps = tuple(deps)
+        self.needs_browser = needs_browser
+
+
+class BrowserLanes:
+    """The agent's own browser plus spares leased from the session pool, each wrapped by make_lane(browser)."""
+
+    def __init__(self, browser, make_lane: Callable, max_lanes: int = None, log_callback=None):
+        self.make_lane = make_lane
+        self.max_lanes = max_lanes or config.FIELD_LANES
+        self.log_callback = log_callback
+        self._cond = threading.Condition()
+        self._idle = [make_lane(browser)]
+        self._leased: Dict[int, Any] = {}  # id(lane) -> browser borrowed from the pool
+        self._count = 1
+        self._exhausted = False  # The pool had no spare once; stop asking for this run
+
+    def _log(self, message):
+        if self.log_callback:
+            self.log_callback(f"TaskGraph: {message}")
+        else:
+            print(f"TaskGraph: {message}")
+
+    def acquire(self):
+        """An idle lane, a freshly leased one if the pool has a spare, otherwise waits for one."""
+        with self._cond:
+            while not self._idle:
+                if self._count < self.max_lanes and not self._exhausted:
+                    self._count += 1
+                    break
+                self._cond.wait()
+            else:
+                return self._idle.pop()
+
+        browser = None
+        try:
+            browser = get_session_pool().acquire(blocking=False)
+        except Exception as e:
+            self._log(f"⚠️ Could not launch a spare browser: {e}")
+        if browser is None:
+            with self._cond:
+                self._count -= 1
+                self._exhausted = True
+            return self.acquire()
+
+        lane = self.make_lane(browser)
+        with self._cond:
+            self._leased[id(lane)] = browser
+        self._log(f"🧵 Leased a spare browser (lane {self._count}/{self.max_lanes})")
+        return lane
+
+    def release(self, lane, more_work: bool = True):
+        """Returns a lane; a spare goes straight back to the pool once no browser task is left for it."""
+        with self._cond:
+            browser = None if more_work else self._leased.pop(id(lane), None)
+            if browser is None:
+                self._idle.append(lane)
+                self._cond.notify()
+                return
+            self._count -= 1
+        get_session_pool().release(browser, broken=not browser.is_alive())
+
+    def close(self):
+        """Hands every spare back to the pool (the agent's own browser is left alone)."""
+        with self._cond:
+            spares = [lane for lane in self._idle if id(lane) in self._leased]
+            self._idle = [lane for lane in self._idle if id(lane) not in self._leased]
+            browsers = [self._leased.pop(id(lane)) for lane in spares]
+            self._count -= len(browsers)
+        for browser in browsers:
+            get_session_pool().release(browser, broken=not browser.is_alive())
+
+
+class TaskGraph:
+    """Named tasks with dependencies, run as soon as their dependencies are done."""
+
+    def __init__(self, log_callback=None):
+        self.tasks: Dict[str, Task] = {}
+        self.log_callback = log_callback
+
+    def add(self, name: str, fn: Callable, deps: Iterable[str] = (), needs_browser: bool = False) -> "TaskGraph":
+        """Adds a task; dependencies must already be in the graph, which keeps it acyclic."""
+        if name in self.tasks:
+            raise ValueError(f"Duplicate task: {name}")
+        missing = [dep for dep in deps if dep not in self.tasks]
+        if missing:
+            raise ValueError(f"Task {name} depends on unknown tasks: {missing}")
+        self.tasks[name] = Task(name, fn, deps, needs_browser)
+        return self
+
+    def _log(self, message):
+        if self.log_callback:
+            self.log_callback(f"TaskGraph: {message}")
+        else:
+            print(f"TaskGraph: {message}")
+
+    def run(self, lanes: Optional[BrowserLanes] = None, max_workers: int = None) -> Dict[str, Any]:
+        """
+        Runs every task and returns name -> result. The first failure stops new
+        tasks from starting and is re-raised once the running ones have finished.
+        """
+        results: Dict[str, Any] = {}
+        pending: List[Task] = list(self.tasks.values())
+        running = {}
+        error = None
+        workers = max_workers or max(1, lanes.max_lanes if lanes else 1)
+
+        # Browser tasks that have not got a lane yet; while any remain, finished lanes are kept
+        waiting = [sum(task.needs_browser for task in pending)]
+        waiting_lock = threading.Lock()
+
+        def execute(task: Task):
+            if not task.needs_browser:
+                return task.fn()
+            lane = lanes.acquire()
+            with waiting_lock:
+                waiting[0] -= 1
+            try:
+                return task.fn(lane)
+            finally:
+                with waiting_lock:
+                    more_work = waiting[0] > 0
+                lanes.release(lane, more_work=more_work)
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="field") as pool:
+            while pending or running:
+                if error is None:
+                    ready = [task for task in pending if all(dep in results for dep in task.deps)]
+                    for task in ready:
+                        pending.remove(task)
+                        running[pool.submit(execute, task)] = task
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task = running.pop(future)
+                    try:
+                        results[task.name] = future.result()
+                    except Exception as e:
+                        self._log(f"❌ Task {task.name} failed: {e}")
+                        error = error or e
+        if error is not None:
+            raise error
+        if pending:
+            raise RuntimeError(f"Unreachable tasks: {[task.name for task in pending]}")
+        return results
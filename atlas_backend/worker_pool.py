@@ -0,0 +1,120 @@
+"""
+Browser Worker Pool - Parallel Bulk Research
+============================================
+Runs N workers for the duration of a bulk job. Every worker pulls domains
+from one shared queue, leases a warm browser from the session pool for each
+domain and reports into the same log / progress callbacks.
+"""
+
+import queue
+import threading
+from typing import Callable, List, Optional
+
+from agents import AutonomousLeadAgent
+from cache_store import get_llm_cache, get_page_cache, get_search_cache
+from data_models import CompanyProfile
+from llm_engine import get_llm_timings, get_model_router, warm_up
+from session_manager import get_session_pool
+from rate_limiter import get_scheduler
+import config
+
+
+class BrowserWorkerPool:
+    """Runs a list of domains across a pool of long-lived browser workers."""
+
+    def __init__(self, num_workers: int = None, log_callback=None):
+        self.num_workers = max(1, num_workers or config.BULK_WORKERS)
+        self.log_callback = log_callback
+        self._lock = threading.Lock()
+        self._completed = 0
+
+    def _log(self, message: str):
+        if self.log_callback:
+            self.log_callback(message)
+        else:
+            print(message)
+
+    def run(self, domains: List[str],
+            on_result: Optional[Callable[[int, int, CompanyProfile], None]] = None) -> List[CompanyProfile]:
+        """
+        Researches every domain and returns the profiles in input order.
+        on_result(completed, total, profile) fires as each domain finishes.
+        """
+        total = len(domains)
+        jobs = queue.Queue()
+        for index, domain in enumerate(domains):
+            jobs.put((index, domain))
+
+        results: List[Optional[CompanyProfile]] = [None] * total
+        self._completed = 0
+        worker_count = min(self.num_workers, total) or 1
+
+        self._log(f"🧵 Starting {worker_count} browser workers for {total} domains...")
+        warm_up()  # The model loads while the browsers start
+        threads = []
+        for worker_id in range(1, worker_count + 1):
+            t = threading.Thread(
+                target=self._worker_loop,
+                args=(worker_id, jobs, results, total, on_result),
+                name=f"atlas-worker-{worker_id}",
+                daemon=True,
+            )
+            t.start()
+            threads.append(t)
+
+        for t in threads:
+            t.join()
+
+        sessions = get_session_pool()
+        self._log(f"🔁 Browsers launched: {sessions.launched}, recycled: {sessions.recycled}")
+        sessions.close_idle()
+
+        for host, stats in sorted(get_scheduler().stats().items(), key=lambda kv: -kv[1]["requests"])[:5]:
+            self._log(f"🚦 {host}: {stats['requests']} requests, {stats['captchas']} captchas ({stats['captcha_rate']:.1%}), slowdown x{stats['slowdown']}")
+
+        for label, cache in (("Page", get_page_cache()), ("SERP", get_search_cache()), ("LLM", get_llm_cache())):
+            stats = cache.stats()
+            self._log(f"💾 {label} cache: {stats['hits']} hits / {stats['misses']} misses "
+                      f"({stats['hit_rate']:.0%}), {stats['entries']} entries, {stats['size_mb']} MB")
+
+        timings = get_llm_timings().stats()
+        self._log(f"⏱️ LLM: {timings['calls']} calls, {timings['cold_loads']} cold loads (avg load {timings['avg_load_ms']} ms), "
+                  f"{timings['avg_prompt_tokens_evaluated']} prompt tokens evaluated per call at {timings['prompt_tokens_per_s']} tok/s, "
+                  f"first token {timings['avg_ttft_ms']} ms, generation {timings['eval_tokens_per_s']} tok/s")
+        for field, stats in sorted(get_model_router().stats().items()):
+            self._log(f"🔀 {field}: {stats['small_calls']} small-model answers, "
+                      f"{stats['escalations']} escalated ({stats['escalation_rate']:.0%})")
+        return [p for p in results if p is not None]
+
+    def _worker_loop(self, worker_id, jobs, results, total, on_result):
+        prefix = f"[W{worker_id}]"
+
+        def worker_log(msg):
+            self._log(f"{prefix} {msg}")
+
+        sessions = get_session_pool()
+        while True:
+            try:
+                index, domain = jobs.get_nowait()
+            except queue.Empty:
+                break
+
+            worker_log(f"--- Processing {index+1}/{total}: {domain} ---")
+            profile = None
+            try:
+                # The pool resets the browser between domains and replaces it if it crashed
+                with sessions.lease() as browser:
+                    # Use domain as company name initially, agent might refine it
+                    agent = AutonomousLeadAgent(domain, log_callback=worker_log, browser=browser)
+                    profile = agent.run_pipeline()
+                results[index] = profile
+            except Exception as e:
+                worker_log(f"❌ Error processing {domain}: {str(e)}")
+
+            with self._lock:
+                self._completed += 1
+                completed = self._completed
+            if profile is not None and on_result:
+                on_result(completed, total, profile)
+
+        worker_log("Worker finished.")